@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+建立預先融合 / 量化的模型檔案
+Fuse a LoRA adapter into the base model, optionally quantize it, and save the
+bundle the server loads at startup (LLM_FUSE_ADAPTER / LLM_QUANTIZE_BITS)
+
+    python build_artifact.py --adapter translation_v2 --bits 4
+"""
+import argparse
+import logging
+from pathlib import Path
+from src.agents import artifacts
+from src.config import settings
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a fused / quantized model artifact")
+    parser.add_argument("--model", default=settings.llm_model, help="Base model (Hugging Face repo or path)")
+    parser.add_argument("--adapter", default=settings.llm_fuse_adapter or None,
+                        help=f"Adapter name under {settings.adapters_dir}/ or adapter directory to fuse in")
+    parser.add_argument("--bits", type=int, choices=[4, 8], default=settings.llm_quantize_bits or None,
+                        help="Quantize to 4 or 8 bits")
+    parser.add_argument("--group-size", type=int, default=64, help="Quantization group size")
+    parser.add_argument("--out", default=settings.llm_artifacts_dir, help="Artifacts directory")
+    args = parser.parse_args()
+
+    adapter_path = None
+    if args.adapter:
+        adapter_path = Path(args.adapter)
+        if not adapter_path.is_dir():
+            adapter_path = Path(settings.adapters_dir) / args.adapter
+        if not (adapter_path / "adapters.safetensors").exists():
+            parser.error(f"No adapters.safetensors in {adapter_path}")
+
+    existing = artifacts.find(args.out, args.model, adapter_path, args.bits)
+    if existing:
+        print(f"✓ Already built: {existing}")
+        return
+    path = artifacts.build(args.out, args.model, adapter_path, args.bits, args.group_size)
+    print(f"✓ Artifact saved to {path}")
+    print("  Start the server with the same LLM_FUSE_ADAPTER / LLM_QUANTIZE_BITS to use it")
+
+
+if __name__ == "__main__":
+    main()
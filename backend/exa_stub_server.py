@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+本地 Exa 模擬伺服器
+Local stand-in for the Exa search API, for running the backend offline and
+exercising the search client's timeouts, retries and circuit breaker
+
+    python exa_stub_server.py --port 8765 --delay 0.5 --fail-rate 0.2
+    EXA_BASE_URL=http://127.0.0.1:8765 EXA_API_KEY=stub python -m src
+"""
+import argparse
+import asyncio
+import random
+from aiohttp import web
+
+
+def make_app(delay: float, jitter: float, fail_rate: float, empty_rate: float) -> web.Application:
+    stats = {"requests": 0, "failed": 0}
+
+    async def search(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        body = await request.json()
+        await asyncio.sleep(delay + random.uniform(0, jitter))
+        if random.random() < fail_rate:
+            stats["failed"] += 1
+            return web.json_response({"error": "stub failure"}, status=503)
+        query = body.get("query", "")
+        if random.random() < empty_rate:
+            return web.json_response({"results": []})
+        results = [
+            {
+                "url": f"https://example.com/{i}",
+                "title": f"Stub result {i + 1} for {query[:40]}",
+                "text": f"'{query}' is explained here (stub result {i + 1}).",
+            }
+            for i in range(body.get("numResults", 3))
+        ]
+        return web.json_response({"results": results})
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post("/search", search)
+    app.router.add_get("/stats", health)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Exa search server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds before every response")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Extra random delay, up to this many seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="Fraction of requests with no results")
+    args = parser.parse_args()
+    print(f"Stub Exa on http://{args.host}:{args.port} (POST /search, GET /stats)")
+    web.run_app(make_app(args.delay, args.jitter, args.fail_rate, args.empty_rate), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
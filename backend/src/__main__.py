@@ -0,0 +1,49 @@
+"""
+Server launcher: python -m src
+Runs uvicorn on src.main:socket_app without importing the app here.
+Spawned processes re-run the parent's main module unless it is a package
+__main__, so with this launcher the transcription workers never import the app.
+"""
+import atexit
+import multiprocessing
+import signal
+import sys
+from src.config import logger
+
+
+def cleanup_resources():
+    """Clean up resources on exit"""
+    logger.info("Cleaning up resources...")
+    try:
+        # Flush every ASR session and release the loaded backends
+        from src.audio.backends import asr_backends
+        asr_backends.shutdown()
+        from src.services.transcription_jobs import transcription_jobs
+        transcription_jobs.shutdown()
+        from src.services.exa import exa_client
+        exa_client.cache.close()
+    except Exception as e:
+        logger.warning(f"Error during cleanup: {e}")
+
+
+def signal_handler(sig, frame):
+    """Handle shutdown signals gracefully"""
+    logger.info("Received shutdown signal, cleaning up...")
+    cleanup_resources()
+    sys.exit(0)
+
+
+def main():
+    multiprocessing.freeze_support()
+
+    # Register cleanup handlers
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    atexit.register(cleanup_resources)
+
+    import uvicorn
+    uvicorn.run("src.main:socket_app", host="0.0.0.0", port=8000, reload=True)
+
+
+if __name__ == "__main__":
+    main()
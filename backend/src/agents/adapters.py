@@ -0,0 +1,174 @@
+"""
+LoRA adapter registry
+LoRA layers are applied to the base model once; switching adapters swaps the
+small lora_a/lora_b arrays in place, so any number of adapters share one copy
+of the base weights. A bounded LRU of adapter weights stays resident.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import mlx.core as mx
+from mlx.utils import tree_flatten
+from mlx_lm.tuner.utils import linear_to_lora_layers
+
+logger = logging.getLogger(__name__)
+
+BASE = "base"        # No adapter (all LoRA deltas zero)
+DEFAULT = "default"  # Alias for the configured default adapter
+
+ADAPTER_LEAVES = ("lora_a", "lora_b")
+
+
+class AdapterRegistry:
+    """Adapters found under `root` (one directory each), applied per request"""
+
+    def __init__(self, root: str = "adapters", max_resident: int = 4, default: str = None):
+        self.root = Path(root)
+        self.max_resident = max(1, max_resident)
+        self.default = default or BASE
+        self.paths: dict[str, Path] = {}
+        self.model = None
+        self.enabled = False  # LoRA layers applied to the model
+        self.active = BASE
+        self.fused = None  # Adapter baked into the loaded weights (prebuilt artifact); no swapping
+        self.resident: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._zeros: dict[str, mx.array] = {}
+        self._rank = 0
+        self._lock = threading.Lock()
+        # Metrics
+        self.loads = 0
+        self.evictions = 0
+        self.switches = 0
+        self.scan()
+
+    def scan(self):
+        """Register every directory under root that holds an adapter_config.json"""
+        if self.root.is_dir():
+            for config in sorted(self.root.glob("*/adapter_config.json")):
+                self.paths.setdefault(config.parent.name, config.parent)
+        return list(self.paths)
+
+    def register(self, name: str, path: str):
+        self.paths[name] = Path(path)
+
+    def _config(self, name: str) -> dict:
+        with open(self.paths[name] / "adapter_config.json") as f:
+            return json.load(f)
+
+    def resolve(self, name: str | None) -> str:
+        """Canonical adapter name for a request ("default" -> configured adapter)"""
+        if not name or name == DEFAULT:
+            name = self.default
+        if not self.enabled or name == BASE:
+            return BASE
+        if name not in self.paths:
+            raise ValueError(f"Unknown adapter '{name}' (available: {', '.join(self.paths) or 'none'})")
+        return name
+
+    def attach(self, model):
+        """
+        Apply LoRA layers covering every registered adapter (blocking, MLX thread)
+        Layers get the largest rank and depth among the adapters; smaller
+        adapters are zero-padded when loaded.
+        """
+        self.model = model
+        configs = {}
+        for name in list(self.paths):
+            try:
+                config = self._config(name)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping adapter {name}: {e}")
+                self.paths.pop(name)
+                continue
+            if config.get("fine_tune_type", "lora") != "lora":
+                logger.warning(f"Skipping adapter {name}: only LoRA adapters can be swapped")
+                self.paths.pop(name)
+                continue
+            configs[name] = config
+        if not configs:
+            logger.info("No LoRA adapters registered; using the base model")
+            return
+
+        num_layers = max(c["num_layers"] for c in configs.values())
+        self._rank = max(c["lora_parameters"]["rank"] for c in configs.values())
+        lora_parameters = {**next(iter(configs.values()))["lora_parameters"], "rank": self._rank, "dropout": 0.0}
+        linear_to_lora_layers(model, num_layers, lora_parameters)
+        model.eval()
+
+        # Shared zeros put back for layers an adapter doesn't cover
+        self._zeros = {
+            name: mx.zeros_like(param)
+            for name, param in tree_flatten(model.parameters())
+            if name.rsplit(".", 1)[-1] in ADAPTER_LEAVES
+        }
+        self.enabled = True
+        self.active = None
+        self.activate(BASE)
+        logger.info(f"LoRA layers applied ({num_layers} layers, rank {self._rank}); adapters: {', '.join(self.paths)}")
+
+    def _load(self, name: str) -> tuple[dict, float]:
+        config = self._config(name)
+        raw = mx.load(str(self.paths[name] / "adapters.safetensors"))
+        weights = {}
+        for key, w in raw.items():
+            target = self._zeros.get(key)
+            if target is None:
+                raise ValueError(f"Adapter {name}: {key} is not a LoRA parameter of the model")
+            if w.shape != target.shape:
+                # Lower-rank adapter: pad the rank dimension with zeros
+                pad = [(0, t - s) for s, t in zip(w.shape, target.shape)]
+                if any(p < 0 for _, p in pad):
+                    raise ValueError(f"Adapter {name}: {key} shape {w.shape} exceeds {target.shape}")
+                w = mx.pad(w, pad)
+            weights[key] = w.astype(target.dtype)
+        mx.eval(list(weights.values()))
+        self.loads += 1
+        logger.info(f"Loaded adapter {name} ({len(weights)} tensors)")
+        return weights, float(config["lora_parameters"]["scale"])
+
+    def _resident(self, name: str) -> tuple[dict, float]:
+        with self._lock:
+            entry = self.resident.get(name)
+            if entry is not None:
+                self.resident.move_to_end(name)
+                return entry
+        entry = self._load(name)
+        with self._lock:
+            self.resident[name] = entry
+            while len(self.resident) > self.max_resident:
+                evicted, _ = self.resident.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Evicted adapter {evicted}")
+        return entry
+
+    def activate(self, name: str):
+        """Point the LoRA layers at an adapter's weights (MLX thread, between forward passes)"""
+        name = self.resolve(name)
+        if not self.enabled or name == self.active:
+            return
+        if name == BASE:
+            weights, scale = {}, 0.0
+        else:
+            weights, scale = self._resident(name)
+        self.model.load_weights(list({**self._zeros, **weights}.items()), strict=False)
+        for _, module in self.model.named_modules():
+            if hasattr(module, "lora_a"):
+                module.scale = scale
+        self.active = name
+        self.switches += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "available": list(self.paths),
+            "default": self.default,
+            "fused": self.fused,
+            "active": self.active,
+            "resident": list(self.resident),
+            "max_resident": self.max_resident,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "switches": self.switches,
+        }
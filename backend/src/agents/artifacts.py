@@ -0,0 +1,99 @@
+"""
+Prebuilt model artifacts
+A LoRA adapter fused into the base weights, optionally quantized, saved as a
+safetensors bundle. Loading it skips the LoRA layers and quantization at
+startup, and the files are memory-mapped read-only, so processes share them.
+A bundle's directory name is its cache key: format version, base model,
+adapter name + content hash, and quantization.
+"""
+import hashlib
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+from mlx.utils import tree_unflatten
+from mlx_lm.utils import load, quantize_model, save
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = "artifact.json"
+ADAPTER_FILES = ("adapter_config.json", "adapters.safetensors")
+
+
+def adapter_hash(adapter_path: str) -> str:
+    """Content hash of an adapter's config and weights"""
+    digest = hashlib.sha256()
+    for name in ADAPTER_FILES:
+        with open(Path(adapter_path) / name, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def artifact_name(base_model: str, adapter_path: str = None, bits: int = None) -> str:
+    base = base_model.rstrip("/").split("/")[-1].lower()
+    adapter = f"{Path(adapter_path).name}-{adapter_hash(adapter_path)}" if adapter_path else "noadapter"
+    quant = f"q{bits}" if bits else "full"
+    return f"v{FORMAT_VERSION}--{base}--{adapter}--{quant}"
+
+
+def find(root: str, base_model: str, adapter_path: str = None, bits: int = None) -> Path | None:
+    """The bundle for this combination, if it has been built"""
+    path = Path(root) / artifact_name(base_model, adapter_path, bits)
+    try:
+        with open(path / MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    return path
+
+
+def build(root: str, base_model: str, adapter_path: str = None, bits: int = None, group_size: int = 64) -> Path:
+    """
+    Fuse and quantize a model and write it as a bundle (blocking, minutes for a 3B model)
+    Args:
+        root: directory holding bundles
+        base_model: Hugging Face repo or local path
+        adapter_path: LoRA adapter directory to fuse in (None for the plain base)
+        bits: 4 or 8 to quantize, None to keep the original precision
+    Returns:
+        Bundle directory
+    """
+    if bits not in (None, 4, 8):
+        raise ValueError(f"Unsupported quantization: {bits} bits (use 4 or 8)")
+    name = artifact_name(base_model, adapter_path, bits)
+    path = Path(root) / name
+    start = time.perf_counter()
+    logger.info(f"Building model artifact {name}...")
+
+    model, tokenizer, config = load(base_model, adapter_path=adapter_path, return_config=True)
+    fused = [(n, m.fuse()) for n, m in model.named_modules() if hasattr(m, "fuse")]
+    if fused:
+        model.update_modules(tree_unflatten(fused))
+    if bits:
+        model, config = quantize_model(model, config, group_size=group_size, bits=bits)
+
+    # Written beside the final location, then renamed, so a half-written
+    # bundle is never picked up
+    tmp = path.with_name(name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    save(tmp, base_model, model, tokenizer, config, donate_model=False)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "base_model": base_model,
+        "adapter": Path(adapter_path).name if adapter_path else None,
+        "adapter_hash": adapter_hash(adapter_path) if adapter_path else None,
+        "quantization": {"bits": bits, "group_size": group_size} if bits else None,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(tmp / MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.rename(path)
+
+    logger.info(f"Model artifact {name} built in {time.perf_counter() - start:.0f}s")
+    return path
@@ -0,0 +1,68 @@
+"""
+Label scoring from one forward pass
+Instead of generating an answer and parsing it, the prompt is prefilled once
+and the next-token log-probabilities of the candidate labels are compared
+(spelling variants of a label are pooled). The log-odds between the positive
+and negative label are calibrated with a temperature and bias (Platt scaling,
+fit offline on labelled transcripts) into a probability.
+"""
+import math
+from dataclasses import dataclass
+import mlx.core as mx
+
+
+@dataclass
+class Calibration:
+    temperature: float = 1.0
+    bias: float = 0.0
+    threshold: float = 0.5
+
+    def probability(self, log_odds: float) -> float:
+        z = log_odds / self.temperature + self.bias
+        return 1.0 / (1.0 + math.exp(-z)) if z >= 0 else math.exp(z) / (1.0 + math.exp(z))
+
+
+@dataclass
+class LabelScore:
+    probability: float  # Calibrated probability of the positive label
+    decision: bool  # probability >= threshold
+    log_odds: float  # Raw positive vs negative log-odds
+    label_mass: float  # Next-token probability on either label; low means the prompt is off
+
+
+def label_token_ids(tokenizer, label: str) -> list[int]:
+    """First tokens of the spellings a label may be answered with ("YES", " YES", "yes", " Yes"...)"""
+    variants = {label, label.lower(), label.capitalize()}
+    ids = set()
+    for variant in variants:
+        for text in (variant, " " + variant):
+            tokens = tokenizer.encode(text, add_special_tokens=False)
+            if tokens:
+                ids.add(tokens[0])
+    return sorted(ids)
+
+
+def label_logprobs(model, prompt_tokens: list[int], cache, label_ids: list[list[int]]) -> list[float]:
+    """
+    Prefill the prompt and pool each label's next-token log-probability (MLX thread)
+    Args:
+        cache: KV cache already holding any leading tokens not in prompt_tokens
+        label_ids: token ids of each label's variants
+    """
+    logits = model(mx.array(prompt_tokens)[None], cache=cache)[0, -1].astype(mx.float32)
+    logprobs = logits - mx.logsumexp(logits)
+    scores = [mx.logsumexp(logprobs[mx.array(ids)]) for ids in label_ids]
+    mx.eval(scores)
+    return [score.item() for score in scores]
+
+
+def score(logprobs: list[float], calibration: Calibration) -> LabelScore:
+    """Turn (positive, negative) label log-probabilities into a decision"""
+    positive, negative = logprobs
+    probability = calibration.probability(positive - negative)
+    return LabelScore(
+        probability=probability,
+        decision=probability >= calibration.threshold,
+        log_odds=positive - negative,
+        label_mass=math.exp(positive) + math.exp(negative),
+    )
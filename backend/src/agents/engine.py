@@ -0,0 +1,367 @@
+"""
+Continuous-batching LLM decoding
+Concurrent generate() calls share forward passes: new prompts join the
+in-flight batch at the next token boundary and finished sequences leave it
+immediately. Runs on the MLX inference thread with mlx_lm's BatchGenerator,
+which keeps one KV cache per sequence in a shared batched cache.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+import mlx.core as mx
+from mlx_lm.generate import BatchGenerator, speculative_generate_step
+from mlx_lm.models.cache import make_prompt_cache
+from src.executor import InferenceQueueFull, InferenceCancelled
+from src.agents.prefix_cache import split_prefix
+from src.agents import speculative, classifier
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationRequest:
+    """One prompt travelling through the batch"""
+
+    def __init__(self, prompt_tokens: list[int], max_tokens: int, loop: asyncio.AbstractEventLoop,
+                 stream: bool = False, prefix_len: int = 0, adapter: str = "default", labels: list[list[int]] = None):
+        self.prompt_tokens = prompt_tokens
+        self.prefix_len = prefix_len  # Leading tokens served from the prefix cache
+        self.adapter = adapter
+        self.labels = labels  # Score these label tokens after one prefill instead of decoding
+        self.max_tokens = max_tokens
+        self.loop = loop
+        self.future = loop.create_future()
+        self.queue = asyncio.Queue() if stream else None  # Tokens as they decode, then None
+        self.cancel = threading.Event()  # Set when the caller goes away
+        self.tokens: list[int] = []
+        self.finish_reason = None
+
+    def _push(self, token: int):
+        self.tokens.append(token)
+        if self.queue is not None:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, token)
+
+    def _resolve(self, result=None, error: Exception = None):
+        def settle():
+            if self.queue is not None:
+                self.queue.put_nowait(None)
+            if self.future.done():
+                return
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+        self.loop.call_soon_threadsafe(settle)
+
+
+class ContinuousBatchEngine:
+    """Admits prompts into a running decode batch at token boundaries"""
+
+    def __init__(self, executor, max_batch: int = 8, prefill_batch: int = 4, max_pending: int = 16,
+                 prefix_cache=None, adapters=None, num_draft_tokens: int = 3, speculative_max_tokens: int = 64):
+        self.executor = executor  # The MLX InferenceExecutor; the decode loop runs as one long job
+        self.prefix_cache = prefix_cache
+        self.adapters = adapters  # AdapterRegistry; a batch decodes under one adapter at a time
+        self._batch_adapter = None
+        # A request decoding alone is drafted by the small model when it is
+        # short enough that later arrivals don't wait long for the batch
+        self.draft_model = None
+        self.num_draft_tokens = num_draft_tokens
+        self.speculative_max_tokens = speculative_max_tokens
+        self.speculation = speculative.SpeculationStats(num_draft_tokens)
+        self.max_batch = max_batch
+        self.prefill_batch = min(prefill_batch, max_batch)
+        self.max_pending = max_pending
+        self.model = None
+        self.tokenizer = None
+        self.generator = None
+        self._incoming: deque[GenerationRequest] = deque()
+        self._active: dict[int, GenerationRequest] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        # Metrics
+        self.requests = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.scored = 0
+        self.generated_tokens = 0
+        self.steps = 0
+        self.peak_batch = 0
+
+    def attach(self, model, tokenizer, draft_model=None):
+        """Use a (newly) loaded model; the batch generator is rebuilt on next use"""
+        self.model = model
+        self.tokenizer = tokenizer
+        self.draft_model = draft_model
+        self.generator = None
+
+    def _generator(self) -> BatchGenerator:
+        if self.generator is None:
+            self.generator = BatchGenerator(
+                self.model,
+                stop_tokens=[[t] for t in self.tokenizer.eos_token_ids],
+                completion_batch_size=self.max_batch,
+                prefill_batch_size=self.prefill_batch,
+            )
+        return self.generator
+
+    def _submit(self, prompt: str, max_tokens: int, stream: bool = False,
+                prefix: str = None, adapter: str = "default", labels: list[list[int]] = None) -> GenerationRequest:
+        if self.adapters:
+            adapter = self.adapters.resolve(adapter)
+        prefix_len, tokens = split_prefix(self.tokenizer, prompt, prefix if self.prefix_cache else None)
+        request = GenerationRequest(
+            tokens, max_tokens, asyncio.get_running_loop(),
+            stream=stream, prefix_len=prefix_len, adapter=adapter, labels=labels
+        )
+        with self._lock:
+            if len(self._incoming) + len(self._active) >= self.max_pending:
+                self.rejected += 1
+                raise InferenceQueueFull(f"LLM batch full ({self.max_pending} sequences)")
+            self._incoming.append(request)
+            self.requests += 1
+            start_loop = not self._running
+            self._running = True
+        if start_loop:
+            self.executor.submit(self._decode_loop)
+        return request
+
+    async def generate(self, prompt: str, max_tokens: int = 100, prefix: str = None, adapter: str = "default") -> str:
+        """
+        Decode one prompt as part of the shared batch
+        Args:
+            prefix: static leading part of the prompt whose KV state may be reused
+        Raises:
+            InferenceQueueFull: if max_pending sequences are already queued or decoding
+        """
+        request = self._submit(prompt, max_tokens, prefix=prefix, adapter=adapter)
+        try:
+            tokens = await request.future
+        except asyncio.CancelledError:
+            # Leaves the batch at the next token boundary
+            request.cancel.set()
+            request.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise
+        return self.tokenizer.decode(tokens)
+
+    async def score(self, prompt: str, label_ids: list[list[int]], prefix: str = None, adapter: str = "default") -> list[float]:
+        """
+        Next-token log-probability of each label after the prompt, from one prefill
+        Runs between decode steps without joining the batch.
+        """
+        request = self._submit(prompt, 0, prefix=prefix, adapter=adapter, labels=label_ids)
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            request.cancel.set()
+            request.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise
+
+    async def stream(self, prompt: str, max_tokens: int = 100, prefix: str = None, adapter: str = "default"):
+        """
+        Decode one prompt as part of the shared batch, yielding text as it is produced
+        Closing the generator early drops the sequence from the batch.
+        """
+        request = self._submit(prompt, max_tokens, stream=True, prefix=prefix, adapter=adapter)
+        detokenizer = self.tokenizer.detokenizer
+        try:
+            while (token := await request.queue.get()) is not None:
+                detokenizer.add_token(token)
+                segment = detokenizer.last_segment
+                if segment:
+                    yield segment
+            await request.future  # Raises if decoding failed
+            detokenizer.finalize()
+            segment = detokenizer.last_segment
+            if segment:
+                yield segment
+        finally:
+            if not request.future.done():
+                request.cancel.set()
+                # Nobody awaits the cancellation error
+                request.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def _decode_loop(self, cancel=None):
+        """Step the batch until no sequence is left (MLX thread)"""
+        generator = self._generator()
+        try:
+            while True:
+                with self._lock:
+                    if not self._incoming and not self._active:
+                        self._running = False
+                        return
+                    admitted = self._admissible()
+
+                for request in [r for r in admitted if r.cancel.is_set()]:
+                    # Cancelled while queued: settle it so nothing awaiting it hangs
+                    request._resolve(error=InferenceCancelled("Generation cancelled"))
+                    self.cancelled += 1
+                admitted = [r for r in admitted if not r.cancel.is_set()]
+                if admitted and self.adapters:
+                    # Batch is empty whenever the adapter changes
+                    self.adapters.activate(self._batch_adapter)
+                for request in [r for r in admitted if r.labels is not None]:
+                    self._score(request)
+                admitted = [r for r in admitted if r.labels is None]
+                if self._speculate(admitted):
+                    self._decode_speculative(admitted[0])
+                    continue
+                if admitted:
+                    # Prefixed prompts start from a copy of the cached prefix state
+                    uids = generator.insert(
+                        [r.prompt_tokens[r.prefix_len:] for r in admitted],
+                        [r.max_tokens for r in admitted],
+                        caches=[self._prefix_state(r) for r in admitted]
+                    )
+                    self._active.update(zip(uids, admitted))
+
+                gone = [uid for uid, r in self._active.items() if r.cancel.is_set()]
+                if gone:
+                    generator.remove(gone)
+                    for uid in gone:
+                        self._active.pop(uid)._resolve(error=InferenceCancelled("Generation cancelled"))
+                        self.cancelled += 1
+                if not self._active:
+                    continue
+
+                self.peak_batch = max(self.peak_batch, len(self._active))
+                responses = generator.next_generated()
+                self.steps += 1
+                for response in responses:
+                    request = self._active.get(response.uid)
+                    if request is None:
+                        continue
+                    if response.finish_reason != "stop":
+                        request._push(response.token)
+                        self.generated_tokens += 1
+                    if response.finish_reason is not None:
+                        request.finish_reason = response.finish_reason
+                        del self._active[response.uid]
+                        request._resolve(request.tokens)
+                        self.completed += 1
+        except Exception as e:
+            logger.error(f"Batch decode failed: {e}", exc_info=True)
+            with self._lock:
+                failed = list(self._active.values()) + list(self._incoming)
+                self._active.clear()
+                self._incoming.clear()
+                self.generator = None  # Rebuilt from a clean state next time
+                self._running = False
+            for request in failed:
+                request._resolve(error=e)
+
+    def _admissible(self) -> list[GenerationRequest]:
+        """
+        Take the waiting requests that may join the batch now (lock held)
+        Sequences in one batch share the adapter weights: when the batch is
+        empty the oldest waiting request picks the adapter, and while others
+        wait for a different adapter the batch drains instead of growing.
+        """
+        if not self._active and self._incoming:
+            self._batch_adapter = self._incoming[0].adapter
+        if self._active and any(r.adapter != self._batch_adapter for r in self._incoming):
+            return []
+        admitted = [r for r in self._incoming if r.adapter == self._batch_adapter]
+        self._incoming = deque(r for r in self._incoming if r.adapter != self._batch_adapter)
+        return admitted
+
+    def _score(self, request: GenerationRequest):
+        """Prefill a scoring request with its own cache (MLX thread)"""
+        try:
+            cache = self._prefix_state(request) or make_prompt_cache(self.model)
+            result = classifier.label_logprobs(
+                self.model, request.prompt_tokens[request.prefix_len:], cache, request.labels
+            )
+        except Exception as e:
+            logger.error(f"Label scoring failed: {e}")
+            request._resolve(error=e)
+            return
+        request._resolve(result)
+        self.scored += 1
+
+    def _speculate(self, admitted: list[GenerationRequest]) -> bool:
+        """Whether the only sequence to decode should be drafted"""
+        if self.draft_model is None or self._active or len(admitted) != 1:
+            return False
+        with self._lock:
+            if self._incoming:
+                return False
+        return admitted[0].max_tokens <= self.speculative_max_tokens
+
+    def _decode_speculative(self, request: GenerationRequest):
+        """Decode one request with draft-and-verify steps (MLX thread)"""
+        prefix_tokens = request.prompt_tokens[:request.prefix_len] if request.prefix_len else None
+        cache = speculative.prompt_cache(
+            self.model, self.draft_model,
+            self.prefix_cache, request.adapter, prefix_tokens
+        )
+        self.speculation.requests += 1
+        eos = set(self.tokenizer.eos_token_ids)
+        generator = speculative_generate_step(
+            mx.array(request.prompt_tokens[request.prefix_len:]),
+            self.model,
+            self.draft_model,
+            num_draft_tokens=self.num_draft_tokens,
+            max_tokens=request.max_tokens,
+            prompt_cache=cache,
+        )
+        finish_reason = "length"
+        for token, _, from_draft in generator:
+            if request.cancel.is_set():
+                request._resolve(error=InferenceCancelled("Generation cancelled"))
+                self.cancelled += 1
+                return
+            self.speculation.record(from_draft)  # Kept out of the batch metrics
+            if token in eos:
+                finish_reason = "stop"
+                break
+            request._push(token)
+        request.finish_reason = finish_reason
+        request._resolve(request.tokens)
+        self.completed += 1
+
+    def _prefix_state(self, request: GenerationRequest):
+        if not request.prefix_len:
+            return None  # Fresh cache
+        return self.prefix_cache.get(self.model, request.adapter, request.prompt_tokens[:request.prefix_len])
+
+    def warmup(self, prompt: str, max_tokens: int = 8):
+        """Decode a small batch (and a drafted sequence) on the MLX thread so kernels are compiled (blocking)"""
+        def run(cancel):
+            generator = self._generator()
+            _, tokens = split_prefix(self.tokenizer, prompt, None)
+            uids = set(generator.insert([tokens, tokens], [max_tokens, max_tokens]))
+            while uids:
+                for response in generator.next_generated():
+                    if response.finish_reason is not None:
+                        uids.discard(response.uid)
+            if self.draft_model is not None:
+                for _ in speculative_generate_step(
+                    mx.array(tokens), self.model, self.draft_model,
+                    num_draft_tokens=self.num_draft_tokens, max_tokens=max_tokens,
+                    prompt_cache=speculative.prompt_cache(self.model, self.draft_model)
+                ):
+                    pass
+        self.executor.submit(run).result()
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "active": len(self._active),
+            "queued": len(self._incoming),
+            "requests": self.requests,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "scored": self.scored,
+            "generated_tokens": self.generated_tokens,
+            "steps": self.steps,
+            "mean_batch": round(self.generated_tokens / self.steps, 2) if self.steps else 0.0,
+            "peak_batch": self.peak_batch,
+        }
+
+    def close(self):
+        if self.generator is not None:
+            self.generator.close()
+            self.generator = None
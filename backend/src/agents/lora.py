@@ -1,6 +1,14 @@
+import asyncio
 import logging
 import mlx_lm
 from src.config import settings
+from src.executor import InferenceExecutor, InferenceCancelled, InferenceQueueFull
+from src.agents.engine import ContinuousBatchEngine
+from src.agents.prefix_cache import PrefixCache, split_prefix
+from src.agents.adapters import AdapterRegistry, BASE
+from src.agents.scheduler import LLMScheduler, TRANSLATION, DETECTION
+from src.agents import speculative, classifier, artifacts
+from mlx_lm.models.cache import make_prompt_cache
 
 logger = logging.getLogger(__name__)
 
@@ -9,43 +17,139 @@ class LoRAManager:
         self.model_path = settings.llm_model
         self.model = None
         self.tokenizer = None
-        self.adapters = {}
+        # Small same-family model drafting tokens for speculative decoding ("" disables)
+        self.draft_model_path = settings.llm_draft_model
+        self.draft_model = None
+        self.speculation = speculative.SpeculationStats(settings.llm_num_draft_tokens)
+        # LoRA adapters under adapters/, swapped per request on the shared base weights
+        self.adapters = AdapterRegistry(
+            settings.adapters_dir,
+            max_resident=settings.llm_max_resident_adapters,
+            default=settings.llm_default_adapter
+        )
         self.is_loading = False
         self.load_error = None
+        # MLX work stays on one dedicated thread; the event loop only awaits it
+        self.executor = InferenceExecutor("mlx", max_workers=1, max_queue=settings.llm_queue_depth)
+        # KV state of the static prompt templates, reused across requests (0 disables)
+        self.prefix_cache = PrefixCache(settings.llm_prefix_cache_entries) if settings.llm_prefix_cache_entries > 0 else None
+        # Concurrent requests share decode steps on that thread (1 disables batching)
+        self.engine = None
+        if settings.llm_max_batch > 1:
+            self.engine = ContinuousBatchEngine(
+                self.executor,
+                max_batch=settings.llm_max_batch,
+                prefill_batch=settings.llm_prefill_batch,
+                max_pending=settings.llm_queue_depth,
+                prefix_cache=self.prefix_cache,
+                adapters=self.adapters,
+                num_draft_tokens=settings.llm_num_draft_tokens,
+                speculative_max_tokens=settings.llm_speculative_max_tokens
+            )
+        # Requests take a slot by priority class before reaching the model
+        self.scheduler = LLMScheduler(
+            slots=self.engine.max_batch if self.engine else 1,
+            reserved=settings.llm_translation_reserved_slots,
+            max_queued=settings.llm_class_queue_depth,
+            max_wait=settings.llm_class_max_wait
+        )
         logger.info(f"Initializing LoRA Manager with model: {self.model_path}")
-        # Load model in background to avoid blocking
-        import threading
-        threading.Thread(target=self._load_model, daemon=True).start()
+        # Loading is driven by the startup orchestrator (src/warmup.py)
+    
+    def load(self):
+        """Load the model on the inference thread and wait for it (blocking)"""
+        if self.is_model_ready():
+            return
+        self.is_loading = True
+        self.executor.submit(self._load_model).result()
+        if not self.is_model_ready():
+            raise RuntimeError(self.load_error or "Model failed to load")
+        if self.prefix_cache:
+            self.prefix_cache.clear()
+        if self.engine:
+            self.engine.attach(self.model, self.tokenizer, self.draft_model)
+    
+    def warmup(self):
+        """Run one short generation so kernels are compiled before real traffic (blocking)"""
+        prompt = "Translate to Traditional Chinese (zh-TW): Good morning, how are you?\nTranslation:"
+        if self.engine:
+            self.engine.warmup(prompt, max_tokens=8)
+        else:
+            self.executor.submit(self._generate_sync, prompt, 8).result()
     
-    def _load_model(self):
-        """Load model in background thread"""
+    def _load_model(self, cancel=None):
+        """Load model on the inference thread"""
         try:
             self.is_loading = True
             logger.info(f"Loading model {self.model_path}... (this may take a few minutes on first run)")
             
-            # Load model with V2 adapter (idiom-optimized)
-            self.model, self.tokenizer = mlx_lm.load(
-                self.model_path,
-                adapter_path="adapters/translation_v2"  # 使用習語優化版本
-            )
-            
-            logger.info("✓ Model loaded successfully with V2 adapter!")
-            logger.info("  V2 includes: Basic translation + Idiom understanding")
-            self.is_loading = False
+            # Base weights once; adapters are applied per request on top,
+            # unless a prebuilt bundle already has one fused in
+            self.model, self.tokenizer = mlx_lm.load(self._artifact() or self.model_path)
+            logger.info("✓ Base model loaded successfully")
         except Exception as e:
-            logger.error(f"Error loading model with V2 adapter: {e}")
-            logger.info("Falling back to base model without adapter...")
+            logger.error(f"Failed to load base model: {e}")
+            self.load_error = str(e)
+            self.is_loading = False
+            self.model = None
+            self.tokenizer = None
+            return
+        
+        if self.adapters.fused:
+            # Every request runs on the fused weights
+            logger.info(f"✓ Adapter {self.adapters.fused} fused into the model; per-request adapters disabled")
+        else:
+            try:
+                # Default adapter: V2 (idiom-optimized, 使用習語優化版本)
+                self.adapters.attach(self.model)
+                self.adapters.activate(self.adapters.default)
+                logger.info(f"✓ Default adapter {self.adapters.default} active")
+            except Exception as e:
+                logger.error(f"Error loading adapter {self.adapters.default}: {e}")
+                logger.info("Falling back to base model without adapter...")
+                self.adapters.default = BASE
+                self.adapters.activate(BASE)
+        
+        if self.draft_model_path:
             try:
-                # Fallback to base model
-                self.model, self.tokenizer = mlx_lm.load(self.model_path)
-                logger.info("✓ Base model loaded successfully")
-                self.is_loading = False
-            except Exception as e2:
-                logger.error(f"Failed to load base model: {e2}")
-                self.load_error = str(e2)
-                self.is_loading = False
-                self.model = None
-                self.tokenizer = None
+                self.draft_model = speculative.load_draft(self.draft_model_path, self.tokenizer)
+                if self.draft_model is not None:
+                    logger.info(f"✓ Draft model {self.draft_model_path} loaded for speculative decoding")
+            except Exception as e:
+                logger.error(f"Failed to load draft model {self.draft_model_path}: {e}")
+                self.draft_model = None
+        self.is_loading = False
+    
+    def _artifact(self) -> str | None:
+        """
+        Path of the fused/quantized bundle configured by LLM_FUSE_ADAPTER and
+        LLM_QUANTIZE_BITS, building it first if allowed (blocking, MLX thread)
+        """
+        bits = settings.llm_quantize_bits or None
+        fuse = settings.llm_fuse_adapter or None
+        if not (fuse or bits):
+            return None
+        adapter_path = None
+        if fuse:
+            if fuse not in self.adapters.paths:
+                logger.error(f"Unknown adapter to fuse: {fuse}; loading {self.model_path}")
+                return None
+            adapter_path = str(self.adapters.paths[fuse])
+        
+        bundle = artifacts.find(settings.llm_artifacts_dir, self.model_path, adapter_path, bits)
+        if bundle is None:
+            name = artifacts.artifact_name(self.model_path, adapter_path, bits)
+            if not settings.llm_build_artifacts:
+                logger.warning(f"Model artifact {name} not built (see build_artifact.py); loading {self.model_path}")
+                return None
+            try:
+                bundle = artifacts.build(settings.llm_artifacts_dir, self.model_path, adapter_path, bits)
+            except Exception as e:
+                logger.error(f"Failed to build model artifact {name}: {e}")
+                return None
+        logger.info(f"Loading prebuilt model artifact {bundle.name}")
+        self.adapters.fused = fuse
+        return str(bundle)
     
     def is_model_ready(self) -> bool:
         """Check if model is loaded and ready"""
@@ -53,38 +157,169 @@ class LoRAManager:
 
     def load_adapter(self, adapter_name: str, adapter_path: str):
         """
-        Load a LoRA adapter into memory.
+        Register a LoRA adapter outside adapters/; its weights load on first use.
+        Must match the LoRA layout applied at model load (register before load()).
+        """
+        logger.info(f"Registering adapter {adapter_name} from {adapter_path}")
+        self.adapters.register(adapter_name, adapter_path)
+
+    def _generate_sync(self, cancel, prompt: str, max_tokens: int, on_text=None, prefix: str = None, adapter: str = "default") -> str:
+        """Decode on the inference thread, stopping early if the caller went away"""
+        adapter = self.adapters.resolve(adapter)
+        self.adapters.activate(adapter)
+        prompt_cache = None
+        prefix_tokens = None
+        if prefix and self.prefix_cache:
+            prefix_len, tokens = split_prefix(self.tokenizer, prompt, prefix)
+            if prefix_len:
+                # Only the text after the cached prefix gets prefilled
+                prefix_tokens = tokens[:prefix_len]
+                prompt = tokens[prefix_len:]
+        draft = {}
+        if self.draft_model is not None:
+            draft = {"draft_model": self.draft_model, "num_draft_tokens": self.speculation.num_draft_tokens}
+            prompt_cache = speculative.prompt_cache(self.model, self.draft_model, self.prefix_cache, adapter, prefix_tokens)
+            self.speculation.requests += 1
+        elif prefix_tokens:
+            prompt_cache = self.prefix_cache.get(self.model, adapter, prefix_tokens)
+        pieces = []
+        for response in mlx_lm.stream_generate(
+            self.model,
+            self.tokenizer,
+            prompt=prompt,
+            max_tokens=max_tokens,
+            prompt_cache=prompt_cache,
+            **draft
+        ):
+            if cancel.is_set():
+                raise InferenceCancelled("Generation cancelled")
+            if draft:
+                self.speculation.record(response.from_draft)
+            pieces.append(response.text)
+            if on_text and response.text:
+                on_text(response.text)
+        return "".join(pieces)
+
+    def _score_sync(self, cancel, prompt: str, label_ids: list[list[int]], prefix: str = None, adapter: str = "default") -> list[float]:
+        """One prefill on the inference thread; log-probability of each label's next token"""
+        adapter = self.adapters.resolve(adapter)
+        self.adapters.activate(adapter)
+        prefix_len, tokens = split_prefix(self.tokenizer, prompt, prefix if self.prefix_cache else None)
+        if prefix_len:
+            cache = self.prefix_cache.get(self.model, adapter, tokens[:prefix_len])
+        else:
+            cache = make_prompt_cache(self.model)
+        return classifier.label_logprobs(self.model, tokens[prefix_len:], cache, label_ids)
+
+    async def classify(self, prompt: str, positive: str = "YES", negative: str = "NO",
+                       calibration: classifier.Calibration = None, adapter: str = "default", prefix: str = None,
+                       priority: str = DETECTION, session: str = None) -> classifier.LabelScore | None:
+        """
+        Score a yes/no style prompt from one forward pass (no decoding)
+        The prompt should end where the model would write the label.
+        Returns:
+            Calibrated probability of `positive` and the threshold decision,
+            or None if the model is not loaded
+        Raises:
+            InferenceQueueFull: if the scheduler rejected the request
         """
-        logger.info(f"Loading adapter {adapter_name} from {adapter_path}")
-        # In real app: self.model.load_adapter(adapter_path, adapter_name)
-        pass
+        if self.model is None or self.tokenizer is None:
+            logger.warning("Model not loaded, cannot classify")
+            return None
+        
+        label_ids = [classifier.label_token_ids(self.tokenizer, label) for label in (positive, negative)]
+        async with self.scheduler.slot(priority, session):
+            if self.engine:
+                logprobs = await self.engine.score(prompt, label_ids, prefix=prefix, adapter=adapter)
+            else:
+                logprobs = await self.executor.run(self._score_sync, prompt, label_ids, prefix=prefix, adapter=adapter)
+        return classifier.score(logprobs, calibration or classifier.Calibration())
 
-    async def generate(self, prompt: str, adapter: str = "default", max_tokens: int = 100) -> str:
+    async def generate(self, prompt: str, adapter: str = "default", max_tokens: int = 100, prefix: str = None,
+                       priority: str = TRANSLATION, session: str = None) -> str:
         """
         Generate text using the specified adapter.
+        prefix: static leading part of the prompt (a template preamble) whose
+                KV state is cached and reused across calls
+        priority/session: scheduling class and client (see src/agents/scheduler.py)
+        Raises:
+            InferenceQueueFull: if the scheduler rejected the request
         """
         if self.model is None or self.tokenizer is None:
             logger.warning("Model not loaded, returning mock response")
             return "MOCKED_LLM_RESPONSE"
         
         try:
-            # Set adapter if specified and available
-            if adapter != "default" and adapter in self.adapters:
-                # Note: mlx-lm doesn't have built-in adapter support
-                # This would require custom implementation
-                pass
-            
-            # Generate response with better parameters
-            response = mlx_lm.generate(
-                self.model, 
-                self.tokenizer, 
-                prompt=prompt, 
-                max_tokens=max_tokens,
-                verbose=False
-            )
-            return response
+            async with self.scheduler.slot(priority, session):
+                # Generate response off the event loop
+                if self.engine:
+                    return await self.engine.generate(prompt, max_tokens=max_tokens, prefix=prefix, adapter=adapter)
+                response = await self.executor.run(self._generate_sync, prompt, max_tokens, prefix=prefix, adapter=adapter)
+                return response
+        except InferenceQueueFull as e:
+            logger.warning(f"LLM request rejected: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error generating text: {e}")
             return "MOCKED_LLM_RESPONSE"
 
+    async def stream(self, prompt: str, adapter: str = "default", max_tokens: int = 100, prefix: str = None,
+                     priority: str = TRANSLATION, session: str = None):
+        """
+        Async stream of generated text pieces
+        Stop iterating (or aclose()) to cancel the rest of the generation.
+        Yields nothing if the model is not loaded.
+        Raises:
+            InferenceQueueFull: if the scheduler rejected the request
+        """
+        if self.model is None or self.tokenizer is None:
+            logger.warning("Model not loaded, nothing to stream")
+            return
+        
+        # The slot is held until the stream finishes or is closed
+        async with self.scheduler.slot(priority, session):
+            stream = self._stream(prompt, adapter, max_tokens, prefix)
+            try:
+                async for piece in stream:
+                    yield piece
+            finally:
+                await stream.aclose()
+
+    async def _stream(self, prompt: str, adapter: str, max_tokens: int, prefix: str):
+        if self.engine:
+            async for piece in self.engine.stream(prompt, max_tokens=max_tokens, prefix=prefix, adapter=adapter):
+                yield piece
+            return
+        
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        job = asyncio.ensure_future(self.executor.run(
+            self._generate_sync, prompt, max_tokens,
+            on_text=lambda text: loop.call_soon_threadsafe(queue.put_nowait, text),
+            prefix=prefix,
+            adapter=adapter
+        ))
+        # Sentinel queued behind every piece the worker already handed over
+        job.add_done_callback(lambda _: loop.call_soon(queue.put_nowait, None))
+        try:
+            while (piece := await queue.get()) is not None:
+                yield piece
+            await job  # Raises if decoding failed
+        finally:
+            if not job.done():
+                job.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor.stats(),
+            "scheduler": self.scheduler.stats(),
+            "batching": self.engine.stats() if self.engine else None,
+            "prefix_cache": self.prefix_cache.stats() if self.prefix_cache else None,
+            "adapters": self.adapters.stats(),
+            "speculative": (
+                (self.engine.speculation if self.engine else self.speculation).stats()
+                if self.draft_model is not None else None
+            )
+        }
+
 lora_manager = LoRAManager()
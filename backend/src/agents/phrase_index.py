@@ -0,0 +1,278 @@
+"""
+Idiom/slang phrase index
+An Aho–Corasick automaton over words: every known phrase found in a text, with
+character spans, in one pass over its words regardless of how many phrases
+are indexed. Matching works on whole words (no hits inside other words).
+Words of multi-word phrases are reduced to a conservative stem on both sides so
+inflected forms match ("spilled the beans", "it was raining cats and dogs");
+single-word entries ("salty", "capping") only match that exact word. Short or
+everyday phrases also occur in plain speech ("mid July", "good luck with the
+exam"), so only distinctive matches are certain enough to act on without the
+LLM. The compiled index is pickled to disk keyed by a hash of its sources, so
+restarts load it instantly.
+"""
+import hashlib
+import json
+import logging
+import pickle
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# Spoken contractions folded to the written word they stand for
+CONTRACTIONS = {"'em": "them", "em": "them"}
+VOWELS = set("aeiouy")
+# Everyday words; a phrase made only of these ("you can do it") is not distinctive
+COMMON_WORDS = frozenset("""
+a an the and or but if so of to in on at by for with from up out off over into about as
+i me my you your he him his she her it its we us our they them their this that these those
+is am are was were be been being do does did done have has had get got go went going
+can could will would shall should may might must not no yes all some any every each
+very too just more most good well one time day thing way make made take see know think
+""".split())
+MIN_DISTINCTIVE_WORDS = 3
+
+
+def _stem(word: str) -> str:
+    """
+    Strip common inflections (consistently, not linguistically exactly)
+    A suffix is only stripped when a plausible stem (3+ letters with a vowel)
+    is left, and "-eed" is kept whole, so "speed"/"speeding" share a stem.
+    """
+    word = CONTRACTIONS.get(word, word)
+    if word.endswith("'s"):
+        word = word[:-2]
+    for suffix, replacement, min_len in (("ies", "y", 5), ("ied", "y", 5), ("ing", "", 6), ("ed", "", 5)):
+        if not word.endswith(suffix) or len(word) < min_len:
+            continue
+        stem = word[:-len(suffix)]
+        if suffix == "ed" and stem.endswith("e"):
+            break  # speed, agreed
+        if replacement == "" and (len(stem) < 3 or not VOWELS & set(stem)):
+            break  # string, shed
+        if replacement == "" and stem[-1] == stem[-2] and stem[-1] not in "lsze":
+            stem = stem[:-1]  # running -> run, capped -> cap
+        return stem + replacement
+    if word.endswith("es") and len(word) > 4 and word[-3] in "sxz":
+        return word[:-2]
+    if word.endswith("s") and len(word) > 3 and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[tuple[str, int, int]]:
+    """(stem, start, end) of every word in text"""
+    text = text.lower().replace("’", "'")
+    return [(_stem(m.group()), m.start(), m.end()) for m in WORD.finditer(text)]
+
+
+def _surface(text: str, token: tuple[str, int, int]) -> str:
+    """The unstemmed word behind a token of text"""
+    return text[token[1]:token[2]].lower().replace("’", "'")
+
+
+@dataclass
+class PhraseMatch:
+    phrase: str  # As listed in the source
+    category: str
+    start: int  # Character span in the matched text
+    end: int
+    distinctive: bool = False  # Long and specific enough to trust without the LLM
+
+
+def _distinctive(words: list[str]) -> bool:
+    """Whether a phrase is unlikely to occur in plain speech by accident"""
+    return len(words) >= MIN_DISTINCTIVE_WORDS and not all(word in COMMON_WORDS for word in words)
+
+
+class PhraseIndex:
+    """Word-level Aho–Corasick automaton"""
+
+    def __init__(self, phrases: list[tuple[str, str]]):
+        """
+        Args:
+            phrases: (phrase, category) pairs; duplicates after stemming keep the first
+        """
+        self.phrases: list[tuple[str, str, int, bool]] = []  # (phrase, category, word count, distinctive)
+        self.words: dict[str, int] = {}  # Single-word entries, matched unstemmed
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[int]] = [[]]
+
+        seen = set()
+        for phrase, category in phrases:
+            tokens = tokenize(phrase)
+            if len(tokens) == 1:
+                word = _surface(phrase, tokens[0])
+                if word not in self.words:
+                    self.words[word] = len(self.phrases)
+                    self.phrases.append((phrase, category, 1, False))
+                continue
+            words = tuple(stem for stem, _, _ in tokens)
+            if not words or words in seen:
+                continue
+            seen.add(words)
+            node = 0
+            for word in words:
+                nxt = self.goto[node].get(word)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][word] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(len(self.phrases))
+            surface = [_surface(phrase, token) for token in tokens]
+            self.phrases.append((phrase, category, len(words), _distinctive(surface)))
+
+        # Failure links, breadth first; outputs of the fallback state are inherited
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for word, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def find(self, text: str) -> list[PhraseMatch]:
+        """All indexed phrases in text (overlapping ones included), in order of their end"""
+        words = tokenize(text)
+        matches = []
+        node = 0
+        for i, (word, start, end) in enumerate(words):
+            phrase_id = self.words.get(_surface(text, words[i]))
+            if phrase_id is not None:
+                phrase, category, _, _ = self.phrases[phrase_id]
+                matches.append(PhraseMatch(phrase, category, start, end))
+            while node and word not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(word, 0)
+            for phrase_id in self.out[node]:
+                phrase, category, length, distinctive = self.phrases[phrase_id]
+                matches.append(PhraseMatch(phrase, category, words[i - length + 1][1], end, distinctive))
+        return matches
+
+
+def _sources_digest(builtin: list[str], paths: list[Path]) -> str:
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    digest.update("\n".join(builtin).encode())
+    for path in paths:
+        digest.update(str(path).encode())
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _read_phrases(idiom_data: Path, lexicon: Path | None) -> list[tuple[str, str]]:
+    phrases = []
+    if idiom_data.exists():
+        with open(idiom_data, encoding="utf-8") as f:
+            for category, pairs in json.load(f).items():
+                phrases.extend((english, category) for english, _ in pairs)
+    else:
+        logger.warning(f"Idiom data not found: {idiom_data}")
+    if lexicon:
+        # One phrase per line, optionally followed by a tab and its category
+        with open(lexicon, encoding="utf-8") as f:
+            for line in f:
+                phrase, _, category = line.rstrip("\n").partition("\t")
+                if phrase.strip() and not phrase.startswith("#"):
+                    phrases.append((phrase.strip(), category.strip() or "lexicon"))
+    return phrases
+
+
+def load_index(builtin: list[str], idiom_data: str, lexicon: str = None, cache_path: str = None) -> PhraseIndex:
+    """
+    Build the index from its sources, or load it from cache_path if they haven't changed
+    Args:
+        builtin: phrases compiled into the code (category "idiom")
+        idiom_data: categories.json ({category: [[english, chinese], ...]})
+        lexicon: user lexicon file (see _read_phrases)
+    """
+    paths = [Path(idiom_data)] + ([Path(lexicon)] if lexicon else [])
+    digest = _sources_digest(builtin, paths)
+    cache = Path(cache_path) if cache_path else None
+    if cache and cache.exists():
+        try:
+            with open(cache, "rb") as f:
+                cached_digest, index = pickle.load(f)
+            if cached_digest == digest:
+                logger.info(f"Loaded phrase index ({len(index)} phrases) from {cache}")
+                return index
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable phrase index cache {cache}: {e}")
+
+    start = time.perf_counter()
+    phrases = [(phrase, "idiom") for phrase in builtin]
+    phrases += _read_phrases(Path(idiom_data), Path(lexicon) if lexicon else None)
+    index = PhraseIndex(phrases)
+    logger.info(f"Built phrase index: {len(index)} phrases in {time.perf_counter() - start:.2f}s")
+    if cache:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump((digest, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.replace(cache)
+        except OSError as e:
+            logger.warning(f"Could not cache phrase index to {cache}: {e}")
+    return index
+
+
+class PhraseMatcher:
+    """The configured phrase index, loaded on first use"""
+
+    def __init__(self):
+        self.index: PhraseIndex | None = None
+        self._lock = threading.Lock()
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+
+    def load(self) -> PhraseIndex:
+        """Load (or build) the index (blocking)"""
+        if self.index is None:
+            with self._lock:
+                if self.index is None:
+                    from src.config import settings
+                    from src.agents.router import IDIOM_PHRASES
+                    self.index = load_index(
+                        IDIOM_PHRASES,
+                        settings.idiom_data_path,
+                        settings.phrase_lexicon or None,
+                        settings.phrase_index_cache or None
+                    )
+        return self.index
+
+    def find(self, text: str) -> list[PhraseMatch]:
+        matches = self.load().find(text)
+        self.lookups += 1
+        if matches:
+            self.hits += 1
+        return matches
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.index is not None,
+            "phrases": len(self.index) if self.index is not None else 0,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+# Global matcher
+phrase_matcher = PhraseMatcher()
@@ -0,0 +1,95 @@
+"""
+Prompt-prefix KV cache
+The fixed instruction preambles of the translation and detection prompts are
+prefilled once per adapter; every request starts decoding from a copy of
+that KV state and only prefills its own text
+"""
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import mlx.core as mx
+from mlx_lm.models.cache import make_prompt_cache
+
+logger = logging.getLogger(__name__)
+
+
+def split_prefix(tokenizer, prompt: str, prefix: str | None) -> tuple[int, list[int]]:
+    """
+    Tokenize a prompt and find how many of its leading tokens are the prefix
+    Returns:
+        (prefix token count, prompt tokens); the count is 0 when the prefix
+        isn't a token-exact leading part of the prompt (tokenizers may merge
+        across the boundary) or nothing would be left to prefill after it
+    """
+    bos = tokenizer.bos_token
+    add_special_tokens = bos is None or not prompt.startswith(bos)
+    tokens = tokenizer.encode(prompt, add_special_tokens=add_special_tokens)
+    if not prefix or not prompt.startswith(prefix):
+        return 0, tokens
+    prefix_tokens = tokenizer.encode(prefix, add_special_tokens=add_special_tokens)
+    n = len(prefix_tokens)
+    if n >= len(tokens) or tokens[:n] != prefix_tokens:
+        return 0, tokens
+    return n, tokens
+
+
+class PrefixCache:
+    """LRU of prefilled KV caches keyed by (adapter, prefix hash)"""
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple[str, str], list] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_tokens = 0  # Prompt tokens not re-encoded thanks to hits
+
+    @staticmethod
+    def _key(adapter: str, prefix_tokens: list[int]) -> tuple[str, str]:
+        digest = hashlib.sha1(str(prefix_tokens).encode()).hexdigest()
+        return adapter, digest
+
+    def get(self, model, adapter: str, prefix_tokens: list[int]) -> list:
+        """
+        KV cache holding the prefix, prefilled on a miss (call on the MLX thread)
+        Returns:
+            A private copy the caller may extend
+        """
+        key = self._key(adapter, prefix_tokens)
+        with self._lock:
+            cache = self.entries.get(key)
+            if cache is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.saved_tokens += len(prefix_tokens)
+        if cache is None:
+            cache = make_prompt_cache(model)
+            model(mx.array(prefix_tokens)[None], cache=cache)
+            mx.eval([c.state for c in cache])
+            with self._lock:
+                self.misses += 1
+                self.entries[key] = cache
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+            logger.info(f"Cached {len(prefix_tokens)}-token prompt prefix for adapter '{adapter}'")
+        return copy.deepcopy(cache)
+
+    def clear(self):
+        """Drop every entry (the model or adapter weights changed)"""
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+        }
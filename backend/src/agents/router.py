@@ -1,6 +1,7 @@
 import json
 import logging
 from src.agents.lora import lora_manager
+from src.agents.phrase_index import phrase_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -43,18 +44,22 @@ class RouterAgent:
     async def analyze(self, text: str) -> dict | None:
         """
         Analyze text for cultural nuances.
+        Reports the longest known phrase; "matches" lists every one with its span.
         """
-        text_lower = text.lower()
-        
-        # Check for known idioms
-        for idiom in IDIOM_PHRASES:
-            if idiom in text_lower:
-                return {
-                    "detected": True,
-                    "phrase": idiom,
-                    "type": "idiom",
-                    "reasoning": f"The phrase '{idiom}' is a common English idiom with cultural meaning."
-                }
+        # Check for known idioms (IDIOM_PHRASES, idiom data and user lexicon)
+        matches = phrase_matcher.find(text)
+        if matches:
+            best = max(matches, key=lambda m: m.end - m.start)
+            return {
+                "detected": True,
+                "phrase": best.phrase,
+                "type": "idiom",
+                "reasoning": f"The phrase '{best.phrase}' is a common English idiom with cultural meaning.",
+                "matches": [
+                    {"phrase": m.phrase, "category": m.category, "start": m.start, "end": m.end}
+                    for m in matches
+                ],
+            }
         
         # If no idiom detected
         return None
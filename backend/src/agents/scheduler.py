@@ -0,0 +1,185 @@
+"""
+Priority scheduling for LLM requests
+Every generate/stream call takes a slot before it reaches the model. Slots
+go to translations first, then cultural detection, then explanations; within
+a class, sessions take turns so one busy client can't starve the others.
+Lower classes never take the slots reserved for translations, so a burst of
+long explanations can't hold up translations.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from src.executor import InferenceQueueFull
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+TRANSLATION = "translation"
+DETECTION = "detection"
+EXPLANATION = "explanation"
+PRIORITIES = (TRANSLATION, DETECTION, EXPLANATION)
+
+
+class PriorityClass:
+    """Waiters of one priority, queued per session"""
+
+    def __init__(self, name: str, max_queued: int, max_wait: float):
+        self.name = name
+        self.max_queued = max_queued
+        self.max_wait = max_wait  # Seconds a request may be deferred before it is rejected
+        self.sessions: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self.queued = 0
+        self.running = 0
+        # Metrics
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.waits: deque[float] = deque(maxlen=200)
+
+    def push(self, session: str, waiter: asyncio.Future):
+        self.sessions.setdefault(session, deque()).append(waiter)
+        self.queued += 1
+
+    def pop(self) -> asyncio.Future | None:
+        """Next waiter, round-robin over sessions"""
+        while self.sessions:
+            session, waiters = self.sessions.popitem(last=False)
+            waiter = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self.sessions[session] = waiters  # Back of the line
+            if not waiter.done():
+                return waiter
+        return None
+
+    def discard(self, session: str, waiter: asyncio.Future):
+        waiters = self.sessions.get(session)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self.sessions[session]
+
+    def stats(self) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "sessions_waiting": len(self.sessions),
+            "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+        }
+
+
+class LLMScheduler:
+    """Hands out model slots by priority class, fairly across sessions (event loop only)"""
+
+    def __init__(self, slots: int, reserved: int = 1, max_queued: list[int] = None, max_wait: list[float] = None):
+        self.slots = max(1, slots)
+        # Slots only translations may use; none when there is a single slot
+        self.reserved = max(0, min(reserved, self.slots - 1))
+        max_queued = max_queued or [32, 16, 8]
+        max_wait = max_wait or [10.0, 5.0, 20.0]
+        self.classes = {
+            name: PriorityClass(name, max_queued[i], max_wait[i])
+            for i, name in enumerate(PRIORITIES)
+        }
+        self.running = 0
+
+    def _limit(self, priority: str) -> int:
+        return self.slots if priority == TRANSLATION else self.slots - self.reserved
+
+    def _dispatch(self):
+        """Grant free slots to the highest-priority eligible waiters"""
+        while self.running < self.slots:
+            for name in PRIORITIES:
+                if self.running >= self._limit(name):
+                    continue
+                waiter = self.classes[name].pop()
+                if waiter is not None:
+                    waiter.set_result(None)
+                    self._take(name)
+                    break
+            else:
+                return
+
+    def _take(self, priority: str):
+        self.running += 1
+        self.classes[priority].running += 1
+        self.classes[priority].admitted += 1
+
+    def _release(self, priority: str):
+        self.running -= 1
+        self.classes[priority].running -= 1
+        self._dispatch()
+
+    def _waiting_ahead(self, priority: str) -> bool:
+        return any(self.classes[name].queued for name in PRIORITIES[:PRIORITIES.index(priority) + 1])
+
+    async def _acquire(self, priority: str, session: str):
+        """
+        Wait for a slot
+        Raises:
+            InferenceQueueFull: if the class queue is full, or the request was
+                                deferred longer than the class allows
+        """
+        cls = self.classes[priority]
+        if self.running < self._limit(priority) and not self._waiting_ahead(priority):
+            cls.waits.append(0.0)
+            self._take(priority)
+            return
+        if cls.queued >= cls.max_queued:
+            cls.rejected += 1
+            raise InferenceQueueFull(f"LLM {priority} queue full ({cls.queued}/{cls.max_queued})")
+
+        waiter = asyncio.get_running_loop().create_future()
+        cls.push(session, waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), cls.max_wait)
+        except asyncio.TimeoutError:
+            cls.discard(session, waiter)
+            if waiter.done():
+                self._release(priority)  # Granted just as the deadline hit
+            else:
+                waiter.cancel()
+            cls.expired += 1
+            raise InferenceQueueFull(f"LLM {priority} request deferred over {cls.max_wait:g}s")
+        except asyncio.CancelledError:
+            cls.discard(session, waiter)
+            if waiter.done() and not waiter.cancelled():
+                self._release(priority)
+            else:
+                waiter.cancel()
+            raise
+        cls.waits.append(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def slot(self, priority: str, session: str = None):
+        """
+        Hold a model slot for the duration of the block
+        Args:
+            priority: TRANSLATION, DETECTION or EXPLANATION
+            session: client the request belongs to (fairness key)
+        """
+        if priority not in self.classes:
+            raise ValueError(f"Unknown LLM priority '{priority}'")
+        await self._acquire(priority, session or "")
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "reserved_for_translation": self.reserved,
+            "running": self.running,
+            "classes": {name: cls.stats() for name, cls in self.classes.items()},
+        }
@@ -0,0 +1,71 @@
+"""
+Speculative decoding
+A small draft model of the same family proposes a few tokens and the main
+model checks them all in one forward pass, keeping the longest prefix it
+agrees with. Decoding is greedy, so the output is exactly what the main
+model alone would produce; only the number of main-model passes drops.
+"""
+import logging
+import mlx_lm
+from mlx_lm.models.cache import make_prompt_cache
+
+logger = logging.getLogger(__name__)
+
+# Prefix cache key of the draft model's KV state (it runs without adapters)
+DRAFT_CACHE_KEY = "<draft>"
+
+
+def load_draft(path: str, tokenizer):
+    """
+    Load the draft model (blocking, MLX thread)
+    Returns:
+        The model, or None if it can't be used with the main model's tokenizer
+    """
+    draft_model, draft_tokenizer = mlx_lm.load(path)
+    if draft_tokenizer.vocab_size != tokenizer.vocab_size:
+        logger.warning(
+            f"Draft model {path} has a different vocabulary "
+            f"({draft_tokenizer.vocab_size} vs {tokenizer.vocab_size}); speculative decoding disabled"
+        )
+        return None
+    return draft_model
+
+
+def prompt_cache(model, draft_model, prefix_cache=None, adapter: str = None, prefix_tokens: list[int] = None) -> list:
+    """
+    Combined main + draft KV cache, as speculative generation expects it
+    Both halves start from the cached prefix state when prefix_tokens are given.
+    """
+    if prefix_cache is not None and prefix_tokens:
+        return (prefix_cache.get(model, adapter, prefix_tokens)
+                + prefix_cache.get(draft_model, DRAFT_CACHE_KEY, prefix_tokens))
+    return make_prompt_cache(model) + make_prompt_cache(draft_model)
+
+
+class SpeculationStats:
+    """Acceptance metrics of speculatively decoded tokens"""
+
+    def __init__(self, num_draft_tokens: int):
+        self.num_draft_tokens = num_draft_tokens
+        self.requests = 0
+        self.tokens = 0
+        self.accepted = 0  # Tokens taken from the draft
+        self.verify_steps = 0  # Main-model passes (each yields one token of its own)
+
+    def record(self, from_draft: bool):
+        self.tokens += 1
+        if from_draft:
+            self.accepted += 1
+        else:
+            self.verify_steps += 1
+
+    def stats(self) -> dict:
+        proposed = self.verify_steps * self.num_draft_tokens
+        return {
+            "num_draft_tokens": self.num_draft_tokens,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "accepted": self.accepted,
+            "acceptance_rate": round(self.accepted / proposed, 3) if proposed else 0.0,
+            "tokens_per_pass": round(self.tokens / self.verify_steps, 2) if self.verify_steps else 0.0,
+        }
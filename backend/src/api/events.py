@@ -2,7 +2,11 @@ import logging
 import asyncio
 import uuid
 from datetime import datetime
-from src.audio.streaming_asr import asr_engine
+import socketio
+from src.audio.backends import asr_backends, SessionLimitReached
+from src.audio.wire import negotiate, SAMPLE_RATE
+from src.config import settings
+from src.warmup import startup
 from src.services.translator import translation_service
 from src.services.insight import insight_generator
 from src.models.core import TranscriptChunk, Translation
@@ -10,15 +14,87 @@ from src.models.core import TranscriptChunk, Translation
 logger = logging.getLogger(__name__)
 
 
-async def process_transcript(sid, text: str, is_final: bool):
+async def _emit_translation(sio, sid, transcript_id: str, text: str, start_time: datetime,
+                           cultural_context: str = None) -> str:
+    """
+    Stream a translation to the client (translation_partial..., translation_final)
+    Returns:
+        The translation (the source text if the model isn't ready or failed)
+    """
+    # Stream the translation as it decodes; decoding stops at the end of its first line
+    translation = ""
+    try:
+        async for translation in translation_service.translate_stream(
+            text,
+            target_lang="zh-TW",
+            cultural_context=cultural_context,
+            session=sid
+        ):
+            await sio.emit(
+                "translation_partial",
+                {
+                    "chunk_id": transcript_id,
+                    "target_lang": "zh-TW",
+                    "translated_text": translation,
+                    "latency_ms": int((datetime.now() - start_time).total_seconds() * 1000),
+                },
+                room=sid,
+            )
+    except Exception as e:
+        logger.error(f"Translation stream failed: {e}")
+        translation = ""
+    translation = translation or text  # Model not ready or failed: show the source
+    
+    latency = (datetime.now() - start_time).total_seconds() * 1000
+    logger.info(f"Translation result: {translation}")
+    
+    # Emit translation
+    logger.info(f"Emitting translation_final to {sid}")
+    await sio.emit(
+        "translation_final",
+        {
+            "chunk_id": transcript_id,
+            "target_lang": "zh-TW",
+            "translated_text": translation,
+            "latency_ms": int(latency),
+        },
+        room=sid,
+    )
+    logger.info(f"translation_final emitted")
+    return translation
+
+
+async def _emit_insight(sio, sid, insight):
+    """Emit a finished cultural insight, if any"""
+    if insight:
+        logger.info(f"Emitting cultural_insight to {sid}")
+        await sio.emit(
+            "cultural_insight",
+            {
+                "id": insight.id,
+                "phrase": insight.source_text,
+                "explanation": insight.explanation,
+                "type": insight.context_type,
+                "sources": insight.sources,
+            },
+            room=sid,
+        )
+        logger.info(f"cultural_insight emitted")
+    else:
+        logger.info("No cultural insights to emit")
+
+
+async def process_transcript(sid, text: str, is_final: bool, transcript_id: str = None):
     """
     Process transcription and generate translation/insights
+    Partials and the final text of one utterance share transcript_id so the
+    client can update the line in place.
     """
     try:
         logger.info(f"Processing transcript for {sid}: '{text}' (final={is_final})")
 
         # Generate transcript ID
-        transcript_id = str(uuid.uuid4())
+        transcript_id = transcript_id or str(uuid.uuid4())
 
         # Import sio from main
         from src.main import sio
@@ -40,58 +116,73 @@ async def process_transcript(sid, text: str, is_final: bool):
 
         # Only process final transcripts for translation
         if is_final and text.strip():
-            # 1. FIRST: Generate cultural insights (with LLM explanation)
-            logger.info("Generating cultural insights...")
-            insight = await insight_generator.process(text)
-            
-            # 2. SECOND: Translate with cultural context
-            start_time = datetime.now()
-            logger.info(f"Starting translation: {text}")
-            
-            if insight and insight.search_context:
-                # Use raw search results for better translation
-                logger.info(f"Translating with search context")
-                translation = await translation_service.translate(
-                    text, 
-                    target_lang="zh-TW",
-                    cultural_context=insight.search_context  # Use raw search results
-                )
-            else:
-                translation = await translation_service.translate(text, target_lang="zh-TW")
-            
-            latency = (datetime.now() - start_time).total_seconds() * 1000
-            logger.info(f"Translation result: {translation}")
-
-            # Emit translation
-            logger.info(f"Emitting translation_final to {sid}")
-            await sio.emit(
-                "translation_final",
-                {
-                    "chunk_id": transcript_id,
-                    "target_lang": "zh-TW",
-                    "translated_text": translation,
-                    "latency_ms": int(latency),
-                },
-                room=sid,
-            )
-            logger.info(f"translation_final emitted")
-
-            # 3. THIRD: Emit cultural insight if generated
-            if insight:
-                logger.info(f"Emitting cultural_insight to {sid}")
+            async def emit_insight_partial(insight_id, explanation):
                 await sio.emit(
-                    "cultural_insight",
+                    "insight_partial",
                     {
-                        "phrase": insight.source_text,
-                        "explanation": insight.explanation,
-                        "type": insight.context_type,
-                        "sources": insight.sources,
+                        "id": insight_id,
+                        "phrase": text,
+                        "explanation": explanation,
                     },
                     room=sid,
                 )
-                logger.info(f"cultural_insight emitted")
+            
+            if settings.pipeline_translation:
+                # Plain translation right away, with detection/search/explanation
+                # running alongside; a context-aware translation follows as
+                # translation_update if the insight brings search context
+                start_time = datetime.now()
+                logger.info(f"Starting translation and cultural insights: {text}")
+                insight_task = asyncio.create_task(
+                    insight_generator.process(text, on_partial=emit_insight_partial, session=sid)
+                )
+                try:
+                    translation = await _emit_translation(sio, sid, transcript_id, text, start_time)
+                    insight = await insight_task
+                finally:
+                    if not insight_task.done():
+                        insight_task.cancel()
+                
+                await _emit_insight(sio, sid, insight)
+                
+                if insight and insight.search_context:
+                    logger.info("Refining translation with search context")
+                    refined = await translation_service.translate(
+                        text,
+                        target_lang="zh-TW",
+                        cultural_context=insight.search_context,
+                        session=sid
+                    )
+                    if refined not in (translation, text):
+                        await sio.emit(
+                            "translation_update",
+                            {
+                                "chunk_id": transcript_id,
+                                "target_lang": "zh-TW",
+                                "translated_text": refined,
+                                "latency_ms": int((datetime.now() - start_time).total_seconds() * 1000),
+                                "insight_id": insight.id,
+                            },
+                            room=sid,
+                        )
+                        logger.info(f"translation_update emitted: {refined}")
             else:
-                logger.info("No cultural insights to emit")
+                # 1. FIRST: Generate cultural insights (with LLM explanation)
+                logger.info("Generating cultural insights...")
+                insight = await insight_generator.process(text, on_partial=emit_insight_partial, session=sid)
+                
+                # 2. SECOND: Translate with cultural context
+                start_time = datetime.now()
+                logger.info(f"Starting translation: {text}")
+                
+                # Use raw search results for better translation
+                cultural_context = insight.search_context if insight and insight.search_context else None
+                if cultural_context:
+                    logger.info(f"Translating with search context")
+                await _emit_translation(sio, sid, transcript_id, text, start_time, cultural_context)
+                
+                # 3. THIRD: Emit cultural insight if generated
+                await _emit_insight(sio, sid, insight)
 
     except Exception as e:
         logger.error(f"Error in process_transcript: {e}", exc_info=True)
@@ -101,37 +192,61 @@ def register_socket_events(sio):
     """Register Socket.IO event handlers"""
 
     @sio.event
-    async def connect(sid, environ):
+    async def connect(sid, environ, auth=None):
         logger.info(f"Client connected: {sid}")
         
-        # Clear audio buffer from previous session
-        asr_engine.clear_buffer()
-        logger.info("Audio buffer cleared for new session")
+        # Live audio backend; it loads at startup, never in this handler. Only the
+        # ASR component gates connecting: without the LLM, transcripts still flow
+        # and translations fall back to the source text
+        backend = asr_backends.peek(settings.asr_backend)
+        if backend is None or not startup.component_ready("asr"):
+            logger.warning(f"Refusing {sid}: live ASR is not ready")
+            raise socketio.exceptions.ConnectionRefusedError(
+                "Models are still loading, retry shortly", {"code": "NOT_READY"}
+            )
+        loop = asyncio.get_running_loop()
+        
+        # Negotiate the audio_chunk wire format from the handshake offer
+        offered = (auth or {}).get("audio_formats")
+        audio_format = negotiate(offered, backend.supported_formats())
+        logger.info(f"Audio format for {sid}: {audio_format} (offered: {offered})")
         
         # Define callback function for ASR transcription
-        def transcription_callback(text, is_final):
+        def transcription_callback(text, is_final, utterance_id=None):
             """Called when ASR produces transcription"""
             logger.info(f"ASR Callback: '{text}' (final={is_final}) for client {sid}")
             
-            # Schedule processing in event loop
-            import asyncio
+            # Backends may call back from their own thread; hand over to the server loop
             try:
-                loop = asyncio.get_event_loop()
-                # Create task to process and emit transcript
-                loop.create_task(process_transcript(sid, text, is_final))
+                asyncio.run_coroutine_threadsafe(
+                    process_transcript(sid, text, is_final, transcript_id=utterance_id), loop
+                )
                 logger.info(f"Scheduled transcript processing for {sid}")
             except Exception as e:
                 logger.error(f"Error scheduling transcript: {e}", exc_info=True)
         
-        # Set callback for this client
-        asr_engine.set_callback(transcription_callback)
-        logger.info(f"ASR callback configured for {sid}")
+        # Each client gets its own buffer and callback
+        try:
+            backend.create_session(sid, transcription_callback, audio_format=audio_format)
+        except SessionLimitReached as e:
+            logger.warning(f"Refusing {sid}: {e}")
+            raise socketio.exceptions.ConnectionRefusedError(str(e), {"code": "BUSY"})
+        logger.info(f"ASR session configured for {sid}")
+        
+        # Tell the client how to encode its audio_chunk payloads
+        await sio.emit(
+            "audio_format",
+            {"format": audio_format, "sample_rate": SAMPLE_RATE},
+            room=sid,
+        )
 
     @sio.event
     async def disconnect(sid):
         logger.info(f"Client disconnected: {sid}")
-        # Stop audio processing
-        asr_engine.reset()
+        # Stop audio processing for this client only
+        backend = asr_backends.peek(settings.asr_backend)
+        if backend:
+            backend.remove_session(sid)
 
     @sio.event
     async def audio_chunk(sid, data):
@@ -139,7 +254,7 @@ def register_socket_events(sio):
         Handle incoming audio chunk from client
         Args:
             sid: socket ID
-            data: audio data (ArrayBuffer from frontend, bytes of float32)
+            data: audio data (ArrayBuffer from frontend, negotiated format)
         """
         try:
             if not data:
@@ -150,8 +265,14 @@ def register_socket_events(sio):
                 logger.info(f"Receiving audio chunks from {sid}, size: {len(data)} bytes")
                 audio_chunk.first_logged = True
             
-            # Process audio through streaming ASR
-            await asr_engine.process_audio(data)
+            backend = asr_backends.peek(settings.asr_backend)
+            engine = backend.get_session(sid) if backend else None
+            if engine is None:
+                logger.warning(f"No ASR session for {sid}, dropping audio")
+                return
+            
+            # Process audio through this client's streaming ASR
+            await engine.process_audio(data)
             
         except Exception as e:
             logger.error(f"Error processing audio chunk: {e}", exc_info=True)
\ No newline at end of file
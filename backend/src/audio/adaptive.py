@@ -0,0 +1,115 @@
+"""
+Adaptive streaming ASR scheduling
+Measures each pass's real-time factor and moves along a quality ladder
+(pass interval, window length, beam size) to hold a latency target
+"""
+import logging
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PassSettings:
+    interval: float    # Seconds between passes
+    max_window: float  # Force-commit beyond this many uncommitted seconds
+    beam_size: int
+
+
+# Best quality first; index 1 matches the previous hardcoded behaviour
+QUALITY_LADDER = [
+    PassSettings(interval=0.5, max_window=20.0, beam_size=5),
+    PassSettings(interval=1.0, max_window=15.0, beam_size=5),
+    PassSettings(interval=1.0, max_window=15.0, beam_size=3),
+    PassSettings(interval=1.5, max_window=12.0, beam_size=2),
+    PassSettings(interval=2.0, max_window=10.0, beam_size=1),
+    PassSettings(interval=3.0, max_window=8.0, beam_size=1),
+]
+
+
+class AdaptiveScheduler:
+    """Per-session pass scheduler driven by measured real-time factor"""
+
+    def __init__(self, latency_slo: float = 3.0, alpha: float = 0.3, session_id: str = None):
+        self.latency_slo = latency_slo  # Target seconds from speech to committed text
+        self.alpha = alpha  # EWMA smoothing
+        self.session_id = session_id
+        self.level = 1
+        self.pass_time = 0.0  # EWMA wall time of a pass (queueing included)
+        self.rtf = 0.0        # EWMA pass time / audio seconds decoded
+        self.passes = 0
+        self.falling_behind = False
+        self._over = 0
+        self._under = 0
+
+    @property
+    def settings(self) -> PassSettings:
+        return QUALITY_LADDER[self.level]
+
+    @property
+    def interval(self) -> float:
+        return self.settings.interval
+
+    @property
+    def max_window(self) -> float:
+        return self.settings.max_window
+
+    @property
+    def beam_size(self) -> int:
+        return self.settings.beam_size
+
+    def expected_latency(self) -> float:
+        """A word is committed one pass after it is first heard"""
+        return 2 * self.interval + self.pass_time
+
+    def record(self, audio_seconds: float, elapsed: float):
+        """Feed one pass's measurements and adapt"""
+        if audio_seconds <= 0:
+            return
+        if self.passes == 0:
+            self.pass_time = elapsed
+            self.rtf = elapsed / audio_seconds
+        else:
+            self.pass_time += self.alpha * (elapsed - self.pass_time)
+            self.rtf += self.alpha * (elapsed / audio_seconds - self.rtf)
+        self.passes += 1
+
+        overloaded = self.pass_time > 0.8 * self.interval or self.expected_latency() > self.latency_slo
+        underloaded = self.pass_time < 0.4 * self.interval and self.expected_latency() < 0.7 * self.latency_slo
+
+        # Hysteresis: degrade quickly, recover slowly
+        self._over = self._over + 1 if overloaded else 0
+        self._under = self._under + 1 if underloaded else 0
+
+        if self._over >= 2:
+            self._over = 0
+            if self.level < len(QUALITY_LADDER) - 1:
+                self.level += 1
+                logger.info(f"ASR {self.session_id}: pass {self.pass_time:.2f}s (RTF {self.rtf:.2f}), degrading to {self.settings}")
+            elif not self.falling_behind:
+                self.falling_behind = True
+                logger.warning(
+                    f"ASR {self.session_id} falling behind: pass {self.pass_time:.2f}s, "
+                    f"expected latency {self.expected_latency():.1f}s > SLO {self.latency_slo:.1f}s"
+                )
+        elif self._under >= 5:
+            self._under = 0
+            if self.level > 0:
+                self.level -= 1
+                logger.info(f"ASR {self.session_id}: pass {self.pass_time:.2f}s (RTF {self.rtf:.2f}), upgrading to {self.settings}")
+
+        if self.falling_behind and not overloaded:
+            self.falling_behind = False
+            logger.info(f"ASR {self.session_id} caught up")
+
+    def stats(self) -> dict:
+        return {
+            "level": self.level,
+            "interval": self.interval,
+            "max_window": self.max_window,
+            "beam_size": self.beam_size,
+            "pass_time": round(self.pass_time, 3),
+            "rtf": round(self.rtf, 3),
+            "expected_latency": round(self.expected_latency(), 2),
+            "falling_behind": self.falling_behind,
+        }
@@ -2,6 +2,8 @@ import numpy as np
 import logging
 from RealtimeSTT import AudioToTextRecorder
 from src.config import settings
+from src.audio.ring_buffer import float32_from_bytes, float32_to_int16
+from src.audio.backends import ASRBackend
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,9 @@ class ASREngine:
         
         self.on_text_callback = on_text_callback
         
+        # Reusable int16 scratch buffer for the PCM conversion
+        self._pcm16 = np.empty(4096, dtype=np.int16)
+        
         # Start the text processing loop in a non-blocking way if possible, 
         # but RealtimeSTT.text() is blocking.
         # However, for feed_audio usage, we typically don't call .text() in a loop explicitly 
@@ -61,12 +66,14 @@ class ASREngine:
         Process incoming audio chunk (float32 bytes) -> int16 -> feed to recorder.
         """
         try:
-            # Convert bytes (float32) to numpy array
-            audio_float32 = np.frombuffer(audio_chunk, dtype=np.float32)
+            # Convert bytes (float32) to numpy array (zero-copy view)
+            audio_float32 = float32_from_bytes(audio_chunk)
             
             # Convert to int16 (PCM) for RealtimeSTT
-            # Scale -1.0..1.0 to -32768..32767
-            audio_int16 = (audio_float32 * 32767).astype(np.int16)
+            # Scale -1.0..1.0 to -32768..32767 into the preallocated buffer
+            if len(audio_float32) > len(self._pcm16):
+                self._pcm16 = np.empty(len(audio_float32), dtype=np.int16)
+            audio_int16 = float32_to_int16(audio_float32, self._pcm16)
             
             # Feed raw bytes of int16
             self.recorder.feed_audio(audio_int16.tobytes())
@@ -88,4 +95,63 @@ class ASREngine:
                 pass
             logger.info("ASR Engine reset complete")
         except Exception as e:
-            logger.error(f"Error resetting ASR engine: {e}")
\ No newline at end of file
+            logger.error(f"Error resetting ASR engine: {e}")
+
+
+class RealtimeSTTSession:
+    """The live client's handle on the backend's recorder"""
+
+    def __init__(self, backend: "RealtimeSTTBackend", sid: str, on_text_callback=None):
+        self.backend = backend
+        self.sid = sid
+        self.on_text_callback = on_text_callback
+
+    def set_callback(self, callback):
+        self.on_text_callback = callback
+
+    async def process_audio(self, audio_chunk: bytes):
+        await self.backend.engine.process_audio(audio_chunk)
+
+    def reset(self):
+        # Audio still queued in the recorder belongs to this client; don't pass it on
+        try:
+            self.backend.engine.recorder.clear_audio_queue()
+        except Exception as e:
+            logger.warning(f"Could not clear RealtimeSTT audio queue: {e}")
+
+
+class RealtimeSTTBackend(ASRBackend):
+    """
+    One RealtimeSTT recorder (and model) for one live client at a time (float32 audio only)
+    The recorder transcribes a single audio stream, so a second client is refused
+    rather than mixed into the first one's audio and text.
+    """
+
+    name = "realtimestt"
+    streaming = True
+    max_sessions = 1
+
+    def __init__(self):
+        super().__init__()
+        self.engine: ASREngine | None = None
+
+    def load(self):
+        self.engine = ASREngine(on_text_callback=self._dispatch)
+
+    def is_ready(self) -> bool:
+        return self.engine is not None
+
+    def _dispatch(self, text, is_final):
+        """Route recorder output (from its own thread) to the live session"""
+        for session in list(self.sessions.values()):
+            if session.on_text_callback:
+                session.on_text_callback(text, is_final=is_final)
+
+    def _new_session(self, sid: str, on_text_callback, audio_format: str) -> RealtimeSTTSession:
+        return RealtimeSTTSession(self, sid, on_text_callback)
+
+    def shutdown(self):
+        super().shutdown()
+        if self.engine:
+            self.engine.reset()
+            self.engine = None
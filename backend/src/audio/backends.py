@@ -0,0 +1,178 @@
+"""
+Pluggable ASR backends
+Every speech recogniser implements ASRBackend; the registry builds and loads
+a backend only when it is first asked for (or warmed up), so just the
+configured models are resident
+"""
+import asyncio
+import importlib
+import logging
+import threading
+import time
+import numpy as np
+from src.audio.wire import FORMAT_F32, SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+def warmup_audio(seconds: float = 1.0) -> np.ndarray:
+    """Quiet noise for warmup passes (pure silence can be skipped by VAD)"""
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.01).astype(np.float32)
+
+
+class SessionLimitReached(Exception):
+    """The backend is already serving as many live sessions as it can"""
+
+
+class ASRBackend:
+    """
+    Interface shared by all ASR backends
+    Streaming backends keep one session per Socket.IO client and take
+    audio_chunk payloads; file backends transcribe whole decoded clips.
+    """
+
+    name = "asr"
+    streaming = False  # Serves live audio_chunk sessions
+    max_sessions: int | None = None  # Concurrent live sessions (None = unlimited)
+
+    def __init__(self):
+        self.sessions: dict = {}
+
+    def load(self):
+        """Load the models (blocking); called once by the registry"""
+
+    def is_ready(self) -> bool:
+        return True
+
+    def warmup(self):
+        """Run a synthetic inference so the first real request is not cold (blocking)"""
+
+    def supported_formats(self) -> list[str]:
+        """audio_chunk wire formats the sessions can decode"""
+        return [FORMAT_F32]
+
+    def _new_session(self, sid: str, on_text_callback, audio_format: str):
+        raise NotImplementedError(f"ASR backend '{self.name}' does not stream live audio")
+
+    def create_session(self, sid: str, on_text_callback=None, audio_format: str = FORMAT_F32):
+        """
+        Create (or replace) the streaming session of a client
+        Raises:
+            SessionLimitReached: if max_sessions other clients are already streaming
+        """
+        if self.max_sessions is not None and sid not in self.sessions and len(self.sessions) >= self.max_sessions:
+            raise SessionLimitReached(f"{self.name} serves {self.max_sessions} live session(s) at a time")
+        if sid in self.sessions:
+            self.sessions[sid].reset()
+        session = self._new_session(sid, on_text_callback, audio_format)
+        self.sessions[sid] = session
+        logger.info(f"Active {self.name} sessions: {len(self.sessions)}")
+        return session
+
+    def get_session(self, sid: str):
+        return self.sessions.get(sid)
+
+    def remove_session(self, sid: str):
+        """Flush and drop a client's session"""
+        session = self.sessions.pop(sid, None)
+        if session:
+            session.reset()
+        logger.info(f"Active {self.name} sessions: {len(self.sessions)}")
+
+    def transcribe(self, audio: np.ndarray, language: str = "en") -> str:
+        """
+        Transcribe a whole clip (blocking)
+        Args:
+            audio: 16 kHz mono float32 samples
+            language: Language code
+        Returns:
+            Transcribed text
+        """
+        raise NotImplementedError(f"ASR backend '{self.name}' does not transcribe files")
+
+    def stats(self) -> dict:
+        return {"sessions": len(self.sessions)}
+
+    def shutdown(self):
+        for sid in list(self.sessions):
+            self.remove_session(sid)
+
+
+class ASRBackendRegistry:
+    """Named ASR backends, constructed and loaded on first use"""
+
+    def __init__(self):
+        self._factories: dict[str, str] = {}
+        self._backends: dict[str, ASRBackend] = {}
+        self._lock = threading.Lock()
+        self.load_times: dict[str, float] = {}
+
+    def register(self, name: str, factory: str):
+        """
+        Args:
+            name: backend name used in settings
+            factory: "module:Class" path, imported only when the backend is loaded
+        """
+        self._factories[name] = factory
+
+    def names(self) -> list[str]:
+        return list(self._factories)
+
+    def peek(self, name: str) -> ASRBackend | None:
+        """The backend if it is already loaded, without loading it"""
+        return self._backends.get(name)
+
+    def get(self, name: str) -> ASRBackend:
+        """Return a loaded backend, importing and loading it on first use (blocking)"""
+        backend = self._backends.get(name)
+        if backend is not None:
+            return backend
+        if name not in self._factories:
+            raise KeyError(f"Unknown ASR backend '{name}' (known: {', '.join(self._factories)})")
+
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                module_name, class_name = self._factories[name].split(":")
+                start = time.perf_counter()
+                logger.info(f"Loading ASR backend {name}...")
+                backend = getattr(importlib.import_module(module_name), class_name)()
+                backend.load()
+                self.load_times[name] = time.perf_counter() - start
+                self._backends[name] = backend
+                logger.info(f"ASR backend {name} loaded in {self.load_times[name]:.1f}s")
+        return backend
+
+    async def aget(self, name: str) -> ASRBackend:
+        """get() without blocking the event loop while a backend loads"""
+        backend = self._backends.get(name)
+        if backend is not None:
+            return backend
+        return await asyncio.to_thread(self.get, name)
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "loaded": name in self._backends,
+                "ready": name in self._backends and self._backends[name].is_ready(),
+                "load_time": round(self.load_times[name], 2) if name in self.load_times else None,
+                **(self._backends[name].stats() if name in self._backends else {}),
+            }
+            for name in self._factories
+        }
+
+    def shutdown(self):
+        for name, backend in list(self._backends.items()):
+            try:
+                backend.shutdown()
+            except Exception as e:
+                logger.warning(f"Error shutting down ASR backend {name}: {e}")
+
+
+# Global registry; settings.asr_backend serves live audio,
+# settings.transcribe_backend serves uploaded files
+asr_backends = ASRBackendRegistry()
+asr_backends.register("faster-whisper", "src.audio.streaming_asr:FasterWhisperBackend")
+asr_backends.register("realtimestt", "src.audio.asr:RealtimeSTTBackend")
+asr_backends.register("whisper-local", "src.services.whisper_local:WhisperLocalBackend")
@@ -0,0 +1,204 @@
+"""
+Micro-batched Whisper decoding across concurrent streaming sessions
+Windows that become ready within a short deadline are encoded and decoded
+as one batch, then routed back to the session that submitted them
+"""
+import math
+import asyncio
+import logging
+import numpy as np
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.vad import VadOptions, SpeechTimestampsMap, collect_chunks, get_speech_timestamps
+from src.audio.hypothesis import TimedWord
+from src.audio.pool import WhisperWorkerPool, STREAMING_VAD_PARAMETERS
+from src.executor import InferenceCancelled, InferenceQueueFull
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+NO_SPEECH_THRESHOLD = 0.6
+# faster-whisper's defaults for attaching punctuation to words
+PREPEND_PUNCTUATIONS = "\"'“¿([{-"
+APPEND_PUNCTUATIONS = "\"'.。,，!！?？:：”)]}、"
+
+
+def decode_batch(cancel, model, windows: list[np.ndarray], prompts: list[str | None], beam_size: int = 5) -> list[list[TimedWord]]:
+    """
+    Encode and decode several windows (each up to 30s) in one forward pass
+    Like WhisperWorkerPool.transcribe_words, each window is VAD-filtered first
+    and word times come from cross-attention alignment, mapped back to the window.
+    """
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en")
+    vad_options = VadOptions(**STREAMING_VAD_PARAMETERS)
+
+    # Only the speech of each window is decoded; windows without any are skipped
+    speech = []  # (window index, speech audio, speech chunks)
+    for i, window in enumerate(windows):
+        chunks = get_speech_timestamps(window, vad_options)
+        if chunks:
+            audio_chunks, _ = collect_chunks(window, chunks)
+            speech.append((i, np.concatenate(audio_chunks), chunks))
+    batch_words = [[] for _ in windows]
+    if not speech:
+        return batch_words
+
+    features = np.stack([pad_or_trim(model.feature_extractor(audio)[..., :-1]) for _, audio, _ in speech])
+    encoder_output = model.encode(features)
+    if cancel.is_set():
+        raise InferenceCancelled("Batch cancelled")
+
+    prompt_tokens = [
+        model.get_prompt(
+            tokenizer,
+            previous_tokens=tokenizer.encode(" " + prompts[i].strip()) if prompts[i] else [],
+            without_timestamps=False
+        )
+        for i, _, _ in speech
+    ]
+    results = model.model.generate(
+        encoder_output,
+        prompt_tokens,
+        beam_size=beam_size,
+        max_length=model.max_length,
+        return_scores=True,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        suppress_tokens=[-1]
+    )
+    if cancel.is_set():
+        raise InferenceCancelled("Batch cancelled")
+
+    # Split into timestamped segments and align words, as faster-whisper's batched pipeline does
+    segments = []
+    num_frames = []
+    for (_, audio, _), result in zip(speech, results):
+        duration = min(len(audio) / SAMPLE_RATE, 30.0)
+        segment_size = int(math.ceil(duration) * model.frames_per_second)
+        tokens = [] if result.no_speech_prob > NO_SPEECH_THRESHOLD else result.sequences_ids[0]
+        subsegments, _, _ = model._split_segments_by_timestamps(
+            tokenizer=tokenizer,
+            tokens=tokens,
+            time_offset=0.0,
+            segment_size=segment_size,
+            segment_duration=duration,
+            seek=0
+        )
+        segments.append(subsegments)
+        num_frames.append(segment_size)
+    model.add_word_timestamps(
+        segments, tokenizer, encoder_output, num_frames,
+        PREPEND_PUNCTUATIONS, APPEND_PUNCTUATIONS, 0.0
+    )
+
+    # Word times are relative to the speech-only audio; restore the silences VAD removed
+    for (i, _, chunks), subsegments in zip(speech, segments):
+        ts_map = SpeechTimestampsMap(chunks, SAMPLE_RATE)
+        for subsegment in subsegments:
+            for word in subsegment.get("words", []):
+                chunk_index = ts_map.get_chunk_index((word["start"] + word["end"]) / 2)
+                batch_words[i].append((
+                    ts_map.get_original_time(word["start"], chunk_index),
+                    ts_map.get_original_time(word["end"], chunk_index),
+                    word["word"]
+                ))
+    return batch_words
+
+
+class BatchScheduler:
+    """Collects pending windows from all sessions and decodes them together"""
+
+    def __init__(self, pool: WhisperWorkerPool, max_batch: int = 4, max_wait_ms: int = 30, beam_size: int = 5,
+                 max_pending: int = 16):
+        self.pool = pool
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.beam_size = beam_size
+        self.max_pending = max_pending
+        self.pending = []  # (audio, prompt, beam_size, future)
+        self.in_flight = 0  # Windows dispatched in batches not yet decoded
+        self._timer = None
+        self._tasks = set()  # Running batches (the loop only keeps weak references)
+        self.batches = 0
+        self.windows = 0
+        self.rejected = 0
+
+    def is_ready(self) -> bool:
+        return self.pool.is_ready()
+
+    @property
+    def queued(self) -> int:
+        """Windows waiting for or inside a batch"""
+        return len(self.pending) + self.in_flight
+
+    async def transcribe_words(self, audio, prompt: str | None = None, beam_size: int | None = None) -> list[TimedWord]:
+        """
+        Queue a window for the next batch and wait for its words
+        Raises:
+            InferenceQueueFull: if max_pending windows are already waiting
+        """
+        if not self.pool.is_ready():
+            raise RuntimeError("Whisper model not loaded")
+        if len(self.pending) >= self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFull(f"Whisper batch queue full ({len(self.pending)}/{self.max_pending})")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((audio, prompt, beam_size or self.beam_size, future))
+
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Dispatch up to max_batch pending windows"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = [item for item in self.pending[:self.max_batch] if not item[-1].done()]
+        self.pending = self.pending[self.max_batch:]
+        if self.pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.windows += len(batch)
+        self.in_flight += len(batch)
+        logger.debug(f"Decoding batch of {len(batch)} windows")
+        try:
+            results = await self.pool.executor.run(
+                decode_batch,
+                self.pool.model,
+                [audio for audio, _, _, _ in batch],
+                [prompt for _, prompt, _, _ in batch],
+                # One beam width per batch: the most constrained session wins
+                min(beam for _, _, beam, _ in batch)
+            )
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.in_flight -= len(batch)
+
+        for (*_, future), words in zip(batch, results):
+            if not future.done():
+                future.set_result(words)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "avg_batch_size": round(self.windows / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self.pending),
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
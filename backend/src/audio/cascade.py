@@ -0,0 +1,130 @@
+"""
+Latency-driven Whisper model cascade
+A small model produces partial hypotheses, the best allowed model produces
+final text, and sessions are demoted to smaller models while the host is
+overloaded
+"""
+import logging
+from src.config import settings
+from src.audio.pool import WhisperWorkerPool
+from src.audio.batching import BatchScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class ModelTier:
+    """One Whisper model with its own worker pool (and batcher)"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.pool = WhisperWorkerPool(
+            model_path=model_path,
+            num_workers=settings.asr_workers,
+            max_queue=settings.asr_queue_depth
+        )
+        if settings.asr_batch_size > 1:
+            self.decoder = BatchScheduler(
+                self.pool,
+                max_batch=settings.asr_batch_size,
+                max_wait_ms=settings.asr_batch_wait_ms,
+                max_pending=settings.asr_queue_depth * settings.asr_batch_size
+            )
+        else:
+            self.decoder = self.pool
+
+    def queue_load(self) -> float:
+        """Pending passes per worker (windows, not batches, when batching)"""
+        if isinstance(self.decoder, BatchScheduler):
+            return self.decoder.queued / self.pool.num_workers
+        return self.pool.executor.pending / self.pool.num_workers
+
+
+class ModelCascade:
+    """Chooses the Whisper tier for each pass of each session"""
+
+    def __init__(self, model_paths: list[str], partial_model: str | None = None):
+        # Best quality first
+        self.tiers = [ModelTier(path) for path in model_paths]
+        if not self.tiers:
+            raise ValueError("At least one ASR model tier must be allowed")
+        paths = [tier.model_path for tier in self.tiers]
+        self.partial_index = paths.index(partial_model) if partial_model in paths else len(self.tiers) - 1
+        self.demote_queue = 2.0   # Pending jobs per worker before demoting
+        self.promote_queue = 0.5  # ... and below which sessions may move back up
+        self.promote_after = 5    # Healthy final passes before promoting
+        self.demotions = 0
+        self.promotions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Partial/final split only applies with more than one tier"""
+        return len(self.tiers) > 1
+
+    def load(self):
+        """Load every allowed tier; a tier that fails is skipped"""
+        for tier in self.tiers:
+            try:
+                tier.pool.load()
+            except Exception as e:
+                logger.error(f"Failed to load Whisper tier {tier.model_path}: {e}")
+
+    def is_ready(self) -> bool:
+        return any(tier.pool.is_ready() for tier in self.tiers)
+
+    def _ready_at_or_below(self, index: int) -> int:
+        """First loaded tier at `index` or smaller; falls back upwards"""
+        for i in list(range(index, len(self.tiers))) + list(range(index - 1, -1, -1)):
+            if self.tiers[i].pool.is_ready():
+                return i
+        return index
+
+    def best_tier(self) -> ModelTier:
+        """Best loaded tier (offline transcription)"""
+        return self.tiers[self._ready_at_or_below(0)]
+
+    def final_tier(self, engine) -> ModelTier:
+        return self.tiers[self._ready_at_or_below(engine.tier)]
+
+    def partial_tier(self, engine) -> ModelTier:
+        # Never better than the session's final tier
+        return self.tiers[self._ready_at_or_below(max(self.partial_index, engine.tier))]
+
+    def update(self, engine):
+        """Re-evaluate a session's tier after a final pass"""
+        tier = self.tiers[engine.tier]
+        scheduler = engine.scheduler
+        overloaded = (
+            tier.queue_load() >= self.demote_queue
+            or scheduler.expected_latency() > scheduler.latency_slo
+        )
+        if overloaded:
+            engine.tier_healthy = 0
+            if engine.tier < len(self.tiers) - 1:
+                engine.tier += 1
+                self.demotions += 1
+                logger.info(f"ASR {engine.session_id} demoted to {self.tiers[engine.tier].model_path} "
+                            f"(queue {tier.queue_load():.1f}/worker, latency {scheduler.expected_latency():.1f}s)")
+            return
+
+        if engine.tier > 0 and tier.queue_load() <= self.promote_queue:
+            engine.tier_healthy += 1
+            if engine.tier_healthy >= self.promote_after:
+                engine.tier_healthy = 0
+                engine.tier -= 1
+                self.promotions += 1
+                logger.info(f"ASR {engine.session_id} promoted to {self.tiers[engine.tier].model_path}")
+
+    def stats(self) -> dict:
+        return {
+            "tiers": [
+                {
+                    "model": tier.model_path,
+                    "loaded": tier.pool.is_ready(),
+                    "queue_load": round(tier.queue_load(), 2),
+                }
+                for tier in self.tiers
+            ],
+            "partial_model": self.tiers[self.partial_index].model_path,
+            "demotions": self.demotions,
+            "promotions": self.promotions,
+        }
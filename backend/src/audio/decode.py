@@ -0,0 +1,193 @@
+"""
+Streaming decode of uploaded audio
+The request body is parsed as it arrives and piped straight into ffmpeg,
+whose 16 kHz mono float32 PCM is handed to a sink block by block; nothing
+touches the disk and the decoded recording is never held whole. A slow sink
+holds back ffmpeg and, through it, the upload.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+import numpy as np
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+READ_SIZE = 64 * 1024
+
+# Receives each block of decoded samples; the block is only valid during the call
+SampleSink = Callable[[np.ndarray], Awaitable[None]]
+
+
+class AudioDecodeError(Exception):
+    """ffmpeg could not decode the upload"""
+
+
+class AudioTooLong(AudioDecodeError):
+    """Decoded audio exceeds the configured maximum duration"""
+
+
+class FFmpegDecoder:
+    """Feeds compressed audio bytes to an ffmpeg pipe and passes the float32 samples to a sink"""
+
+    def __init__(self, sink: SampleSink, sample_rate: int = SAMPLE_RATE, max_seconds: float | None = None):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.max_samples = int(max_seconds * sample_rate) if max_seconds else None
+        self.decoded = 0  # Samples handed to the sink
+        self.process = None
+        self._reader = None
+        self._stderr = None
+        self._error = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "f32le", "-ac", "1", "-ar", str(self.sample_rate),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read_stdout())
+        self._stderr = asyncio.create_task(self.process.stderr.read())
+
+    async def _read_stdout(self):
+        pending = b""  # Reads aren't aligned to 4-byte samples
+        try:
+            while True:
+                data = await self.process.stdout.read(READ_SIZE)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % 4
+                pending = data[usable:]
+                samples = np.frombuffer(data, dtype=np.float32, count=usable // 4)
+                self.decoded += len(samples)
+                if self.max_samples and self.decoded > self.max_samples:
+                    raise AudioTooLong(f"Audio longer than {self.max_samples / self.sample_rate:.0f}s")
+                if len(samples):
+                    await self.sink(samples)  # ffmpeg waits while the sink is busy
+        except Exception as e:
+            # Decode limits or a failing sink; feed()/finish() re-raise it
+            self._error = e
+            self.process.kill()
+
+    async def feed(self, chunk: bytes):
+        """Write one chunk of the compressed stream (waits while ffmpeg catches up)"""
+        if self._error:
+            raise self._error
+        try:
+            self.process.stdin.write(chunk)
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early; finish() reports why
+            pass
+
+    async def finish(self) -> int:
+        """Close the input, wait for the last samples to reach the sink and return how many were decoded"""
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        await self._reader
+        stderr = await self._stderr
+        returncode = await self.process.wait()
+        if self._error:
+            raise self._error
+        if returncode != 0:
+            raise AudioDecodeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {returncode}")
+        return self.decoded
+
+    def abort(self):
+        if self.process and self.process.returncode is None:
+            self.process.kill()
+
+
+class _FilePartExtractor:
+    """Push parser yielding the bytes of the multipart field named `field`"""
+
+    def __init__(self, boundary: bytes, field: str = "file"):
+        self.field = field
+        self.out: list[bytes] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._in_field = False
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+        })
+
+    def _on_part_begin(self):
+        self._in_field = False
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            self._in_field = options.get(b"name") == self.field.encode()
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_part_data(self, data, start, end):
+        if self._in_field:
+            self.out.append(data[start:end])
+
+    def write(self, chunk: bytes) -> list[bytes]:
+        self.parser.write(chunk)
+        out, self.out = self.out, []
+        return out
+
+
+async def decode_upload(stream, content_type: str, sink: SampleSink, max_seconds: float | None = None) -> int:
+    """
+    Decode an uploaded audio body while it streams in
+    Args:
+        stream: async iterator of body chunks (e.g. Request.stream())
+        content_type: request Content-Type; multipart bodies use their `file` field,
+                      anything else is treated as the raw audio file
+        sink: receives the 16 kHz mono float32 samples block by block
+        max_seconds: reject audio longer than this
+    Returns:
+        Number of samples decoded
+    Raises:
+        AudioDecodeError: undecodable input (AudioTooLong past max_seconds);
+                          errors raised by the sink are re-raised as they are
+    """
+    extractor = None
+    mime, options = parse_options_header(content_type or "")
+    if mime == b"multipart/form-data":
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise AudioDecodeError("Multipart upload without boundary")
+        extractor = _FilePartExtractor(boundary)
+
+    decoder = FFmpegDecoder(sink, max_seconds=max_seconds)
+    await decoder.start()
+    try:
+        received = 0
+        async for chunk in stream:
+            received += len(chunk)
+            pieces = extractor.write(chunk) if extractor else [chunk]
+            for piece in pieces:
+                await decoder.feed(piece)
+        decoded = await decoder.finish()
+        logger.info(f"Decoded {received} bytes into {decoded / SAMPLE_RATE:.1f}s of audio")
+        return decoded
+    except BaseException:
+        decoder.abort()
+        raise
@@ -0,0 +1,110 @@
+"""
+Committed-prefix tracking for incremental streaming transcription
+Implements local agreement between consecutive Whisper passes: a word is
+committed once two passes over overlapping audio agree on it
+"""
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A timed word: (start_seconds, end_seconds, text), absolute stream time
+TimedWord = tuple[float, float, str]
+
+_NORMALIZE_RE = re.compile(r"[^\w']+")
+
+
+def _normalize(word: str) -> str:
+    """Compare words ignoring case and punctuation"""
+    return _NORMALIZE_RE.sub("", word.lower())
+
+
+class HypothesisBuffer:
+    """Tracks committed words and the unconfirmed hypothesis between passes"""
+
+    def __init__(self, tolerance: float = 0.1, max_history: int = 100):
+        self.tolerance = tolerance  # Seconds of overlap allowed around the commit point
+        self.max_history = max_history  # Committed words kept for prompting/dedup
+        self.committed: list[TimedWord] = []
+        self.previous: list[TimedWord] = []  # Unconfirmed words from the last pass
+        self.current: list[TimedWord] = []   # Words from the pass being flushed
+        self.last_committed_time = 0.0
+
+    def insert(self, words: list[TimedWord], offset: float):
+        """
+        Add the words of a new pass
+        Args:
+            words: words with timestamps relative to the decoded window
+            offset: absolute stream time of the window start
+        """
+        shifted = [(start + offset, end + offset, text) for start, end, text in words]
+        # Drop anything that lies before the commit point
+        self.current = [w for w in shifted if w[0] > self.last_committed_time - self.tolerance]
+
+        # Whisper often repeats the last committed words at the start of the window
+        if self.current and self.committed and abs(self.current[0][0] - self.last_committed_time) < 1.0:
+            for n in range(min(len(self.committed), len(self.current), 5), 0, -1):
+                tail = [_normalize(w[2]) for w in self.committed[-n:]]
+                head = [_normalize(w[2]) for w in self.current[:n]]
+                if tail == head:
+                    del self.current[:n]
+                    break
+
+    def flush(self) -> list[TimedWord]:
+        """Commit the longest prefix on which the last two passes agree"""
+        agreed: list[TimedWord] = []
+        while self.current and self.previous:
+            word = self.current[0]
+            if _normalize(word[2]) != _normalize(self.previous[0][2]):
+                break
+            agreed.append(word)
+            self.last_committed_time = word[1]
+            self.current.pop(0)
+            self.previous.pop(0)
+
+        self.previous = self.current
+        self.current = []
+        self.committed.extend(agreed)
+        del self.committed[:-self.max_history]
+        return agreed
+
+    def force_commit(self) -> list[TimedWord]:
+        """Commit everything still pending (end of utterance or window overflow)"""
+        pending = self.current or self.previous
+        if pending:
+            self.last_committed_time = pending[-1][1]
+            self.committed.extend(pending)
+            del self.committed[:-self.max_history]
+        self.current = []
+        self.previous = []
+        return pending
+
+    def commit_until(self, until: float) -> list[TimedWord]:
+        """Commit words of the current pass ending by absolute time `until`; drop the rest"""
+        agreed = [w for w in self.current if w[1] <= until]
+        if agreed:
+            self.last_committed_time = agreed[-1][1]
+            self.committed.extend(agreed)
+            del self.committed[:-self.max_history]
+        self.current = []
+        self.previous = []
+        return agreed
+
+    def unconfirmed(self) -> list[TimedWord]:
+        """Words of the latest pass that are not committed yet"""
+        return list(self.previous)
+
+    def prompt(self, max_chars: int = 200) -> str:
+        """Recent committed text, used as initial prompt for the next pass"""
+        text = ""
+        for _, _, word in reversed(self.committed):
+            if len(text) + len(word) > max_chars:
+                break
+            text = word + text
+        return text.strip()
+
+    def reset(self):
+        self.committed.clear()
+        self.previous = []
+        self.current = []
+        self.last_committed_time = 0.0
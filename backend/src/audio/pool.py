@@ -0,0 +1,116 @@
+"""
+Shared faster-whisper model pool
+One copy of the weights serves every streaming session through a fixed
+number of CTranslate2 workers
+"""
+import os
+import logging
+from faster_whisper import WhisperModel
+from src.executor import InferenceExecutor, InferenceCancelled
+from src.audio.hypothesis import TimedWord
+
+logger = logging.getLogger(__name__)
+
+# Minimal VAD filtering for maximum capture on streaming passes
+STREAMING_VAD_PARAMETERS = {
+    "threshold": 0.2,                    # Very low threshold - maximum sensitivity
+    "min_speech_duration_ms": 50,        # Minimum possible duration
+    "max_speech_duration_s": float('inf'),
+    "min_silence_duration_ms": 2000,     # Very long silence tolerance
+    "speech_pad_ms": 600                 # Maximum padding
+}
+
+
+class WhisperWorkerPool:
+    """Fixed-size pool of Whisper workers sharing a single loaded model"""
+
+    def __init__(self, model_path: str = "large-v3", num_workers: int = 2, max_queue: int = 8):
+        self.model_path = model_path  # faster-whisper uses simplified names
+        self.num_workers = max(1, num_workers)
+        self.model = None
+        self.load_error = None
+        self.executor = InferenceExecutor("whisper", max_workers=self.num_workers, max_queue=max_queue)
+
+    def load(self):
+        """Load the model once; CTranslate2 replicates workers, not weights"""
+        if self.model is not None:
+            return
+
+        try:
+            logger.info(f"Loading Faster Whisper model {self.model_path} with {self.num_workers} workers...")
+            # Split the cores between workers so parallel passes don't oversubscribe
+            cpu_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            # Use CPU with int8 for Apple Silicon efficiency
+            self.model = WhisperModel(
+                self.model_path,
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=cpu_threads,
+                num_workers=self.num_workers
+            )
+            self.load_error = None
+            logger.info("Whisper model loaded successfully")
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}")
+            self.load_error = str(e)
+            raise
+
+    def is_ready(self) -> bool:
+        return self.model is not None
+
+    def _transcribe_sync(self, cancel, audio, kwargs):
+        """Run a full transcription on a worker thread (segments are lazy)"""
+        segments, info = self.model.transcribe(audio, **kwargs)
+        decoded = []
+        for segment in segments:
+            if cancel.is_set():
+                raise InferenceCancelled("Transcription cancelled")
+            decoded.append(segment)
+        return decoded, info
+
+    async def transcribe(self, audio, **kwargs):
+        """
+        Transcribe audio on one of the pool workers
+        Returns:
+            (segments, info) with segments fully decoded
+        Raises:
+            InferenceQueueFull: if every worker is busy and the queue is full
+        """
+        if self.model is None:
+            raise RuntimeError("Whisper model not loaded")
+        return await self.executor.run(self._transcribe_sync, audio, kwargs)
+
+    async def transcribe_words(self, audio, prompt: str | None = None, beam_size: int = 5) -> list[TimedWord]:
+        """Streaming pass: timed words of one window"""
+        segments, info = await self.transcribe(
+            audio,
+            language="en",
+            beam_size=beam_size,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=prompt,
+            vad_filter=True,
+            vad_parameters=STREAMING_VAD_PARAMETERS
+        )
+        return [
+            (word.start, word.end, word.word)
+            for segment in segments
+            for word in (segment.words or [])
+        ]
+
+    def transcribe_text(self, audio, language: str = "en") -> str:
+        """Offline transcription of a whole clip on the calling thread"""
+        if self.model is None:
+            raise RuntimeError("Whisper model not loaded")
+        segments, info = self.model.transcribe(audio, language=language, beam_size=5, vad_filter=True)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def warmup(self, audio):
+        """Push one clip through the encoder and decoder on the calling thread"""
+        segments, info = self.model.transcribe(audio, language="en", beam_size=1, vad_filter=False)
+        for _ in segments:
+            pass
+
+    def shutdown(self):
+        self.executor.shutdown()
+
@@ -0,0 +1,122 @@
+"""
+Preallocated audio buffers for streaming ASR
+Avoids per-pass np.concatenate over a deque of chunks
+"""
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity contiguous float32 sample buffer
+
+    Samples live in a preallocated array of twice the capacity. Appends write
+    at the tail; when the tail reaches the end, the live region is moved back
+    to the front (amortised O(1) per sample), so the buffered audio is always
+    one contiguous slice and views never need a copy.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(capacity * 2, dtype=self.dtype)
+        self._start = 0
+        self._end = 0
+        self._exported = False  # A view of _data may still be in use
+        self.offset = 0  # Absolute stream index of the oldest buffered sample
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def end_offset(self) -> int:
+        """Absolute stream index one past the newest sample"""
+        return self.offset + len(self)
+
+    def append(self, samples: np.ndarray):
+        """Append samples, evicting the oldest ones beyond capacity"""
+        n = len(samples)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            # Only the newest `capacity` samples can survive
+            self.offset += len(self) + n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+            self._start = self._end = 0
+            self._compact_if_exported()
+
+        overflow = len(self) + n - self.capacity
+        if overflow > 0:
+            self._start += overflow
+            self.offset += overflow
+
+        if self._end + n > len(self._data):
+            self._compact()
+
+        self._data[self._end:self._end + n] = samples
+        self._end += n
+
+    def _compact_if_exported(self):
+        """Writing will restart at index 0; don't overwrite a view in use"""
+        if self._exported:
+            self._data = np.zeros_like(self._data)
+            self._exported = False
+
+    def _compact(self):
+        """Move the live region to the front of the backing array"""
+        live = len(self)
+        if self._exported:
+            # A reader may hold a view of the old array; move into a fresh one
+            data = np.zeros_like(self._data)
+            data[:live] = self._data[self._start:self._end]
+            self._data = data
+            self._exported = False
+        else:
+            self._data[:live] = self._data[self._start:self._end]
+        self._start = 0
+        self._end = live
+
+    def view(self, num_samples: int | None = None) -> np.ndarray:
+        """
+        Zero-copy view of the most recent samples (all if num_samples is None)
+        The view stays valid after later appends and trims until release().
+        """
+        start = self._start if num_samples is None else max(self._start, self._end - num_samples)
+        self._exported = True
+        return self._data[start:self._end]
+
+    def release(self):
+        """The last view is no longer used; compaction may move data in place again"""
+        self._exported = False
+
+    def latest(self, seconds: float, sample_rate: int = 16000) -> np.ndarray:
+        """Zero-copy view of the most recent `seconds` of audio"""
+        return self.view(int(seconds * sample_rate))
+
+    def trim_to(self, index: int):
+        """Drop samples before absolute stream index `index`"""
+        drop = min(max(0, index - self.offset), len(self))
+        self._start += drop
+        self.offset += drop
+
+    def clear(self):
+        """Drop all samples (stream position restarts at 0)"""
+        self._start = self._end = 0
+        self.offset = 0
+        self._compact_if_exported()
+
+
+def float32_from_bytes(data: bytes) -> np.ndarray:
+    """Zero-copy float32 view over raw little-endian sample bytes"""
+    return np.frombuffer(data, dtype=np.float32)
+
+
+def float32_to_int16(samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Convert -1.0..1.0 float samples to int16 PCM into a reusable buffer
+    Returns:
+        view of `out` holding len(samples) converted samples
+    """
+    dest = out[:len(samples)]
+    np.multiply(samples, 32767, out=dest, casting="unsafe")
+    return dest
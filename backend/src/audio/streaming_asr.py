@@ -2,60 +2,57 @@
 Simplified streaming ASR engine using faster-whisper
 Replaces RealtimeSTT with a simpler, more reliable approach
 """
+import time
+import uuid
 import logging
 import asyncio
-import numpy as np
-from faster_whisper import WhisperModel
-from collections import deque
 from threading import Lock
+from src.audio.hypothesis import HypothesisBuffer
+from src.audio.ring_buffer import AudioRingBuffer
+from src.audio.wire import ChunkDecoder, FORMAT_F32, supported_formats
+from src.audio.vad import EnergyVAD
+from src.audio.adaptive import AdaptiveScheduler
+from src.audio.cascade import ModelCascade
+from src.audio.backends import ASRBackend, warmup_audio
+from src.executor import InferenceQueueFull
+from src.config import settings
 
 logger = logging.getLogger(__name__)
 
 class StreamingASREngine:
-    """Simple streaming ASR using faster-whisper with buffering"""
+    """Per-session streaming ASR with buffering; inference runs on the shared model cascade"""
     
-    def __init__(self):
-        # Use base whisper model for faster-whisper compatibility
-        self.model_path = "large-v3"  # faster-whisper uses simplified names
-        self.model = None  # Initialize before loading
-        self.on_text_callback = None
+    def __init__(self, cascade: ModelCascade, session_id: str = None, on_text_callback=None, audio_format: str = FORMAT_F32):
+        self.cascade = cascade
+        self.tier = 0  # Index of this session's final-pass model (0 = best)
+        self.tier_healthy = 0  # Healthy final passes since the last tier change
+        self.utterance_id = str(uuid.uuid4())  # Shared by partials and the final text
+        self.session_id = session_id
+        self.on_text_callback = on_text_callback
+        self.chunk_decoder = ChunkDecoder(audio_format)  # Negotiated wire format
         
-        # Audio buffering - increased for longer recordings
-        self.audio_buffer = deque(maxlen=300)  # Increased from 150 to 300 (longer buffer)
-        self.buffer_lock = Lock()
+        # Audio buffering - preallocated contiguous samples (60s at 16kHz)
         self.sample_rate = 16000
+        self.audio_buffer = AudioRingBuffer(capacity=60 * self.sample_rate)
+        self.buffer_lock = Lock()
         
         # Processing state
         self.is_processing = False
         self.last_process_time = 0
-        self.process_interval = 1.0  # Reduced from 1.5s to 1.0s for faster response
+        # Pass interval, window length and beam size adapt to the measured RTF
+        self.scheduler = AdaptiveScheduler(latency_slo=settings.asr_latency_slo, session_id=session_id)
         
-        logger.info(f"Streaming ASR initializing...")
+        # Incremental decoding: only the uncommitted tail stays in the buffer
+        self.hypothesis = HypothesisBuffer()
+        self.pending_words = []  # Committed words not yet emitted as a sentence
         
-        # Eagerly load model on startup (like Qwen)
-        try:
-            self._load_model()
-        except Exception as e:
-            logger.error(f"Failed to load Whisper model on startup: {e}")
-            self.model = None
-    
-    def _load_model(self):
-        """Load faster-whisper model"""
-        if self.model is not None:
-            return
-            
-        try:
-            logger.info("Loading Faster Whisper model...")
-            # Use CPU with int8 for Apple Silicon efficiency
-            self.model = WhisperModel(
-                self.model_path,
-                device="cpu",
-                compute_type="int8"
-            )
-            logger.info("Whisper model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load model: {e}")
-            raise
+        # Voice activity gating: silence never reaches the model
+        self.vad = EnergyVAD(sample_rate=self.sample_rate)
+        self.speech_active = False  # Buffer holds speech not yet finalized
+        self.final_pending = False  # Utterance ended; next pass commits everything
+        self.preroll = 0.5  # Seconds kept while idle so word onsets aren't clipped
+        
+        logger.info(f"Streaming ASR session created: {session_id}")
     
     def set_callback(self, callback):
         """Set callback for transcription results"""
@@ -66,32 +63,89 @@ class StreamingASREngine:
         """Clear audio buffer - call this on new connection"""
         with self.buffer_lock:
             self.audio_buffer.clear()
+        self.hypothesis.reset()
+        self.pending_words = []
+        self.vad.reset()
+        self.speech_active = False
+        self.final_pending = False
         logger.info("Audio buffer cleared")
     
+    def _trim_buffer(self, until: float):
+        """Drop buffered audio before absolute stream time `until` (seconds)"""
+        with self.buffer_lock:
+            self.audio_buffer.trim_to(int(until * self.sample_rate))
+    
+    def _emit(self, words, force: bool = False):
+        """Emit committed words as final text, one sentence at a time"""
+        self.pending_words.extend(words)
+        if not self.pending_words:
+            return
+        
+        # Wait for a sentence boundary unless forced (end of utterance / overflow)
+        last = self.pending_words[-1][2].strip()
+        if not force and not last.endswith((".", "?", "!")):
+            return
+        
+        text = "".join(w[2] for w in self.pending_words).strip()
+        self.pending_words = []
+        if not text:
+            return
+        
+        logger.info(f"Committed: '{text}'")
+        self._deliver(text, is_final=True)
+    
+    def _deliver(self, text: str, is_final: bool):
+        """Invoke the session callback; a final result closes the utterance id"""
+        if self.on_text_callback:
+            try:
+                self.on_text_callback(text, is_final=is_final, utterance_id=self.utterance_id)
+            except Exception as e:
+                logger.error(f"Callback error: {e}", exc_info=True)
+        elif is_final:
+            logger.warning(f"No callback set! Text lost: '{text}'")
+        if is_final:
+            self.utterance_id = str(uuid.uuid4())
+    
     async def process_audio(self, audio_chunk: bytes):
         """
         Process incoming audio chunk
         Args:
-            audio_chunk: bytes of float32 audio data
+            audio_chunk: bytes in the session's negotiated wire format
         """
         try:
             # Model already loaded on startup
-            if self.model is None:
+            if not self.cascade.is_ready():
                 logger.warning("Whisper model not loaded, skipping audio")
                 return
             
-            # Convert bytes to numpy array
-            audio_float32 = np.frombuffer(audio_chunk, dtype=np.float32)
+            # Decode to float32 (zero-copy view for float32 clients)
+            audio_float32 = self.chunk_decoder.decode(audio_chunk)
             
-            # Add to buffer
+            # Copy into the preallocated buffer
+            vad = self.vad.process(audio_float32)
             with self.buffer_lock:
                 self.audio_buffer.append(audio_float32)
             
+            if vad.is_speech:
+                self.speech_active = True
+            
+            if not self.speech_active:
+                # Idle microphone: keep only a short pre-roll, don't wake the model
+                with self.buffer_lock:
+                    self.audio_buffer.trim_to(self.audio_buffer.end_offset - int(self.preroll * self.sample_rate))
+                return
+            
+            if vad.utterance_ended:
+                # Speech -> silence: finalize the utterance right away
+                logger.debug(f"Utterance ended for {self.session_id}")
+                self.final_pending = True
+                asyncio.create_task(self._process_buffer())
+                return
+            
             # Check if we should process
-            import time
             current_time = time.time()
             
-            if current_time - self.last_process_time >= self.process_interval:
+            if current_time - self.last_process_time >= self.scheduler.interval:
                 self.last_process_time = current_time
                 asyncio.create_task(self._process_buffer())
                 
@@ -99,81 +153,189 @@ class StreamingASREngine:
             logger.error(f"Error processing audio chunk: {e}")
     
     async def _process_buffer(self):
-        """Process accumulated audio buffer"""
-        if self.is_processing or self.model is None:
+        """Decode the uncommitted tail of the buffer and commit agreed words"""
+        if self.is_processing or not self.cascade.is_ready():
             return
             
         self.is_processing = True
+        final = self.final_pending
+        self.final_pending = False
+        retry_final = False
         
         try:
             # Get audio from buffer
             with self.buffer_lock:
-                if not self.audio_buffer:
-                    self.is_processing = False
-                    return
-                
-                # Concatenate all chunks
-                audio_data = np.concatenate(list(self.audio_buffer))
+                # Zero-copy view of the uncommitted audio
+                audio_data = self.audio_buffer.view()
+                window_offset = self.audio_buffer.offset / self.sample_rate
             
             # Skip if too short
             duration = len(audio_data) / self.sample_rate
             if duration < 0.5:  # Less than 0.5 seconds
                 logger.debug(f"Audio too short ({duration:.2f}s), skipping")
-                self.is_processing = False
+                if final:
+                    self._finish_utterance(window_offset + duration)
                 return
             
-            logger.info(f"Transcribing {duration:.2f}s of audio...")
-            
-            # Transcribe with minimal VAD filtering for maximum capture
-            segments, info = self.model.transcribe(
-                audio_data,
-                language="en",
-                beam_size=5,
-                vad_filter=True,
-                vad_parameters={
-                    "threshold": 0.2,                    # Very low threshold - maximum sensitivity
-                    "min_speech_duration_ms": 50,        # Minimum possible duration
-                    "max_speech_duration_s": float('inf'),
-                    "min_silence_duration_ms": 2000,     # Very long silence tolerance
-                    "speech_pad_ms": 600                 # Maximum padding
-                }
-            )
-            
-            # Process segments and invoke callback
-            segment_count = 0
-            for segment in segments:
-                text = segment.text.strip()
-                segment_count += 1
-                logger.info(f"Segment {segment_count}: '{text}'")
-                
-                # ⭐ CRITICAL: Invoke callback for each segment
-                if text and self.on_text_callback:
-                    logger.info(f"Calling callback with: '{text}'")
-                    try:
-                        self.on_text_callback(text, is_final=True)
-                        logger.info(f"Callback invoked")
-                    except Exception as e:
-                        logger.error(f"Callback error: {e}", exc_info=True)
-                elif not text:
-                    logger.debug(f"Empty segment {segment_count}, skipping")
-                elif not self.on_text_callback:
-                    logger.warning(f"No callback set! Text lost: '{text}'")
-            
-            if segment_count == 0:
-                logger.info("No segments detected in audio")
+            if self.cascade.enabled:
+                await self._cascade_pass(audio_data, window_offset, duration, final)
+            else:
+                await self._agreement_pass(audio_data, window_offset, duration, final)
             
+        except InferenceQueueFull as e:
+            # Audio stays buffered; the next pass picks it up
+            logger.warning(f"Skipping ASR pass for {self.session_id}: {e}")
+            retry_final = final
         except Exception as e:
             logger.error(f"Error processing buffer: {e}", exc_info=True)
         finally:
+            with self.buffer_lock:
+                self.audio_buffer.release()
             self.is_processing = False
+            if self.final_pending:
+                # Utterance ended while this pass was running
+                asyncio.create_task(self._process_buffer())
+            # A rejected final pass is retried on the next scheduled pass
+            self.final_pending = self.final_pending or retry_final
+    
+    async def _agreement_pass(self, audio_data, window_offset: float, duration: float, final: bool):
+        """Single model: commit words once two consecutive passes agree"""
+        logger.info(f"Transcribing {duration:.2f}s of uncommitted audio...")
+        
+        # Transcribe on the shared decoder (batched with other sessions if enabled)
+        tier = self.cascade.final_tier(self)
+        started = time.perf_counter()
+        words = await tier.decoder.transcribe_words(
+            audio_data,
+            prompt=self.hypothesis.prompt() or None,
+            beam_size=self.scheduler.beam_size
+        )
+        self.scheduler.record(duration, time.perf_counter() - started)
+        
+        # Commit the prefix this pass agrees on with the previous one
+        self.hypothesis.insert(words, window_offset)
+        committed = self.hypothesis.flush()
+        
+        if final:
+            # Utterance ended: nothing more will be said in this window
+            self._emit(committed)
+            self._finish_utterance(window_offset + duration)
+        elif not words:
+            # Nothing recognised: the speaker paused, so close the sentence
+            # and keep only the most recent second as context
+            self._emit([], force=True)
+            self._trim_buffer(window_offset + duration - 1.0)
+        else:
+            if duration >= self.scheduler.max_window and not committed:
+                # Speaker never paused long enough to agree; don't let the window grow
+                logger.info(f"Window reached {duration:.1f}s, force-committing hypothesis")
+                committed = self.hypothesis.force_commit()
+                self._emit(committed, force=True)
+            else:
+                self._emit(committed)
+            
+            if committed:
+                self._trim_buffer(self.hypothesis.last_committed_time)
+    
+    async def _cascade_pass(self, audio_data, window_offset: float, duration: float, final: bool):
+        """
+        Model cascade: interim passes run a small model and only preview the
+        utterance; the final pass runs this session's final tier and commits it
+        """
+        overflow = duration >= self.scheduler.max_window
+        prompt = self.hypothesis.prompt() or None
+        
+        if not (final or overflow):
+            tier = self.cascade.partial_tier(self)
+            started = time.perf_counter()
+            words = await tier.decoder.transcribe_words(audio_data, prompt=prompt, beam_size=1)
+            self.scheduler.record(duration, time.perf_counter() - started)
+            text = "".join(w[2] for w in words).strip()
+            if text:
+                self._deliver(text, is_final=False)
+            return
+        
+        tier = self.cascade.final_tier(self)
+        logger.info(f"Final pass on {tier.model_path}: {duration:.2f}s of audio")
+        started = time.perf_counter()
+        words = await tier.decoder.transcribe_words(audio_data, prompt=prompt, beam_size=self.scheduler.beam_size)
+        self.scheduler.record(duration, time.perf_counter() - started)
+        self.cascade.update(self)
+        
+        self.hypothesis.insert(words, window_offset)
+        if final:
+            self._emit(self.hypothesis.force_commit(), force=True)
+            self._finish_utterance(window_offset + duration)
+        else:
+            # Window overflow mid-utterance: keep the last second, it may hold a cut word
+            committed = self.hypothesis.commit_until(window_offset + duration - 1.0)
+            self._emit(committed, force=True)
+            self._trim_buffer(self.hypothesis.last_committed_time if committed else window_offset + duration - 1.0)
+    
+    def _finish_utterance(self, until: float):
+        """Commit everything pending, drop the audio and go idle unless speech resumed"""
+        self._emit(self.hypothesis.force_commit(), force=True)
+        self._trim_buffer(until)
+        self.speech_active = self.vad.in_speech
     
     def reset(self):
         """Reset the engine but keep callback"""
+        # Flush whatever was still pending so the last words aren't lost
+        self._emit(self.hypothesis.force_commit(), force=True)
         with self.buffer_lock:
             self.audio_buffer.clear()
+        self.hypothesis.reset()
+        self.vad.reset()
+        self.speech_active = False
+        self.final_pending = False
         self.is_processing = False
-        # DON'T reset callback - it should persist across sessions
-        logger.info(f"ASR Engine reset (callback preserved: {self.on_text_callback is not None})")
+        logger.info(f"ASR session {self.session_id} reset")
 
-# Global instance (model loaded lazily on first use)
-asr_engine = StreamingASREngine()
+
+class FasterWhisperBackend(ASRBackend):
+    """Streaming faster-whisper sessions over the shared model cascade"""
+    
+    name = "faster-whisper"
+    streaming = True
+    
+    def __init__(self):
+        super().__init__()
+        self.cascade = ModelCascade(settings.asr_model_tiers, partial_model=settings.asr_partial_model)
+    
+    def load(self):
+        self.cascade.load()
+    
+    def is_ready(self) -> bool:
+        return self.cascade.is_ready()
+    
+    def warmup(self):
+        audio = warmup_audio()
+        for tier in self.cascade.tiers:
+            if tier.pool.is_ready():
+                tier.pool.warmup(audio)
+    
+    def supported_formats(self) -> list[str]:
+        return supported_formats()
+    
+    def _new_session(self, sid: str, on_text_callback, audio_format: str) -> StreamingASREngine:
+        return StreamingASREngine(
+            self.cascade,
+            session_id=sid,
+            on_text_callback=on_text_callback,
+            audio_format=audio_format
+        )
+    
+    def transcribe(self, audio, language: str = "en") -> str:
+        return self.cascade.best_tier().pool.transcribe_text(audio, language=language)
+    
+    def stats(self) -> dict:
+        """Cascade state and per-session scheduler state, including which sessions fall behind"""
+        return {
+            "cascade": self.cascade.stats(),
+            "sessions": {sid: engine.scheduler.stats() for sid, engine in self.sessions.items()},
+        }
+    
+    def shutdown(self):
+        super().shutdown()
+        for tier in self.cascade.tiers:
+            tier.pool.shutdown()
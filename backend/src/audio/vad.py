@@ -0,0 +1,171 @@
+"""
+Cheap server-side voice activity detection
+Frame energy + zero-crossing rate, vectorised over each incoming chunk, so
+silent audio never reaches Whisper
+"""
+import logging
+from dataclasses import dataclass
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VADResult:
+    is_speech: bool        # Chunk contains speech
+    utterance_ended: bool  # Speech -> silence transition completed in this chunk
+
+
+class EnergyVAD:
+    """Energy/ZCR speech detector with an adaptive noise floor and hangover"""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        margin_db: float = 10.0,       # Speech must exceed the noise floor by this much
+        min_energy_db: float = -55.0,  # Absolute floor; quieter frames are never speech
+        max_zcr: float = 0.35,         # Noise-like frames cross zero far more often than voiced speech
+        min_speech_ratio: float = 0.2, # Fraction of speech frames for a chunk to count as speech
+        hangover_s: float = 0.8,       # Silence needed after speech to end an utterance
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.max_zcr = max_zcr
+        self.min_speech_ratio = min_speech_ratio
+        self.hangover_s = hangover_s
+
+        self.noise_floor_db = min_energy_db
+        self.in_speech = False
+        self.silence_s = 0.0
+
+    def _frames(self, audio: np.ndarray) -> np.ndarray:
+        """View the chunk as (n_frames, frame_size); a trailing partial frame is ignored"""
+        n_frames = len(audio) // self.frame_size
+        return audio[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+
+    def speech_frames(self, audio: np.ndarray) -> np.ndarray:
+        """Boolean speech decision per frame"""
+        frames = self._frames(audio)
+        if not len(frames):
+            return np.zeros(0, dtype=bool)
+
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_size
+
+        threshold = max(self.noise_floor_db + self.margin_db, self.min_energy_db)
+        is_speech = (energy_db > threshold) & (zcr < self.max_zcr)
+
+        # Track the noise floor from the quietest frames: fall fast, rise slowly
+        level = float(np.percentile(energy_db, 10))
+        rate = 0.5 if level < self.noise_floor_db else 0.05
+        self.noise_floor_db += rate * (level - self.noise_floor_db)
+        return is_speech
+
+    def process(self, audio: np.ndarray) -> VADResult:
+        """Classify a chunk and update the utterance state"""
+        frames = self.speech_frames(audio)
+        is_speech = bool(len(frames)) and bool(np.mean(frames) >= self.min_speech_ratio)
+        duration = len(audio) / self.sample_rate
+
+        utterance_ended = False
+        if is_speech:
+            self.in_speech = True
+            self.silence_s = 0.0
+        elif self.in_speech:
+            self.silence_s += duration
+            if self.silence_s >= self.hangover_s:
+                self.in_speech = False
+                self.silence_s = 0.0
+                utterance_ended = True
+
+        return VADResult(is_speech=is_speech, utterance_ended=utterance_ended)
+
+    def reset(self):
+        self.noise_floor_db = self.min_energy_db
+        self.in_speech = False
+        self.silence_s = 0.0
+
+
+def _quietest_cut(audio: np.ndarray, start: int, max_chunk: int, search_frames: int, frame: int) -> int:
+    """Frame boundary with the least energy in the search_frames before start + max_chunk"""
+    limit = (start + max_chunk) // frame  # Last frame that still fits
+    lo = max(start // frame + 1, limit - search_frames)
+    if limit <= lo:
+        return limit * frame
+    frames = audio[lo * frame:limit * frame].reshape(limit - lo, frame)
+    return (lo + int(np.argmin(np.mean(frames * frames, axis=1)))) * frame
+
+
+def split_at_silence(audio: np.ndarray, sample_rate: int = 16000, max_chunk_s: float = 30.0,
+                     search_s: float = 5.0, frame_ms: int = 30) -> list[tuple[int, int]]:
+    """
+    Split long audio into chunks of at most max_chunk_s, cutting at the
+    quietest frame within the last search_s seconds before each limit
+    Returns:
+        (start_sample, end_sample) pairs covering the whole audio
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    max_chunk = int(max_chunk_s * sample_rate)
+    search_frames = max(1, int(search_s * sample_rate) // frame)
+    bounds = []
+    start = 0
+    while len(audio) - start > max_chunk:
+        cut = _quietest_cut(audio, start, max_chunk, search_frames, frame)
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(audio)))
+    return bounds
+
+
+class SilenceChunker:
+    """
+    split_at_silence over a stream: samples are pushed as they are decoded and
+    each chunk is cut off as soon as it is final, so at most one chunk is buffered
+    """
+
+    def __init__(self, sample_rate: int = 16000, max_chunk_s: float = 30.0,
+                 search_s: float = 5.0, frame_ms: int = 30):
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.max_chunk = int(max_chunk_s * sample_rate)
+        self.search_frames = max(1, int(search_s * sample_rate) // self.frame)
+        self._buffer = np.empty(self.max_chunk + sample_rate, dtype=np.float32)
+        self._length = 0
+        self.offset = 0  # Stream index of the first buffered sample
+
+    @property
+    def end(self) -> int:
+        """Samples pushed so far"""
+        return self.offset + self._length
+
+    def push(self, samples: np.ndarray) -> list[tuple[int, np.ndarray]]:
+        """
+        Buffer decoded samples (copied)
+        Returns:
+            (start_sample, samples) of every chunk that became final
+        """
+        chunks = []
+        pos = 0
+        while pos < len(samples):
+            n = min(len(samples) - pos, len(self._buffer) - self._length)
+            self._buffer[self._length:self._length + n] = samples[pos:pos + n]
+            self._length += n
+            pos += n
+            while self._length > self.max_chunk:
+                cut = _quietest_cut(self._buffer, 0, self.max_chunk, self.search_frames, self.frame)
+                chunks.append(self._take(cut))
+        return chunks
+
+    def flush(self) -> list[tuple[int, np.ndarray]]:
+        """The last chunk (end of stream), if any audio is left"""
+        return [self._take(self._length)] if self._length else []
+
+    def _take(self, n: int) -> tuple[int, np.ndarray]:
+        chunk = (self.offset, self._buffer[:n].copy())
+        self._buffer[:self._length - n] = self._buffer[n:self._length]
+        self._length -= n
+        self.offset += n
+        return chunk
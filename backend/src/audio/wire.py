@@ -0,0 +1,102 @@
+"""
+Audio wire formats for the audio_chunk event
+The client offers formats in the Socket.IO handshake; the server picks one
+and decodes each chunk to float32 samples for the ASR buffer
+"""
+import struct
+import logging
+import numpy as np
+from src.audio.ring_buffer import float32_from_bytes
+
+logger = logging.getLogger(__name__)
+
+try:
+    import opuslib
+    OPUS_AVAILABLE = True
+except Exception as e:  # Bindings not installed (ImportError) or system libopus missing
+    logger.info(f"Opus audio disabled: {e}")
+    opuslib = None
+    OPUS_AVAILABLE = False
+
+FORMAT_F32 = "f32"    # Raw little-endian float32 PCM (legacy default)
+FORMAT_S16 = "s16"    # Raw little-endian int16 PCM, half the bytes
+FORMAT_OPUS = "opus"  # Length-prefixed raw Opus packets (u16 LE length + packet)
+
+SAMPLE_RATE = 16000
+
+
+def supported_formats() -> list[str]:
+    """Formats this server can decode, best compression first"""
+    formats = [FORMAT_S16, FORMAT_F32]
+    if OPUS_AVAILABLE:
+        formats.insert(0, FORMAT_OPUS)
+    return formats
+
+
+def negotiate(offered, supported: list[str] | None = None) -> str:
+    """
+    Pick the first client-offered format the server supports
+    Clients that offer nothing get float32, which every client sends today.
+    Args:
+        offered: formats from the handshake, preferred first
+        supported: formats the ASR backend decodes (default: all available)
+    """
+    if not offered:
+        return FORMAT_F32
+    if isinstance(offered, str):
+        offered = [offered]
+    supported = supported or supported_formats()
+    for fmt in offered:
+        if fmt in supported:
+            return fmt
+    return FORMAT_F32
+
+
+class ChunkDecoder:
+    """Decodes one session's audio_chunk payloads to float32 samples"""
+
+    def __init__(self, audio_format: str = FORMAT_F32):
+        self.format = audio_format
+        self._scratch = np.empty(4096, dtype=np.float32)
+        self._opus = None
+        if audio_format == FORMAT_OPUS:
+            if not OPUS_AVAILABLE:
+                raise ValueError("Opus decoding requires opuslib")
+            self._opus = opuslib.Decoder(SAMPLE_RATE, 1)
+
+    def _buffer(self, n: int) -> np.ndarray:
+        """Reusable float32 output buffer; valid until the next decode"""
+        if n > len(self._scratch):
+            self._scratch = np.empty(n, dtype=np.float32)
+        return self._scratch[:n]
+
+    def _from_int16(self, pcm: np.ndarray) -> np.ndarray:
+        out = self._buffer(len(pcm))
+        np.multiply(pcm, 1 / 32768, out=out)
+        return out
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """
+        Decode a chunk payload
+        Returns:
+            float32 samples; a zero-copy view for f32, otherwise a scratch
+            buffer reused by the next call
+        """
+        if self.format == FORMAT_F32:
+            return float32_from_bytes(data)
+        if self.format == FORMAT_S16:
+            return self._from_int16(np.frombuffer(data, dtype=np.int16))
+        return self._decode_opus(data)
+
+    def _decode_opus(self, data: bytes) -> np.ndarray:
+        pcm = bytearray()
+        view = memoryview(data)
+        pos = 0
+        while pos + 2 <= len(view):
+            (length,) = struct.unpack_from("<H", view, pos)
+            pos += 2
+            packet = bytes(view[pos:pos + length])
+            pos += length
+            # 120ms is the longest Opus frame
+            pcm += self._opus.decode(packet, SAMPLE_RATE * 120 // 1000)
+        return self._from_int16(np.frombuffer(pcm, dtype=np.int16))
@@ -7,11 +7,114 @@ class Settings(BaseModel):
     debug: bool = False
     allowed_origins: list[str] = ["http://localhost:5173"]
     exa_api_key: str | None = os.getenv("EXA_API_KEY")
+    # Exa endpoint (point at exa_stub_server.py for local runs)
+    exa_base_url: str = os.getenv("EXA_BASE_URL", "https://api.exa.ai")
+    # Search deadline per call (covering retries), pooled connections, and the circuit
+    # breaker: opens after N failed or slow calls, retried after search_breaker_reset s
+    search_timeout: float = float(os.getenv("SEARCH_TIMEOUT", "3.0"))
+    search_retries: int = int(os.getenv("SEARCH_RETRIES", "2"))
+    search_pool_size: int = int(os.getenv("SEARCH_POOL_SIZE", "8"))
+    search_slow_call: float = float(os.getenv("SEARCH_SLOW_CALL", "2.0"))
+    search_breaker_failures: int = int(os.getenv("SEARCH_BREAKER_FAILURES", "3"))
+    search_breaker_reset: float = float(os.getenv("SEARCH_BREAKER_RESET", "30"))
     
     # Model settings
     # Upgraded to 3B for better translation quality
     asr_model: str = "distil-whisper/distil-large-v3"
     llm_model: str = "Qwen/Qwen2.5-3B-Instruct"  # Upgraded from 0.5B
+    
+    # ASR backends (see src/audio/backends.py), loaded only when first used:
+    # faster-whisper or realtimestt for live audio, whisper-local or faster-whisper for uploads
+    asr_backend: str = os.getenv("ASR_BACKEND", "faster-whisper")
+    transcribe_backend: str = os.getenv("TRANSCRIBE_BACKEND", "whisper-local")
+    
+    # Streaming ASR model tiers, best first. One model by default; list more
+    # (e.g. "large-v3,small,base") to enable the cascade: partial hypotheses on
+    # ASR_PARTIAL_MODEL and demotion to smaller tiers under load, each tier
+    # loading its own model
+    asr_model_tiers: list[str] = os.getenv("ASR_MODEL_TIERS", "large-v3").split(",")
+    asr_partial_model: str = os.getenv("ASR_PARTIAL_MODEL", "small")
+    
+    # Streaming ASR: Whisper workers shared by all sessions (per model tier)
+    asr_workers: int = int(os.getenv("ASR_WORKERS", "2"))
+    asr_queue_depth: int = int(os.getenv("ASR_QUEUE_DEPTH", "8"))
+    # Windows from concurrent sessions decoded together (1, the default, disables
+    # batching; try 4 with many concurrent sessions)
+    asr_batch_size: int = int(os.getenv("ASR_BATCH_SIZE", "1"))
+    asr_batch_wait_ms: int = int(os.getenv("ASR_BATCH_WAIT_MS", "30"))
+    # Target seconds from speech to committed transcript; passes adapt to hold it
+    asr_latency_slo: float = float(os.getenv("ASR_LATENCY_SLO", "3.0"))
+    
+    # Longest upload accepted by POST /api/transcribe (0 = no limit). Uploads are
+    # handed to the workers chunk by chunk while they decode, so memory doesn't
+    # grow with the length; this only bounds how long one job can keep them busy
+    transcribe_max_seconds: float = float(os.getenv("TRANSCRIBE_MAX_SECONDS", str(4 * 3600)))
+    # Uploads are split at silences into chunks of at most this length and
+    # transcribed in parallel by separate worker processes (whisper-local model below)
+    transcribe_model: str = os.getenv("TRANSCRIBE_MODEL", "base")
+    transcribe_workers: int = int(os.getenv("TRANSCRIBE_WORKERS", str(max(1, (os.cpu_count() or 2) // 4))))
+    transcribe_chunk_seconds: float = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "30"))
+    
+    # Components loaded and warmed up at startup, in this order
+    # (asr = ASR_BACKEND, llm = MLX model, transcribe = upload job workers,
+    # phrases = idiom phrase index). /ready waits for the required ones; live
+    # audio connections only wait for asr, so it must be listed for live audio.
+    startup_components: list[str] = os.getenv("STARTUP_COMPONENTS", "asr,llm,phrases").split(",")
+    
+    # LLM inference queue (jobs waiting for the MLX worker thread)
+    llm_queue_depth: int = int(os.getenv("LLM_QUEUE_DEPTH", "16"))
+    # Continuous batching: sequences decoded together, and admitted per prefill step
+    llm_max_batch: int = int(os.getenv("LLM_MAX_BATCH", "8"))
+    llm_prefill_batch: int = int(os.getenv("LLM_PREFILL_BATCH", "4"))
+    # Prefilled prompt-template prefixes kept per adapter (0 disables reuse)
+    llm_prefix_cache_entries: int = int(os.getenv("LLM_PREFIX_CACHE_ENTRIES", "8"))
+    # Prebuilt model artifact (src/agents/artifacts.py): LLM_FUSE_ADAPTER fused into
+    # llm_model and/or quantized to LLM_QUANTIZE_BITS (4 or 8; 0 keeps full precision).
+    # Built on first start if missing (or ahead of time with build_artifact.py).
+    # A fused adapter serves every request; per-request adapters are unavailable.
+    llm_fuse_adapter: str = os.getenv("LLM_FUSE_ADAPTER", "")
+    llm_quantize_bits: int = int(os.getenv("LLM_QUANTIZE_BITS", "0"))
+    llm_artifacts_dir: str = os.getenv("LLM_ARTIFACTS_DIR", "artifacts")
+    llm_build_artifacts: bool = os.getenv("LLM_BUILD_ARTIFACTS", "true").lower() in ("1", "true", "yes")
+    # Speculative decoding: the draft model proposes tokens that llm_model verifies,
+    # output unchanged ("" disables). With batching on, only a request decoding
+    # alone with at most llm_speculative_max_tokens is drafted.
+    llm_draft_model: str = os.getenv("LLM_DRAFT_MODEL", "Qwen/Qwen2.5-0.5B-Instruct")
+    llm_num_draft_tokens: int = int(os.getenv("LLM_NUM_DRAFT_TOKENS", "3"))
+    llm_speculative_max_tokens: int = int(os.getenv("LLM_SPECULATIVE_MAX_TOKENS", "64"))
+    # LoRA adapters (one directory each under adapters_dir) on the shared base model;
+    # "default" requests use llm_default_adapter, "base" uses no adapter
+    adapters_dir: str = os.getenv("ADAPTERS_DIR", "adapters")
+    llm_default_adapter: str = os.getenv("LLM_DEFAULT_ADAPTER", "translation_v2")
+    llm_max_resident_adapters: int = int(os.getenv("LLM_MAX_RESIDENT_ADAPTERS", "4"))
+    # Start the plain translation alongside cultural detection/search instead of
+    # after it; a context-aware translation follows when an insight has search context
+    pipeline_translation: bool = os.getenv("PIPELINE_TRANSLATION", "true").lower() in ("1", "true", "yes")
+    # Idiom/slang phrase index (src/agents/phrase_index.py) built from router.IDIOM_PHRASES,
+    # the idiom data and an optional lexicon (one phrase per line, "phrase<TAB>category").
+    # Prefilter before the LLM check: "hint" (matches are named in the LLM prompt, the
+    # LLM decides), "shortcut" (distinctive matches of 3+ words skip the LLM, others are
+    # hints), "gate" (the index alone decides, LLM never asked) or "off"
+    idiom_data_path: str = os.getenv("IDIOM_DATA", "comprehensive_idiom_data/categories.json")
+    phrase_lexicon: str = os.getenv("PHRASE_LEXICON", "")
+    phrase_index_cache: str = os.getenv("PHRASE_INDEX_CACHE", "cache/phrase_index.pkl")
+    phrase_prefilter: str = os.getenv("PHRASE_PREFILTER", "hint")
+    # Search results cached per normalized phrase: in memory (LRU) and in SQLite
+    # ("" keeps memory only); empty results are cached for search_negative_ttl seconds
+    search_cache_path: str = os.getenv("SEARCH_CACHE_PATH", "cache/search_cache.sqlite3")
+    search_cache_ttl: float = float(os.getenv("SEARCH_CACHE_TTL", str(7 * 86400)))
+    search_negative_ttl: float = float(os.getenv("SEARCH_NEGATIVE_TTL", "3600"))
+    search_cache_memory_entries: int = int(os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", "512"))
+    # Cultural-content detection: calibrated P(YES) from one forward pass
+    # (temperature/bias fit offline) and the probability that triggers a search
+    detect_temperature: float = float(os.getenv("DETECT_TEMPERATURE", "1.0"))
+    detect_bias: float = float(os.getenv("DETECT_BIAS", "0.0"))
+    detect_threshold: float = float(os.getenv("DETECT_THRESHOLD", "0.5"))
+    # LLM scheduling (translation > detection > explanation): batch slots kept free
+    # for translations, and per-class queue depth and longest deferral in seconds
+    llm_translation_reserved_slots: int = int(os.getenv("LLM_TRANSLATION_RESERVED_SLOTS", "2"))
+    llm_class_queue_depth: list[int] = [int(n) for n in os.getenv("LLM_CLASS_QUEUE_DEPTH", "32,16,8").split(",")]
+    llm_class_max_wait: list[float] = [float(n) for n in os.getenv("LLM_CLASS_MAX_WAIT", "10,5,20").split(",")]
 
 settings = Settings()
 
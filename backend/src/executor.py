@@ -0,0 +1,99 @@
+"""
+Inference execution layer
+Runs blocking model calls (Whisper, MLX) on dedicated worker threads so the
+asyncio event loop only does I/O
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when an executor already has `max_queue` jobs pending"""
+
+
+class InferenceCancelled(Exception):
+    """Raised inside a job whose caller went away"""
+
+
+class InferenceExecutor:
+    """
+    Bounded worker pool for one inference engine
+
+    Jobs are called as fn(cancel, *args, **kwargs) where `cancel` is a
+    threading.Event set when the awaiting coroutine is cancelled; long-running
+    jobs should check it between steps (tokens, segments) and bail out.
+    """
+
+    def __init__(self, name: str, max_workers: int = 1, max_queue: int = 8):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(self.max_workers, max_queue)
+        self.pending = 0  # Submitted jobs not yet finished (queued + running)
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=name
+        )
+
+    def _invoke(self, fn, cancel: threading.Event, args, kwargs):
+        if cancel.is_set():
+            raise InferenceCancelled(f"{self.name} job cancelled before start")
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(cancel, *args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run fn on a worker thread and await its result
+        Raises:
+            InferenceQueueFull: if the queue is at capacity
+        """
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            raise InferenceQueueFull(f"{self.name} queue full ({self.pending}/{self.max_queue})")
+
+        cancel = threading.Event()
+        self.pending += 1
+        future = self.executor.submit(self._invoke, fn, cancel, args, kwargs)
+        try:
+            result = await asyncio.wrap_future(future)
+            self.completed += 1
+            return result
+        except asyncio.CancelledError:
+            # Caller gave up: drop the job if queued, ask it to stop if running
+            cancel.set()
+            future.cancel()
+            self.cancelled += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Fire-and-forget job on the worker thread (e.g. model loading)"""
+        return self.executor.submit(self._invoke, fn, threading.Event(), args, kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "running": self.running,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
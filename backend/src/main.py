@@ -1,18 +1,71 @@
 import socketio
+import asyncio
 import warnings
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from src.config import settings, logger
 from pydantic import BaseModel
-import os
-import tempfile
 from contextlib import asynccontextmanager
 
 # Suppress resource tracker warnings (they're harmless)
 warnings.filterwarnings('ignore', category=UserWarning, module='multiprocessing.resource_tracker')
 
+def register_startup_components():
+    """Load order and warmup of the models named in settings.startup_components"""
+    from src.warmup import startup
+    
+    def asr_load():
+        from src.audio.backends import asr_backends
+        asr_backends.get(settings.asr_backend)
+    
+    def asr_warmup():
+        from src.audio.backends import asr_backends
+        asr_backends.get(settings.asr_backend).warmup()
+    
+    def llm_load():
+        from src.agents.lora import lora_manager
+        lora_manager.load()
+    
+    def llm_warmup():
+        from src.agents.lora import lora_manager
+        lora_manager.warmup()
+    
+    def phrases_load():
+        from src.agents.phrase_index import phrase_matcher
+        phrase_matcher.load()
+    
+    def transcribe_warmup():
+        from src.services.transcription_jobs import transcription_jobs
+        transcription_jobs.warmup()
+    
+    stages = {
+        "asr": lambda: startup.add("asr", asr_load, asr_warmup),
+        "llm": lambda: startup.add("llm", llm_load, llm_warmup),
+        # Worker processes load their own model; uploads work (slowly) without it
+        "transcribe": lambda: startup.add("transcribe", lambda: None, transcribe_warmup, required=False),
+        # Loaded on first use otherwise
+        "phrases": lambda: startup.add("phrases", phrases_load, required=False),
+    }
+    for name in settings.startup_components:
+        name = name.strip()
+        if name not in stages:
+            logger.warning(f"Unknown startup component: {name}")
+            continue
+        stages[name]()
+    return startup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load in the background so /health answers during startup;
+    # gate traffic on /ready
+    register_startup_components().start()
+    yield
+    from src.services.exa import exa_client
+    await exa_client.close()
+
 # Create FastAPI app
-app = FastAPI(title=settings.app_name)
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -57,24 +110,42 @@ async def test_text(input: TextInput):
         from src.services.translator import translation_service
         from src.services.insight import insight_generator
         
-        # STEP 1: Check for cultural content and search if needed
-        logger.info("Checking cultural insights...")
-        insight = await insight_generator.process(input.text)
-        
-        # STEP 2: Translate with or without cultural context
-        if insight and insight.search_context:
-            logger.info("Translating with search context...")
-            translation = await translation_service.translate(
-                input.text,
-                target_lang="zh-TW",
-                cultural_context=insight.search_context
+        initial_translation = None
+        if settings.pipeline_translation:
+            # Plain translation and cultural insight side by side, then a
+            # context-aware translation if search found context
+            logger.info("Translating and checking cultural insights...")
+            initial_translation, insight = await asyncio.gather(
+                translation_service.translate(input.text, target_lang="zh-TW"),
+                insight_generator.process(input.text)
             )
+            translation = initial_translation
+            if insight and insight.search_context:
+                logger.info("Refining translation with search context...")
+                translation = await translation_service.translate(
+                    input.text,
+                    target_lang="zh-TW",
+                    cultural_context=insight.search_context
+                )
         else:
-            logger.info("Translating without cultural context...")
-            translation = await translation_service.translate(
-                input.text,
-                target_lang="zh-TW"
-            )
+            # STEP 1: Check for cultural content and search if needed
+            logger.info("Checking cultural insights...")
+            insight = await insight_generator.process(input.text)
+            
+            # STEP 2: Translate with or without cultural context
+            if insight and insight.search_context:
+                logger.info("Translating with search context...")
+                translation = await translation_service.translate(
+                    input.text,
+                    target_lang="zh-TW",
+                    cultural_context=insight.search_context
+                )
+            else:
+                logger.info("Translating without cultural context...")
+                translation = await translation_service.translate(
+                    input.text,
+                    target_lang="zh-TW"
+                )
         
         logger.info(f"Translation: {translation}")
         
@@ -84,6 +155,8 @@ async def test_text(input: TextInput):
             "target_lang": "zh-TW",
             "translated_text": translation
         }
+        if initial_translation is not None and initial_translation != translation:
+            response["initial_translation"] = initial_translation  # Before cultural context
         
         # Add cultural insight if detected
         if insight:
@@ -104,95 +177,115 @@ async def test_text(input: TextInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/transcribe")
-async def transcribe_audio(file: UploadFile = File(...)):
-    """Upload audio file and transcribe with local OpenAI Whisper"""
+async def transcribe_audio(request: Request, sid: str | None = None):
+    """
+    Upload an audio file for transcription with local OpenAI Whisper
+    The file is cut into chunks at silences while it decodes, and the chunks are
+    transcribed in parallel as they come; progress is pushed over Socket.IO (to
+    `sid`, or every connected client) and the job can be polled at
+    GET /api/transcribe/{job_id}. Returns once the whole upload has been decoded.
+    """
     try:
-        logger.info(f"Received audio file: {file.filename}, type: {file.content_type}, size: {file.size if hasattr(file, 'size') else 'unknown'}")
+        content_type = request.headers.get("content-type", "")
+        logger.info(f"Receiving audio upload: type: {content_type}, size: {request.headers.get('content-length', 'unknown')}")
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
-            logger.info(f"Saved to temp file: {tmp_path}")
+        from src.audio.decode import decode_upload, AudioTooLong, AudioDecodeError
+        from src.services.transcription_jobs import transcription_jobs, DONE
+        from src.api.events import process_transcript
         
+        def recipients():
+            if sid:
+                return [sid]
+            return [client for client in sio.manager.rooms.get("/", {}).keys() if client]
+        
+        async def on_job_event(event: str, payload: dict):
+            for client in recipients():
+                await sio.emit(event, payload, room=client)
+            if event == "transcription_complete" and payload["status"] == DONE:
+                logger.info(f"Whisper transcript: {payload['transcript']}")
+                # Process transcript (translate + insights)
+                for client in recipients():
+                    await process_transcript(client, payload["transcript"], is_final=True)
+        
+        # Decode the body (multipart `file` field or raw audio) with ffmpeg as it
+        # streams in, handing each silence-cut chunk to the job as soon as it is
+        # final - nothing is buffered whole or written to disk
+        feed = transcription_jobs.open(language="en", listener=on_job_event)
         try:
-            # Transcribe with local Whisper
-            from src.services.whisper_local import whisper_local_service
-            from src.api.events import process_transcript
-            
-            logger.info("Starting Whisper transcription...")
-            transcript = whisper_local_service.transcribe(tmp_path, language="en")
-            logger.info(f"Whisper transcript: {transcript}")
-            
-            # Find connected clients
-            connected_clients = list(sio.manager.rooms.get("/", {}).keys())
-            logger.info(f"Connected clients: {connected_clients}")
-            
-            # Process transcript (translate + insights)
-            for sid in connected_clients:
-                if sid:  # Skip None
-                    await process_transcript(sid, transcript, is_final=True)
-            
-            return {
-                "status": "ok",
-                "transcript": transcript
-            }
-            
-        finally:
-            # Cleanup temp file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-                logger.info(f"Cleaned up temp file")
+            await decode_upload(
+                request.stream(),
+                content_type,
+                feed.write,
+                max_seconds=settings.transcribe_max_seconds
+            )
+            job = await feed.close()
+        except AudioTooLong as e:
+            feed.abort(str(e))
+            raise HTTPException(status_code=413, detail=str(e))
+        except AudioDecodeError as e:
+            feed.abort(str(e))
+            raise HTTPException(status_code=400, detail=str(e))
+        except BaseException as e:
+            feed.abort(str(e) or "Upload interrupted")
+            raise
+        logger.info(f"Decoded transcription job {job.id} ({job.duration:.1f}s)")
+        
+        return {
+            "status": job.status,
+            "job_id": job.id,
+            "duration": round(job.duration, 2)
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Transcription error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/transcribe/{job_id}")
+async def transcription_status(job_id: str):
+    """Poll a transcription job"""
+    from src.services.transcription_jobs import transcription_jobs
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
 @app.get("/health")
 async def health_check():
     from src.agents.lora import lora_manager
+    from src.agents.phrase_index import phrase_matcher
+    from src.services.exa import exa_client
+    from src.audio.backends import asr_backends
+    from src.warmup import startup
     return {
         "status": "ok",
+        "ready": startup.is_ready(),
         "model_loaded": lora_manager.is_model_ready(),
         "model_loading": lora_manager.is_loading,
         "model_path": lora_manager.model_path,
-        "model_error": lora_manager.load_error
+        "model_error": lora_manager.load_error,
+        "llm": lora_manager.stats(),
+        "phrases": phrase_matcher.stats(),
+        "search": exa_client.stats(),
+        "startup": startup.status(),
+        "asr_backends": asr_backends.stats()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once every required component is loaded and warm, else 503"""
+    from src.warmup import startup
+    status = startup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 # Socket.IO events are registered in events.py via register_socket_events()
 # Don't duplicate them here!
 
 if __name__ == "__main__":
-    import multiprocessing
-    import signal
+    # Serve through the launcher so worker processes don't re-import this module
+    import os
     import sys
-    import atexit
-    
-    multiprocessing.freeze_support()
-    
-    def cleanup_resources():
-        """Clean up resources on exit"""
-        logger.info("Cleaning up resources...")
-        try:
-            # Clean up ASR engine if it exists
-            from src.api.events import asr_engine
-            if asr_engine:
-                asr_engine.reset()
-        except Exception as e:
-            logger.warning(f"Error during cleanup: {e}")
-    
-    def signal_handler(sig, frame):
-        """Handle shutdown signals gracefully"""
-        logger.info("Received shutdown signal, cleaning up...")
-        cleanup_resources()
-        sys.exit(0)
-    
-    # Register cleanup handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    atexit.register(cleanup_resources)
-    
-    import uvicorn
-    uvicorn.run("src.main:socket_app", host="0.0.0.0", port=8000, reload=True)
+    os.execv(sys.executable, [sys.executable, "-m", "src", *sys.argv[1:]])
@@ -0,0 +1,74 @@
+"""
+Circuit breaker for remote calls
+After `failure_threshold` consecutive failures (errors or calls slower than
+`slow_call_s`) the circuit opens and calls are skipped for `reset_timeout`
+seconds; then one trial call is let through (half-open) and its outcome
+closes or re-opens the circuit
+"""
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff(attempt: int, base: float = 0.2, cap: float = 2.0) -> float:
+    """Full-jitter exponential backoff before retry `attempt` (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, slow_call_s: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_s = slow_call_s
+        self.state = CLOSED
+        self.failures = 0  # Consecutive
+        self.opened_at = 0.0
+        self._trial = False  # Half-open call in flight
+        # Metrics
+        self.skipped = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (counts skipped calls)"""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trial = False
+        if self.state == CLOSED or (self.state == HALF_OPEN and not self._trial):
+            self._trial = self.state == HALF_OPEN
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, ok: bool, elapsed: float = 0.0):
+        """Outcome of a call that allow() let through"""
+        if ok and self.slow_call_s is not None and elapsed > self.slow_call_s:
+            ok = False
+        if ok:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self.state = CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+                logger.warning(f"{self.name} circuit open for {self.reset_timeout:.0f}s after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "skipped": self.skipped,
+        }
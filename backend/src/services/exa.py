@@ -1,19 +1,54 @@
+import asyncio
 import logging
-from exa_py import Exa
+import time
+import aiohttp
 from src.config import settings
+from src.services.search_cache import SearchCache, cache_key
+from src.services.circuit import CircuitBreaker, backoff
 
 logger = logging.getLogger(__name__)
 
+# Worth another attempt: rate limited or a server-side failure
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class SearchUnavailable(Exception):
+    """Search failed in a way a later attempt may not (timeout, 5xx, connection)"""
+
+
 class ExaClient:
+    """
+    Non-blocking Exa search over one pooled aiohttp session
+    Each search_context call has a total deadline covering its retries, and a
+    circuit breaker skips searching while Exa keeps failing or answering slowly
+    """
+
     def __init__(self):
         self.api_key = settings.exa_api_key
-        self.client = Exa(self.api_key) if self.api_key else None
+        self.base_url = settings.exa_base_url.rstrip("/")
+        self.session: aiohttp.ClientSession | None = None
+        self.breaker = CircuitBreaker(
+            "exa",
+            failure_threshold=settings.search_breaker_failures,
+            reset_timeout=settings.search_breaker_reset,
+            slow_call_s=settings.search_slow_call
+        )
+        self.cache = SearchCache(
+            settings.search_cache_path or None,
+            ttl=settings.search_cache_ttl,
+            negative_ttl=settings.search_negative_ttl,
+            max_memory=settings.search_cache_memory_entries
+        )
         
-    async def search_context(self, query: str) -> list[dict]:
+    async def search_context(self, query: str, phrase: str = None) -> list[dict]:
         """
         Search for cultural context and returns a list of sources.
+        Args:
+            query: search query
+            phrase: expression the query is about; results are cached under
+                    it (normalized), so queries about the same phrase share them
         """
-        if not self.api_key or not self.client:
+        if not self.api_key:
             logger.warning("Exa API key not set. Returning mock results.")
             return [
                 {
@@ -28,22 +63,99 @@ class ExaClient:
                 }
             ]
 
+        key = cache_key(phrase or query)
+        # A blank phrase has nothing to share results with; don't cache it
+        cached = await asyncio.to_thread(self.cache.get, key) if key else None
+        if cached is not None:
+            logger.info(f"Search cache hit for '{key}' ({len(cached)} results)")
+            return cached
+
+        if not self.breaker.allow():
+            logger.warning(f"Exa circuit open, skipping search for '{key}'")
+            return []
+
+        start = time.monotonic()
+        ok = False
         try:
-            result = self.client.search(
-                query,
-                num_results=3
-            )
-            return [
+            result = await self._search(query, deadline=start + settings.search_timeout)
+            results = [
                 {
-                    "url": r.url,
-                    "title": r.title if hasattr(r, 'title') else "Source",
-                    "snippet": r.text[:200] if hasattr(r, 'text') else ""
+                    "url": r.get("url", ""),
+                    "title": r.get("title") or "Source",
+                    "snippet": (r.get("text") or "")[:200]
                 }
-                for r in result.results
+                for r in result.get("results", [])
             ]
+            ok = True
             
         except Exception as e:
             logger.error(f"Exa search failed: {e}")
-            return []
+            return []  # Failures aren't cached
+        finally:
+            self.breaker.record(ok, time.monotonic() - start)
+        
+        if not key:
+            return results
+        try:
+            await asyncio.to_thread(self.cache.put, key, results)
+        except Exception as e:
+            logger.warning(f"Could not cache search results for '{key}': {e}")
+        return results
+
+    def _session(self) -> aiohttp.ClientSession:
+        """Shared session; its connector keeps connections to Exa alive between searches"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                headers={"x-api-key": self.api_key, "content-type": "application/json"},
+                connector=aiohttp.TCPConnector(limit=settings.search_pool_size, keepalive_timeout=60),
+            )
+        return self.session
+
+    async def _search(self, query: str, deadline: float) -> dict:
+        """
+        POST /search, retrying transient failures with jittered backoff until the deadline
+        Raises:
+            SearchUnavailable: if no attempt succeeded in time
+        """
+        payload = {
+            "query": query,
+            "numResults": 3,
+            "contents": {"text": {"maxCharacters": 500}},
+        }
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SearchUnavailable(f"deadline exceeded after {attempt - 1} attempts")
+            try:
+                async with self._session().post(
+                    "/search", json=payload, timeout=aiohttp.ClientTimeout(total=remaining)
+                ) as response:
+                    if response.status in RETRY_STATUS:
+                        raise SearchUnavailable(f"HTTP {response.status}")
+                    response.raise_for_status()  # Other errors won't improve on retry
+                    return await response.json()
+            except (SearchUnavailable, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt > settings.search_retries:
+                    raise SearchUnavailable(f"{e or type(e).__name__} (attempt {attempt})") from e
+                delay = backoff(attempt)
+                if time.monotonic() + delay >= deadline:
+                    raise SearchUnavailable(f"{e or type(e).__name__}; no time left to retry") from e
+                logger.info(f"Exa search attempt {attempt} failed ({e or type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def stats(self) -> dict:
+        return {
+            "configured": bool(self.api_key),
+            "breaker": self.breaker.stats(),
+            "cache": self.cache.stats(),
+        }
 
 exa_client = ExaClient()
@@ -3,26 +3,22 @@ from uuid import uuid4
 from src.services.exa import exa_client
 from src.models.culture import CulturalInsight
 from src.agents.lora import lora_manager
+from src.agents.scheduler import DETECTION, EXPLANATION
+from src.agents.classifier import Calibration
+from src.agents.phrase_index import phrase_matcher
+from src.config import settings
 
 logger = logging.getLogger(__name__)
 
-class InsightGenerator:
-    """Generate cultural insights using Exa search and LLM explanation"""
-    
-    async def _should_search(self, text: str) -> bool:
-        """
-        Use LLM to determine if text contains cultural content requiring web search
-        """
-        try:
-            prompt = f"""Analyze if the following English text contains modern slang, idioms, cultural references, or internet terminology that would benefit from web search for cultural context.
-
-Text: "{text}"
+# Static detection instructions, placed before the text so their KV state is
+# cached once and reused (see LoRAManager prefix cache)
+DETECTION_PREFIX = """Analyze if the English text below contains modern slang, idioms, cultural references, or internet terminology that would benefit from web search for cultural context.
 
 Consider:
 1. Modern slang or internet language (e.g., "salty", "based", "sus", "ratio", "rage bait", "touch grass")
 2. Cultural idioms or expressions (e.g., "break a leg", "spill the tea", "no cap")
 3. Pop culture references or memes
-4. Regional expressions or colloquialisms  
+4. Regional expressions or colloquialisms
 5. Newly emerged terminology from social media
 6. Click-bait or provocative internet terminology (e.g., "rage bait", "trolling")
 
@@ -34,13 +30,47 @@ Examples that need search:
 
 Answer ONLY with "YES" if web search would help provide cultural context, or "NO" if it's standard language.
 
+"""
+
+# YES-probability calibration of the detection prompt (see src/agents/classifier.py)
+DETECTION_CALIBRATION = Calibration(
+    temperature=settings.detect_temperature,
+    bias=settings.detect_bias,
+    threshold=settings.detect_threshold
+)
+
+class InsightGenerator:
+    """Generate cultural insights using Exa search and LLM explanation"""
+    
+    async def _should_search(self, text: str, session: str = None, hints: list = None) -> bool:
+        """
+        Use LLM to determine if text contains cultural content requiring web search
+        Scores YES against NO from a single forward pass over the prompt.
+        Args:
+            hints: phrase index matches in text, named in the prompt
+        """
+        try:
+            prompt = DETECTION_PREFIX + f"""Text: "{text}"
+"""
+            if hints:
+                known = ", ".join(f'"{text[m.start:m.end]}" ({m.category})' for m in hints)
+                prompt += f"""Possible idioms/slang (may be meant literally): {known}
+"""
+            prompt += """
 Answer:"""
             
-            response = await lora_manager.generate(prompt, adapter="default", max_tokens=5)
-            decision = response.strip().upper()
+            result = await lora_manager.classify(
+                prompt, positive="YES", negative="NO", calibration=DETECTION_CALIBRATION,
+                adapter="base", prefix=DETECTION_PREFIX, priority=DETECTION, session=session
+            )
+            if result is None:
+                return False  # Model not loaded
             
-            should_search = "YES" in decision
-            logger.info(f"LLM detection for '{text}': {decision} -> search={should_search}")
+            should_search = result.decision
+            logger.info(
+                f"LLM detection for '{text}': p(YES)={result.probability:.2f} "
+                f"(label mass {result.label_mass:.2f}) -> search={should_search}"
+            )
             
             return should_search
             
@@ -48,22 +78,43 @@ Answer:"""
             logger.error(f"Error in LLM detection: {e}")
             return False  # Default to no search on error
     
-    async def process(self, text: str) -> CulturalInsight | None:
+    async def process(self, text: str, on_partial=None, session: str = None) -> CulturalInsight | None:
         """
         Process text and generate cultural insights with LLM explanation
+        Args:
+            text: Transcript text
+            on_partial: optional async callback(insight_id, explanation_so_far)
+                        called while the explanation decodes
+            session: client the LLM requests are scheduled for
         """
         try:
-            # Use LLM to decide if search is needed
-            if not await self._should_search(text):
+            # Phrase index matches are hints for the LLM check; only in "shortcut"
+            # mode do distinctive ones skip it, and in "gate" mode the index decides
+            mode = settings.phrase_prefilter
+            matches = phrase_matcher.find(text) if mode != "off" else []
+            if matches:
+                logger.info(f"Known phrases in '{text}': {[m.phrase for m in matches]}")
+            if mode == "gate":
+                detected = bool(matches)
+            elif mode == "shortcut" and any(m.distinctive for m in matches):
+                detected = True
+            else:
+                detected = await self._should_search(text, session, hints=matches)
+            if not detected:
                 logger.info(f"No cultural content detected in: '{text}'")
                 return None
             
-            logger.info(f"Cultural content detected, searching for '{text}'")
-            search_query = f"{text} meaning slang idiom cultural explanation"
+            # Search for the matched phrase itself when there is one
+            subject = text
+            if matches:
+                best = max(matches, key=lambda m: m.end - m.start)
+                subject = text[best.start:best.end]
+            logger.info(f"Cultural content detected, searching for '{subject}'")
+            search_query = f"{subject} meaning slang idiom cultural explanation"
             logger.info(f"Searching Exa with query: {search_query}")
             
             # Use search_context which is the actual method in exa.py
-            results = await exa_client.search_context(search_query)
+            results = await exa_client.search_context(search_query, phrase=subject)
             
             if not results or len(results) == 0:
                 logger.warning(f"No Exa results found for: {text}")
@@ -76,7 +127,13 @@ Answer:"""
             
             # Generate LLM explanation from search results
             # Use search results to generate Traditional Chinese explanation
-            explanation = await self._generate_explanation(text, results)
+            insight_id = str(uuid4())
+            explanation = await self._generate_explanation(
+                text,
+                results,
+                on_partial=(lambda so_far: on_partial(insight_id, so_far)) if on_partial else None,
+                session=session
+            )
             
             # Extract search context for translation (keep original English)
             search_context = "\n\n".join([
@@ -85,7 +142,7 @@ Answer:"""
             ])
             
             return CulturalInsight(
-                id=str(uuid4()),
+                id=insight_id,
                 source_text=text,
                 explanation=explanation,
                 context_type="slang",
@@ -105,9 +162,10 @@ Answer:"""
             logger.error(f"Error generating insight: {e}", exc_info=True)
             return None
     
-    async def _generate_explanation(self, text: str, search_results: list) -> str:
+    async def _generate_explanation(self, text: str, search_results: list, on_partial=None, session: str = None) -> str:
         """
         Use LLM to generate a clear Traditional Chinese explanation from search results
+        on_partial, if given, is awaited with the explanation so far as it decodes
         """
         try:
             # Build context from search results
@@ -126,14 +184,17 @@ Answer:"""
             
             logger.debug(f"Explanation prompt: {prompt}")
             
-            # Generate explanation using base model
-            explanation = await lora_manager.generate(
-                prompt, 
-                adapter="default",
-                max_tokens=150
-            )
+            # Generate explanation using base model, streaming it out as it decodes
+            explanation = ""
+            async for piece in lora_manager.stream(prompt, adapter="base", max_tokens=150,
+                                                   priority=EXPLANATION, session=session):
+                explanation += piece
+                if on_partial and explanation.strip():
+                    await on_partial(explanation.strip())
             
             explanation = explanation.strip()
+            if not explanation:
+                raise RuntimeError("Empty explanation (model not ready?)")
             logger.info(f"LLM explanation generated: {explanation[:100]}...")
             
             return explanation
@@ -0,0 +1,142 @@
+"""
+Search result cache
+Results are keyed by the normalized phrase being explained (stemmed words,
+see phrase_index.tokenize), so every sentence using the same expression
+shares them. An in-memory LRU sits in front of an SQLite table; entries
+expire after a TTL, and empty results are remembered for a shorter one.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from src.agents.phrase_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(phrase: str) -> str:
+    """
+    Normalized lookup key: "Spilled the Beans!" -> "spill the bean"
+    Phrases the English tokenizer can't fully read ("¡Órale!", "走着瞧", emoji)
+    are keyed by their casefolded text instead, so they don't collide.
+    """
+    key = " ".join(stem for stem, _, _ in tokenize(phrase))
+    if key and phrase.replace("’", "'").isascii():
+        return key
+    return " ".join(phrase.casefold().split())
+
+
+class SearchCache:
+    """Two-tier TTL cache of search results"""
+
+    def __init__(self, path: str = None, ttl: float = 7 * 86400, negative_ttl: float = 3600, max_memory: int = 512):
+        """
+        Args:
+            path: SQLite file (None keeps the memory tier only)
+            ttl: seconds results stay valid
+            negative_ttl: seconds an empty result stays valid
+            max_memory: entries in the LRU tier
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_memory = max_memory
+        self.memory: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, results TEXT NOT NULL, expires REAL NOT NULL, created REAL NOT NULL)"
+            )
+            purged = self.purge()
+            if purged:
+                logger.info(f"Dropped {purged} expired search results from {path}")
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _remember(self, key: str, expires: float, results: list[dict]):
+        with self._lock:
+            self.memory[key] = (expires, results)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_memory:
+                self.memory.popitem(last=False)
+
+    def get(self, key: str) -> list[dict] | None:
+        """
+        Cached results (blocking on the disk tier)
+        Returns:
+            None on a miss; an empty list is a cached empty result
+        """
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.memory[key]
+                entry = None
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+        if entry is None and self.db is not None:
+            with self._lock:
+                row = self.db.execute(
+                    "SELECT results, expires FROM results WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+            if row is not None:
+                entry = (row[1], json.loads(row[0]))
+                self._remember(key, *entry)
+                self.disk_hits += 1
+        if entry is None:
+            self.misses += 1
+            return None
+        if not entry[1]:
+            self.negative_hits += 1
+        return entry[1]
+
+    def put(self, key: str, results: list[dict]):
+        """Store results (blocking on the disk tier)"""
+        now = time.time()
+        expires = now + (self.ttl if results else self.negative_ttl)
+        self._remember(key, expires, results)
+        self.stores += 1
+        if self.db is not None:
+            with self._lock:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO results (key, results, expires, created) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(results, ensure_ascii=False), expires, now)
+                )
+
+    def purge(self) -> int:
+        """Delete expired rows from disk; returns how many"""
+        if self.db is None:
+            return 0
+        with self._lock:
+            return self.db.execute("DELETE FROM results WHERE expires <= ?", (time.time(),)).rowcount
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_entries": len(self.memory),
+            "disk": self.db is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
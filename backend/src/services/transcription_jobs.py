@@ -0,0 +1,279 @@
+"""
+Long-file transcription jobs
+Uploaded audio is cut at silence boundaries while it is still being decoded,
+and each chunk is transcribed on a process pool as soon as it is final;
+progress and the stitched partial transcript are reported as chunks finish.
+Only a few chunks per job are in flight at a time, so memory stays flat
+however long the recording is.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+import numpy as np
+from src.config import settings
+from src.audio.vad import SilenceChunker
+from src.services.transcription_worker import init_worker, transcribe_chunk
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Called with (event, payload) for transcription_progress / transcription_complete
+JobListener = Callable[[str, dict], Awaitable[None]]
+
+
+class TranscriptionFailed(Exception):
+    """The job failed; no more audio is accepted"""
+
+
+@dataclass
+class TranscriptionJob:
+    id: str
+    language: str = "en"
+    duration: float = 0.0  # Seconds of audio received so far
+    decoding: bool = True  # More audio (and chunks) may still arrive
+    status: str = QUEUED
+    chunks: list[str | None] = field(default_factory=list)
+    error: str | None = None
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+
+    @property
+    def completed(self) -> int:
+        return sum(text is not None for text in self.chunks)
+
+    def partial_transcript(self) -> str:
+        """Stitched text of the chunks finished so far, in order, up to the first gap"""
+        parts = []
+        for text in self.chunks:
+            if text is None:
+                break
+            if text:
+                parts.append(text)
+        return " ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "duration": round(self.duration, 2),
+            "decoding": self.decoding,
+            "completed": self.completed,
+            "total": len(self.chunks),
+            "transcript": self.partial_transcript(),
+            "error": self.error,
+        }
+
+
+class JobFeed:
+    """
+    Audio input of one job
+    Decoded samples are written as they arrive; every chunk the silence
+    chunker cuts off goes to the worker pool right away and is dropped once
+    transcribed. write() waits while max_pending chunks are in flight, which
+    holds back the decoder (and the upload) instead of buffering audio.
+    """
+
+    def __init__(self, manager: "TranscriptionJobManager", job: TranscriptionJob, listener: JobListener = None):
+        self.manager = manager
+        self.job = job
+        self.listener = listener
+        self.chunker = SilenceChunker(SAMPLE_RATE, max_chunk_s=manager.chunk_seconds)
+        self._slots = asyncio.Semaphore(manager.max_pending)
+        self._chunks: set[asyncio.Task] = set()
+        self._finisher: asyncio.Task | None = None
+        self._start = time.perf_counter()
+
+    async def write(self, samples: np.ndarray):
+        """
+        Add decoded 16 kHz mono float32 samples (copied)
+        Raises:
+            TranscriptionFailed: if the job has failed
+        """
+        for begin, chunk in self.chunker.push(samples):
+            await self._submit(begin, chunk)
+        self.job.duration = self.chunker.end / SAMPLE_RATE
+
+    async def close(self) -> TranscriptionJob:
+        """End of the audio: queue the last chunk and finish the job in the background"""
+        for begin, chunk in self.chunker.flush():
+            await self._submit(begin, chunk)
+        self.job.decoding = False
+        self.job.duration = self.chunker.end / SAMPLE_RATE
+        logger.info(f"Job {self.job.id}: {self.job.duration:.1f}s in {len(self.job.chunks)} chunks")
+        if self._finisher is None:
+            self._finisher = asyncio.create_task(self._finish())
+        return self.job
+
+    def abort(self, error: str):
+        """Fail the job (e.g. the upload broke off); queued chunks are cancelled"""
+        if self.job.status in (DONE, FAILED):
+            return
+        self.job.status = FAILED
+        self.job.error = error
+        self.job.decoding = False
+        logger.error(f"Job {self.job.id} failed: {error}")
+        current = asyncio.current_task()
+        for task in self._chunks:
+            if task is not current:
+                task.cancel()
+        if self._finisher is None:
+            self._finisher = asyncio.create_task(self._finish())
+
+    async def _submit(self, begin: int, chunk: np.ndarray):
+        await self._slots.acquire()  # Wait for an in-flight chunk to finish
+        if self.job.status == FAILED:
+            self._slots.release()
+            raise TranscriptionFailed(self.job.error)
+        self.job.status = RUNNING
+        index = len(self.job.chunks)
+        self.job.chunks.append(None)
+        task = asyncio.create_task(self._run_chunk(index, begin, chunk))
+        self._chunks.add(task)
+        task.add_done_callback(self._chunks.discard)
+
+    async def _run_chunk(self, index: int, begin: int, chunk: np.ndarray):
+        end = begin + len(chunk)
+        try:
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(self.manager._pool(), transcribe_chunk, chunk, self.job.language)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {self.job.id} chunk {index} failed: {e}", exc_info=True)
+            self.abort(str(e))
+            return
+        finally:
+            self._slots.release()
+            del chunk  # Nothing else refers to the samples now
+
+        self.job.chunks[index] = text
+        if self.listener:
+            await self.listener("transcription_progress", {
+                "job_id": self.job.id,
+                "chunk": index,
+                "start": round(begin / SAMPLE_RATE, 2),
+                "end": round(end / SAMPLE_RATE, 2),
+                "text": text,
+                "completed": self.job.completed,
+                "total": len(self.job.chunks),
+                "decoding": self.job.decoding,
+                "partial_transcript": self.job.partial_transcript(),
+            })
+
+    async def _finish(self):
+        try:
+            while self._chunks:
+                await asyncio.gather(*self._chunks, return_exceptions=True)
+            if self.job.status != FAILED:
+                self.job.status = DONE
+                elapsed = time.perf_counter() - self._start
+                logger.info(f"Job {self.job.id} finished in {elapsed:.1f}s "
+                            f"({self.job.duration / max(elapsed, 1e-6):.1f}x real time)")
+        finally:
+            self.job.finished = time.time()
+            self.manager._feeds.pop(self.job.id, None)
+
+        if self.listener:
+            await self.listener("transcription_complete", self.job.to_dict())
+
+
+class TranscriptionJobManager:
+    """Transcribes uploaded files chunk-parallel in worker processes, while they decode"""
+
+    def __init__(self, backend: str = "whisper-local", num_workers: int = 2,
+                 chunk_seconds: float = 30.0, max_pending: int | None = None, max_finished: int = 100):
+        self.backend = backend  # ASR backend loaded in each worker
+        self.num_workers = num_workers
+        self.chunk_seconds = chunk_seconds
+        # Chunks in flight per job: enough to keep every worker busy, and all
+        # the decoded audio a job holds
+        self.max_pending = max_pending or 2 * num_workers
+        self.max_finished = max_finished  # Finished jobs kept for polling
+        self.jobs: dict[str, TranscriptionJob] = {}
+        self._feeds: dict[str, JobFeed] = {}
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Started on first use; spawn keeps workers clear of MLX/Metal state.
+        # Workers re-run the server's main module, so start the server with
+        # `python -m src` (src/__main__.py), which doesn't import the app
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(self.backend,)
+            )
+            logger.info(f"Started {self.num_workers} transcription workers ({self.backend})")
+        return self._executor
+
+    def warmup(self):
+        """Start the worker processes and run one chunk on each (blocking)"""
+        from src.audio.backends import warmup_audio
+        pool = self._pool()
+        futures = [pool.submit(transcribe_chunk, warmup_audio(), "en") for _ in range(self.num_workers)]
+        for future in futures:
+            future.result()
+
+    def open(self, language: str = "en", listener: JobListener = None) -> JobFeed:
+        """
+        Start a job whose audio is written as it is decoded
+        Args:
+            language: Whisper language code
+            listener: async callback for progress and completion events
+        Returns:
+            The job's feed: write() samples, then close(); poll with get(feed.job.id)
+        """
+        job = TranscriptionJob(id=uuid.uuid4().hex, language=language)
+        self.jobs[job.id] = job
+        feed = JobFeed(self, job, listener)
+        self._feeds[job.id] = feed
+        self._prune()
+        return feed
+
+    def get(self, job_id: str) -> TranscriptionJob | None:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.finished is not None]
+        finished.sort(key=lambda job: job.finished)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job.id]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.num_workers,
+            "backend": self.backend,
+            "active": len(self._feeds),
+            "jobs": len(self.jobs),
+        }
+
+    def shutdown(self):
+        for feed in self._feeds.values():
+            for task in feed._chunks:
+                task.cancel()
+            if feed._finisher is not None:
+                feed._finisher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global job manager (worker processes start on the first job)
+transcription_jobs = TranscriptionJobManager(
+    backend=settings.transcribe_backend,
+    num_workers=settings.transcribe_workers,
+    chunk_seconds=settings.transcribe_chunk_seconds
+)
@@ -0,0 +1,20 @@
+"""
+Transcription job worker processes
+Entry points run by the spawned ProcessPoolExecutor workers. Workers import
+this module (and the ASR backend they load), never src.main, so they don't
+build the ASGI app or import the realtime models.
+"""
+import numpy as np
+
+# Per-process ASR backend, loaded by the pool initializer
+_worker_backend = None
+
+
+def init_worker(backend_name: str):
+    global _worker_backend
+    from src.audio.backends import asr_backends
+    _worker_backend = asr_backends.get(backend_name)
+
+
+def transcribe_chunk(samples: np.ndarray, language: str) -> str:
+    return _worker_backend.transcribe(samples, language=language)
@@ -5,85 +5,116 @@ from src.agents.lora import lora_manager
 
 logger = logging.getLogger(__name__)
 
+# Static instruction preambles; only what follows them varies per request
+TRANSLATION_PREFIX = """Translate the following English text to Traditional Chinese.
+Provide ONLY the Traditional Chinese translation.
+
+"""
+
+CONTEXT_TRANSLATION_PREFIX = """You are a professional translator specializing in English to Traditional Chinese translation with cultural awareness.
+
+Translate the English source text below to Traditional Chinese, based on the cultural context from web search. Consider:
+1. The cultural meaning and nuances explained in the context
+2. How this phrase is actually used in modern internet/cultural discourse
+3. The appropriate Traditional Chinese equivalent that captures both literal and cultural meaning
+
+Provide ONLY the Traditional Chinese translation, nothing else.
+
+Cultural context from web search:
+"""
+
 class TranslationService:
     def __init__(self):
         self.model_path = settings.llm_model
         logger.info(f"Initializing Translation Service with model: {self.model_path}")
         # Use the shared lora_manager instance
     
-    async def translate(self, text: str, target_lang: str = "es", cultural_context: str = None) -> str:
+    def _build_prompt(self, text: str, target_lang: str, cultural_context: str = None) -> tuple[str, str]:
+        """Returns (static template prefix, full prompt)"""
+        # Build a clear instruction prompt
+        # Use chat format for better instruction following
+        lang_map = {
+            "zh-TW": "Traditional Chinese (繁體中文)",
+            "zh": "Chinese",
+            "es": "Spanish",
+            "fr": "French",
+            "de": "German",
+            "ja": "Japanese",
+            "ko": "Korean"
+        }
+        target_language = lang_map.get(target_lang, target_lang)
+        
+        # Build prompt with cultural context if provided
+        # The instructions come first and end at a line break so their KV
+        # state can be cached and reused (see LoRAManager prefix cache)
+        if cultural_context:
+            # Use search results to inform translation
+            prefix = CONTEXT_TRANSLATION_PREFIX
+            prompt = prefix + f"""{cultural_context}
+
+Source text: "{text}"
+
+Translation:"""
+        else:
+            # Standard translation without cultural context
+            prefix = TRANSLATION_PREFIX
+            prompt = prefix + f"""Source: "{text}"
+
+Translation:"""
+        
+        return prefix, prompt
+    
+    async def translate_stream(self, text: str, target_lang: str = "es", cultural_context: str = None, session: str = None):
+        """
+        Stream the translation as it decodes
+        Yields the first line of the response so far; decoding is cancelled as
+        soon as that line is complete. Yields nothing if the model isn't ready.
+        """
+        if not lora_manager.is_model_ready():
+            logger.warning(f"模型未就緒! is_loading={lora_manager.is_loading}, error={lora_manager.load_error}")
+            return
+        
+        prefix, prompt = self._build_prompt(text, target_lang, cultural_context)
+        logger.debug(f"Prompt: {prompt}")
+        
+        response = ""
+        last = ""
+        stream = lora_manager.stream(prompt, adapter="default", max_tokens=50, prefix=prefix, session=session)
+        try:
+            async for piece in stream:
+                response += piece
+                # Leading whitespace/newlines aren't a line end yet
+                translation, newline, _ = response.lstrip().partition("\n")
+                translation = translation.strip()
+                if translation and translation != last:
+                    last = translation
+                    yield translation
+                if newline:
+                    break  # First line complete (model sometimes adds extra text)
+        finally:
+            await stream.aclose()
+    
+    async def translate(self, text: str, target_lang: str = "es", cultural_context: str = None, session: str = None) -> str:
         """
         Translate text to target language with optional cultural context.
         Args:
             text: Text to translate
             target_lang: Target language code
             cultural_context: Optional cultural explanation to improve translation
+            session: client the request is scheduled for
         """
         try:
             logger.info(f"Starting translation: '{text}' -> {target_lang}")
             if cultural_context:
                 logger.info(f"Using cultural context for translation")
             
-            # Check if model is ready
-            if not lora_manager.is_model_ready():
-                logger.warning(f"模型未就緒! is_loading={lora_manager.is_loading}, error={lora_manager.load_error}")
-                return text  # Return original if model not ready
-            
-            # Build a clear instruction prompt
-            # Use chat format for better instruction following
-            lang_map = {
-                "zh-TW": "Traditional Chinese (繁體中文)",
-                "zh": "Chinese",
-                "es": "Spanish",
-                "fr": "French",
-                "de": "German",
-                "ja": "Japanese",
-                "ko": "Korean"
-            }
-            target_language = lang_map.get(target_lang, target_lang)
-            
-            # Build prompt with cultural context if provided
-            if cultural_context:
-                # Use search results to inform translation
-                prompt = f"""You are a professional translator specializing in English to Traditional Chinese translation with cultural awareness.
-
-Source text: "{text}"
-
-Cultural context from web search:
-{cultural_context}
-
-Based on the above context, translate the English text to Traditional Chinese. Consider:
-1. The cultural meaning and nuances explained in the context
-2. How this phrase is actually used in modern internet/cultural discourse
-3. The appropriate Traditional Chinese equivalent that captures both literal and cultural meaning
-
-Provide ONLY the Traditional Chinese translation, nothing else.
-
-Translation:"""
-            else:
-                # Standard translation without cultural context
-                prompt = f"""Translate the following English text to Traditional Chinese.
-
-Source: "{text}"
-
-Provide ONLY the Traditional Chinese translation.
-
-Translation:"""
-            
-            logger.debug(f"Prompt: {prompt}")
-            
-            response = await lora_manager.generate(prompt, adapter="default", max_tokens=50)
-            logger.info(f"模型響應: {response}")
-            
-            # Clean up the response
-            translation = response.strip()
-            
-            # Extract the actual translation (sometimes model adds extra text)
-            lines = translation.split('\n')
-            translation = lines[0].strip()  # Take first line
+            translation = ""
+            async for translation in self.translate_stream(text, target_lang, cultural_context, session):
+                pass
+            logger.info(f"模型響應: {translation}")
             
-            if translation == "MOCKED_LLM_RESPONSE" or not translation:
-                logger.warning("收到 mock response 或空響應，返回原文")
+            if not translation:
+                logger.warning("收到空響應，返回原文")
                 return text
             
             logger.info(f"翻譯完成: '{text}' → '{translation}'")
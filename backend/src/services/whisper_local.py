@@ -1,5 +1,8 @@
 import whisper
 import logging
+import numpy as np
+from src.config import settings
+from src.audio.backends import ASRBackend, warmup_audio
 
 logger = logging.getLogger(__name__)
 
@@ -17,20 +20,24 @@ class WhisperLocalService:
         self.model = whisper.load_model(model_name)
         logger.info(f"Whisper {model_name} model loaded successfully")
     
-    def transcribe(self, audio_file_path: str, language: str = "en") -> str:
+    def transcribe(self, audio: str | np.ndarray, language: str = "en") -> str:
         """
-        Transcribe audio file using Whisper
+        Transcribe audio using Whisper
         Args:
-            audio_file_path: Path to audio file (supports webm, mp3, wav, etc.)
+            audio: Path to audio file (supports webm, mp3, wav, etc.) or
+                   16 kHz mono float32 samples already decoded in memory
             language: Language code (default: "en")
         Returns:
             Transcribed text
         """
         try:
-            logger.info(f"Transcribing audio file: {audio_file_path}")
+            if isinstance(audio, np.ndarray):
+                logger.info(f"Transcribing {len(audio) / 16000:.1f}s of decoded audio")
+            else:
+                logger.info(f"Transcribing audio file: {audio}")
             
             result = self.model.transcribe(
-                audio_file_path,
+                audio,
                 language=language,
                 fp16=False  # Use FP32 for CPU compatibility
             )
@@ -44,5 +51,29 @@ class WhisperLocalService:
             logger.error(f"Whisper transcription error: {e}", exc_info=True)
             raise
 
-# Initialize with base model (good balance of speed and accuracy)
-whisper_local_service = WhisperLocalService(model_name="base")
+
+class WhisperLocalBackend(ASRBackend):
+    """Whole-file transcription with OpenAI Whisper"""
+    
+    name = "whisper-local"
+    
+    def __init__(self, model_name: str = None):
+        super().__init__()
+        # base (74MB) by default: good balance of speed and accuracy
+        self.model_name = model_name or settings.transcribe_model
+        self.service = None
+    
+    def load(self):
+        self.service = WhisperLocalService(model_name=self.model_name)
+    
+    def is_ready(self) -> bool:
+        return self.service is not None
+    
+    def warmup(self):
+        self.service.transcribe(warmup_audio(), language="en")
+    
+    def transcribe(self, audio, language: str = "en") -> str:
+        return self.service.transcribe(audio, language=language)
+    
+    def stats(self) -> dict:
+        return {"model": self.model_name}
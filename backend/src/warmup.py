@@ -0,0 +1,109 @@
+"""
+Startup orchestration
+Loads each model component in a fixed order, runs a synthetic inference on
+it so the first real request doesn't pay for graph building and page-in,
+and records per-component state and timings for /health and /ready
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Component states
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+@dataclass
+class Component:
+    name: str
+    load: Callable[[], None]
+    warmup: Callable[[], None] | None = None
+    required: bool = True  # Gates readiness
+    state: str = PENDING
+    load_time: float | None = None
+    warmup_time: float | None = None
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_time": round(self.load_time, 2) if self.load_time is not None else None,
+            "warmup_time": round(self.warmup_time, 2) if self.warmup_time is not None else None,
+            "error": self.error,
+        }
+
+
+class StartupOrchestrator:
+    """Loads and warms components one after another, off the event loop"""
+
+    def __init__(self):
+        self.components: dict[str, Component] = {}
+        self.started: float | None = None
+        self.finished: float | None = None
+        self._task = None
+
+    def add(self, name: str, load: Callable[[], None], warmup: Callable[[], None] = None, required: bool = True):
+        """Register a component; components load in the order they are added"""
+        self.components[name] = Component(name, load, warmup, required)
+
+    def start(self):
+        """Begin loading in the background (call from the running event loop)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self):
+        self.started = time.time()
+        for component in self.components.values():
+            await self._bring_up(component)
+        self.finished = time.time()
+        logger.info(f"Startup finished in {self.finished - self.started:.1f}s, ready: {self.is_ready()}")
+
+    async def _bring_up(self, component: Component):
+        try:
+            component.state = LOADING
+            start = time.perf_counter()
+            await asyncio.to_thread(component.load)
+            component.load_time = time.perf_counter() - start
+            logger.info(f"{component.name} loaded in {component.load_time:.1f}s")
+
+            if component.warmup:
+                component.state = WARMING
+                start = time.perf_counter()
+                await asyncio.to_thread(component.warmup)
+                component.warmup_time = time.perf_counter() - start
+                logger.info(f"{component.name} warmed up in {component.warmup_time:.1f}s")
+
+            component.state = READY
+        except Exception as e:
+            # Later components still load; readiness reports the failure
+            component.state = FAILED
+            component.error = str(e)
+            logger.error(f"{component.name} failed to start: {e}", exc_info=True)
+
+    def is_ready(self) -> bool:
+        return all(c.state == READY for c in self.components.values() if c.required)
+
+    def component_ready(self, name: str) -> bool:
+        """Whether one component is loaded and warm (False if it isn't registered)"""
+        component = self.components.get(name)
+        return component is not None and component.state == READY
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "elapsed": round((self.finished or time.time()) - self.started, 2) if self.started else None,
+            "components": {name: c.to_dict() for name, c in self.components.items()},
+        }
+
+
+# Global orchestrator; src.main registers the components
+startup = StartupOrchestrator()
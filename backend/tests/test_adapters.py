@@ -0,0 +1,55 @@
+import json
+import pytest
+
+pytest.importorskip("mlx_lm")
+
+from src.agents.adapters import AdapterRegistry, BASE, DEFAULT
+
+
+@pytest.fixture
+def adapters_dir(tmp_path):
+    for name in ["translation_v2", "slang"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "adapter_config.json").write_text(json.dumps({"fine_tune_type": "lora"}))
+    (tmp_path / "notes").mkdir()  # No adapter_config.json
+    return tmp_path
+
+
+def test_scan_finds_adapter_directories(adapters_dir):
+    registry = AdapterRegistry(str(adapters_dir))
+    assert sorted(registry.paths) == ["slang", "translation_v2"]
+    assert AdapterRegistry(str(adapters_dir / "missing")).paths == {}
+
+
+def test_everything_resolves_to_base_until_lora_layers_are_applied(adapters_dir):
+    registry = AdapterRegistry(str(adapters_dir), default="translation_v2")
+    for name in [None, DEFAULT, "slang", "unknown"]:
+        assert registry.resolve(name) == BASE
+
+
+def test_resolve_default_and_named_adapters(adapters_dir):
+    registry = AdapterRegistry(str(adapters_dir), default="translation_v2")
+    registry.enabled = True
+    assert registry.resolve(None) == "translation_v2"
+    assert registry.resolve(DEFAULT) == "translation_v2"
+    assert registry.resolve("slang") == "slang"
+    assert registry.resolve(BASE) == BASE
+    with pytest.raises(ValueError, match="Unknown adapter 'nope'"):
+        registry.resolve("nope")
+
+
+def test_default_is_base_when_not_configured(adapters_dir):
+    registry = AdapterRegistry(str(adapters_dir))
+    registry.enabled = True
+    assert registry.resolve(DEFAULT) == BASE
+
+
+def test_resident_adapters_are_an_lru(adapters_dir, monkeypatch):
+    registry = AdapterRegistry(str(adapters_dir), max_resident=1)
+    registry.register("extra", str(adapters_dir / "slang"))
+    monkeypatch.setattr(registry, "_load", lambda name: ({}, 1.0))
+    registry._resident("slang")
+    registry._resident("slang")
+    registry._resident("extra")
+    assert list(registry.resident) == ["extra"]
+    assert registry.evictions == 1
@@ -0,0 +1,44 @@
+from src.audio.adaptive import AdaptiveScheduler, QUALITY_LADDER
+
+
+def test_starts_at_default_level():
+    scheduler = AdaptiveScheduler()
+    assert scheduler.level == 1
+    assert scheduler.settings == QUALITY_LADDER[1]
+
+
+def test_degrades_after_two_overloaded_passes():
+    scheduler = AdaptiveScheduler(latency_slo=3.0)
+    scheduler.record(audio_seconds=5.0, elapsed=2.0)
+    assert scheduler.level == 1  # One slow pass is not enough
+    scheduler.record(audio_seconds=5.0, elapsed=2.0)
+    assert scheduler.level == 2
+
+
+def test_upgrades_only_after_five_fast_passes():
+    scheduler = AdaptiveScheduler(latency_slo=10.0)
+    for _ in range(4):
+        scheduler.record(audio_seconds=5.0, elapsed=0.1)
+    assert scheduler.level == 1
+    scheduler.record(audio_seconds=5.0, elapsed=0.1)
+    assert scheduler.level == 0
+
+
+def test_bottom_of_ladder_reports_falling_behind_until_caught_up():
+    scheduler = AdaptiveScheduler(latency_slo=1.0)
+    scheduler.level = len(QUALITY_LADDER) - 1
+    scheduler.record(audio_seconds=5.0, elapsed=5.0)
+    scheduler.record(audio_seconds=5.0, elapsed=5.0)
+    assert scheduler.level == len(QUALITY_LADDER) - 1
+    assert scheduler.falling_behind
+
+    scheduler.latency_slo = 100.0
+    scheduler.alpha = 1.0
+    scheduler.record(audio_seconds=5.0, elapsed=0.1)
+    assert not scheduler.falling_behind
+
+
+def test_ignores_empty_passes():
+    scheduler = AdaptiveScheduler()
+    scheduler.record(audio_seconds=0.0, elapsed=1.0)
+    assert scheduler.passes == 0
@@ -0,0 +1,54 @@
+import pytest
+from src.audio.backends import ASRBackend, ASRBackendRegistry, SessionLimitReached
+
+
+class FakeSession:
+    def __init__(self, sid):
+        self.sid = sid
+        self.was_reset = False
+
+    def reset(self):
+        self.was_reset = True
+
+
+class SingleStreamBackend(ASRBackend):
+    name = "single"
+    streaming = True
+    max_sessions = 1
+
+    def _new_session(self, sid, on_text_callback, audio_format):
+        return FakeSession(sid)
+
+
+def test_second_live_client_is_refused():
+    backend = SingleStreamBackend()
+    backend.create_session("a")
+    with pytest.raises(SessionLimitReached):
+        backend.create_session("b")
+    assert list(backend.sessions) == ["a"]
+
+
+def test_reconnecting_client_replaces_its_own_session():
+    backend = SingleStreamBackend()
+    first = backend.create_session("a")
+    second = backend.create_session("a")
+    assert first.was_reset and backend.get_session("a") is second
+
+
+def test_slot_frees_when_the_client_leaves():
+    backend = SingleStreamBackend()
+    first = backend.create_session("a")
+    backend.remove_session("a")
+    assert first.was_reset
+    assert backend.create_session("b").sid == "b"
+
+
+def test_registry_loads_on_first_use_only():
+    registry = ASRBackendRegistry()
+    registry.register("single", f"{__name__}:SingleStreamBackend")
+    assert registry.peek("single") is None
+    backend = registry.get("single")
+    assert registry.get("single") is backend and registry.peek("single") is backend
+    assert registry.stats()["single"]["loaded"]
+    with pytest.raises(KeyError):
+        registry.get("missing")
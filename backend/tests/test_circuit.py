@@ -0,0 +1,65 @@
+import pytest
+from src.services.circuit import CircuitBreaker, CLOSED, OPEN, HALF_OPEN, backoff
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.services.circuit.time.monotonic", lambda: now[0])
+    return now
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10)
+    fail(breaker, 2)
+    breaker.allow()
+    breaker.record(True)  # A success resets the count
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["skipped"] == 1
+    assert breaker.trips == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+    fail(breaker, 1)
+    clock[0] += 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Trial still in flight
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=10)
+    fail(breaker, 5)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    clock[0] += 5
+    assert not breaker.allow()
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, slow_call_s=1.0)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(True, elapsed=1.5)
+    assert breaker.state == OPEN
+
+
+def test_backoff_is_capped():
+    for attempt in range(1, 10):
+        assert 0 <= backoff(attempt, base=0.2, cap=2.0) <= min(2.0, 0.2 * 2 ** (attempt - 1))
@@ -0,0 +1,60 @@
+import math
+import pytest
+
+mx = pytest.importorskip("mlx.core")
+
+from src.agents.classifier import Calibration, label_logprobs, label_token_ids, score
+
+
+def test_uncalibrated_probability_is_the_logistic_of_the_log_odds():
+    calibration = Calibration()
+    assert calibration.probability(0.0) == 0.5
+    assert calibration.probability(2.0) == pytest.approx(1 / (1 + math.exp(-2)))
+    assert calibration.probability(-2.0) == pytest.approx(1 - calibration.probability(2.0))
+
+
+def test_temperature_and_bias_shift_the_curve():
+    assert Calibration(temperature=2.0).probability(2.0) == pytest.approx(1 / (1 + math.exp(-1)))
+    assert Calibration(bias=-1.0).probability(1.0) == 0.5
+
+
+def test_extreme_log_odds_do_not_overflow():
+    calibration = Calibration()
+    assert calibration.probability(1000.0) == 1.0
+    assert calibration.probability(-1000.0) == 0.0
+
+
+def test_score_decides_against_the_threshold():
+    yes = score([math.log(0.6), math.log(0.3)], Calibration(threshold=0.5))
+    assert yes.decision and yes.probability == pytest.approx(2 / 3)
+    assert yes.log_odds == pytest.approx(math.log(2))
+    assert yes.label_mass == pytest.approx(0.9)
+
+    assert not score([math.log(0.6), math.log(0.3)], Calibration(threshold=0.7)).decision
+
+
+class PairTokenizer:
+    """One token per two characters"""
+
+    def __init__(self):
+        self.vocab = {}
+
+    def encode(self, text, add_special_tokens=True):
+        return [self.vocab.setdefault(text[i:i + 2], len(self.vocab)) for i in range(0, len(text), 2)]
+
+
+def test_label_variants_pool_their_first_tokens():
+    tokenizer = PairTokenizer()
+    ids = label_token_ids(tokenizer, "YES")
+    expected = {tokenizer.encode(text)[0] for text in ["YES", " YES", "yes", " yes", "Yes", " Yes"]}
+    assert ids == sorted(expected)
+
+
+def test_label_logprobs_pool_variant_probabilities():
+    class FixedLogits:
+        def __call__(self, tokens, cache=None):
+            return mx.log(mx.array([[[0.5, 0.2, 0.2, 0.1]]]))
+
+    positive, negative = label_logprobs(FixedLogits(), [1, 2, 3], None, [[0, 1], [3]])
+    assert math.exp(positive) == pytest.approx(0.7, rel=1e-5)
+    assert math.exp(negative) == pytest.approx(0.1, rel=1e-5)
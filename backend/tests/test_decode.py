@@ -0,0 +1,143 @@
+import asyncio
+import io
+import shutil
+import wave
+import numpy as np
+import pytest
+from src.audio.decode import decode_upload, AudioDecodeError, AudioTooLong
+from src.audio.vad import SilenceChunker, split_at_silence
+
+RATE = 16000
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def wav_bytes(samples: np.ndarray, rate: int = RATE) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+    return out.getvalue()
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+async def body(data: bytes, size: int = 8192):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def decode(data: bytes, content_type: str = "audio/wav", sink=None, **kwargs):
+    blocks = []
+
+    async def collect(samples):
+        blocks.append(samples.copy())
+
+    decoded = asyncio.run(decode_upload(body(data), content_type, sink or collect, **kwargs))
+    return decoded, np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+@needs_ffmpeg
+def test_raw_body_is_decoded_block_by_block():
+    audio = tone(3)
+    decoded, samples = decode(wav_bytes(audio))
+    assert decoded == len(samples) == len(audio)
+    np.testing.assert_allclose(samples, audio, atol=1e-3)
+
+
+@needs_ffmpeg
+def test_multipart_file_field_is_decoded():
+    boundary = "XyZ"
+    data = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.wav\"\r\n"
+        f"Content-Type: audio/wav\r\n\r\n"
+    ).encode() + wav_bytes(tone(1)) + f"\r\n--{boundary}--\r\n".encode()
+    decoded, _ = decode(data, f"multipart/form-data; boundary={boundary}")
+    assert decoded == RATE
+
+
+@needs_ffmpeg
+def test_audio_past_the_limit_is_rejected():
+    with pytest.raises(AudioTooLong):
+        decode(wav_bytes(tone(3)), max_seconds=1)
+
+
+@needs_ffmpeg
+def test_undecodable_body():
+    with pytest.raises(AudioDecodeError):
+        decode(b"not audio at all" * 100)
+
+
+@needs_ffmpeg
+def test_sink_errors_stop_the_decode():
+    class Full(Exception):
+        pass
+
+    async def failing(samples):
+        raise Full("job failed")
+
+    with pytest.raises(Full):
+        decode(wav_bytes(tone(3)), sink=failing)
+
+
+@needs_ffmpeg
+def test_busy_sink_stops_reading_the_upload():
+    data = wav_bytes(tone(600))
+    pulled = [0]
+    release = asyncio.Event()
+
+    async def stream():
+        for i in range(0, len(data), 8192):
+            pulled[0] += 8192
+            yield data[i:i + 8192]
+
+    async def blocked(samples):
+        await release.wait()
+
+    async def scenario():
+        task = asyncio.create_task(decode_upload(stream(), "audio/wav", blocked))
+        await asyncio.sleep(0.5)
+        held = pulled[0]
+        release.set()
+        return held, await task
+
+    held, decoded = asyncio.run(scenario())
+    assert held < len(data) // 10  # Only pipe buffers' worth was read ahead
+    assert decoded == 600 * RATE
+
+
+def test_multipart_without_boundary():
+    with pytest.raises(AudioDecodeError):
+        decode(b"", "multipart/form-data")
+
+
+def test_chunker_matches_split_at_silence():
+    rng = np.random.default_rng(0)
+    audio = np.concatenate([tone(26), np.zeros(RATE, dtype=np.float32), tone(50), tone(17) * 0.01, tone(9)])
+    chunker = SilenceChunker(max_chunk_s=30)
+    chunks = []
+    pos = 0
+    while pos < len(audio):
+        size = int(rng.integers(1, 20000))
+        chunks += chunker.push(audio[pos:pos + size])
+        pos += size
+    chunks += chunker.flush()
+
+    assert [(start, start + len(c)) for start, c in chunks] == split_at_silence(audio, max_chunk_s=30)
+    for start, chunk in chunks:
+        np.testing.assert_array_equal(chunk, audio[start:start + len(chunk)])
+    assert chunker.end == len(audio)
+
+
+def test_chunker_buffers_at_most_one_chunk():
+    chunker = SilenceChunker(max_chunk_s=30)
+    for _ in range(100):
+        chunker.push(tone(10))
+        assert chunker.end - chunker.offset <= 30 * RATE
+    assert chunker.flush() and chunker.flush() == []
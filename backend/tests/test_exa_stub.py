@@ -0,0 +1,99 @@
+"""ExaClient against exa_stub_server on a local port"""
+import asyncio
+import random
+import time
+import aiohttp
+import pytest
+from aiohttp import web
+from exa_stub_server import make_app
+from src.config import settings
+
+
+async def start_stub(**behaviour):
+    options = {"delay": 0.0, "jitter": 0.0, "fail_rate": 0.0, "empty_rate": 0.0, **behaviour}
+    runner = web.AppRunner(make_app(**options))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def stub_stats(url: str) -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/stats") as response:
+            return await response.json()
+
+
+@pytest.fixture
+def configure(monkeypatch):
+    """Point a fresh ExaClient at the stub (memory-only cache)"""
+    monkeypatch.setattr(settings, "exa_api_key", "stub")
+    monkeypatch.setattr(settings, "search_cache_path", "")
+
+    def client(url: str, **overrides):
+        monkeypatch.setenv("EXA_BASE_URL", url)
+        monkeypatch.setattr(settings, "exa_base_url", url)
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        from src.services.exa import ExaClient
+        return ExaClient()
+
+    return client
+
+
+def test_503_is_retried_within_the_deadline(configure, monkeypatch):
+    draws = [0.0]  # The stub's first draw fails a request, later ones pass
+    monkeypatch.setattr(random, "random", lambda: draws.pop() if draws else 0.99)
+
+    async def scenario():
+        runner, url = await start_stub(fail_rate=0.5)
+        exa = configure(url, search_timeout=3.0, search_retries=5)
+        try:
+            start = time.monotonic()
+            results = await exa.search_context("what does break a leg mean", phrase="break a leg")
+            elapsed = time.monotonic() - start
+            stats = await stub_stats(url)
+        finally:
+            await exa.close()
+            await runner.cleanup()
+        assert len(results) == 3
+        assert stats == {"requests": 2, "failed": 1}
+        assert elapsed < settings.search_timeout
+        assert exa.breaker.state == "closed"
+    asyncio.run(scenario())
+
+
+def test_slow_stub_trips_the_breaker(configure):
+    async def scenario():
+        runner, url = await start_stub(delay=0.2)
+        exa = configure(url, search_slow_call=0.1, search_breaker_failures=2, search_breaker_reset=60.0)
+        try:
+            for phrase in ["no cap", "spill the beans"]:
+                assert await exa.search_context(f"meaning of {phrase}", phrase=phrase)
+            assert exa.breaker.state == "open"
+            assert await exa.search_context("meaning of rizz", phrase="rizz") == []
+            stats = await stub_stats(url)
+        finally:
+            await exa.close()
+            await runner.cleanup()
+        assert stats["requests"] == 2  # The third search never went out
+        assert exa.breaker.skipped == 1
+    asyncio.run(scenario())
+
+
+def test_repeated_phrase_is_served_from_cache(configure):
+    async def scenario():
+        runner, url = await start_stub()
+        exa = configure(url)
+        try:
+            first = await exa.search_context("what does spill the beans mean", phrase="spill the beans")
+            second = await exa.search_context("origin of spilled the beans", phrase="Spilled the beans")
+            stats = await stub_stats(url)
+        finally:
+            await exa.close()
+            await runner.cleanup()
+        assert second == first
+        assert stats["requests"] == 1
+        assert exa.cache.memory_hits == 1
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+from src.audio.hypothesis import HypothesisBuffer
+
+
+def words(*items):
+    return [(start, start + 0.4, text) for start, text in items]
+
+
+def test_commits_prefix_two_passes_agree_on():
+    buffer = HypothesisBuffer()
+    buffer.insert(words((0.0, " Hello"), (0.5, " world")), offset=0.0)
+    assert buffer.flush() == []  # Nothing to agree with yet
+
+    buffer.insert(words((0.0, " hello,"), (0.5, " word"), (1.0, " again")), offset=0.0)
+    committed = buffer.flush()
+    assert [w[2] for w in committed] == [" hello,"]  # Case and punctuation ignored
+    assert buffer.last_committed_time == 0.4
+    assert [w[2] for w in buffer.unconfirmed()] == [" word", " again"]
+
+
+def test_insert_shifts_by_offset_and_drops_repeated_committed_words():
+    buffer = HypothesisBuffer()
+    for _ in range(2):
+        buffer.insert(words((0.0, " one"), (0.5, " two")), offset=10.0)
+        buffer.flush()
+    assert [w[2] for w in buffer.committed] == [" one", " two"]
+
+    # The next window starts at the commit point and repeats "two"
+    buffer.insert([(0.0, 0.3, " two"), (0.4, 0.8, " three")], offset=10.6)
+    assert buffer.current == [(11.0, 11.4, " three")]
+
+
+def test_force_commit_and_commit_until():
+    buffer = HypothesisBuffer()
+    buffer.insert(words((0.0, " a"), (1.0, " b"), (2.0, " c")), offset=0.0)
+    assert [w[2] for w in buffer.commit_until(1.5)] == [" a", " b"]
+    assert buffer.unconfirmed() == []
+
+    buffer.insert(words((3.0, " d")), offset=0.0)
+    buffer.flush()
+    assert [w[2] for w in buffer.force_commit()] == [" d"]
+    assert buffer.prompt() == "a b d"
+
+
+def test_prompt_keeps_most_recent_text_within_limit():
+    buffer = HypothesisBuffer()
+    buffer.insert(words(*[(i, f" word{i}") for i in range(10)]), offset=0.0)
+    buffer.force_commit()
+    assert buffer.prompt(max_chars=14) == "word8 word9"
@@ -0,0 +1,88 @@
+import json
+import pytest
+from src.agents.phrase_index import PhraseIndex, _stem, load_index
+
+PHRASES = [
+    ("spill the beans", "idiom"),
+    ("raining cats and dogs", "idiom"),
+    ("break a leg", "idiom"),
+    ("knock 'em dead", "idiom"),
+    ("no cap", "slang"),
+    ("mid", "slang"),
+    ("capping", "slang"),
+    ("salty", "slang"),
+    ("You can do it", "blessing"),
+    ("Good luck!", "blessing"),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PhraseIndex(PHRASES)
+
+
+def found(index, text):
+    return [(m.phrase, text[m.start:m.end]) for m in index.find(text)]
+
+
+def test_inflected_multi_word_phrases_match(index):
+    assert found(index, "He spilled the beans yesterday") == [("spill the beans", "spilled the beans")]
+    assert found(index, "It was raining cats and dogs.") == [("raining cats and dogs", "raining cats and dogs")]
+    assert found(index, "Knock them dead!") == [("knock 'em dead", "Knock them dead")]
+
+
+def test_whole_words_only(index):
+    assert found(index, "Midnight snacks") == []
+    assert found(index, "The beansprout spill") == []
+
+
+def test_single_word_entries_match_exact_word_only(index):
+    assert found(index, "Stop capping") == [("capping", "capping")]
+    assert found(index, "Put the cap back on the bottle") == []
+
+
+@pytest.mark.parametrize("text", [
+    "We met in mid July",
+    "The soup is too salty",
+    "I think you can do it tomorrow",
+    "Thanks, good luck with the exam",
+])
+def test_everyday_sentences_only_give_non_distinctive_hints(index, text):
+    matches = index.find(text)
+    assert matches  # Still reported, as a hint for the LLM check
+    assert not any(m.distinctive for m in matches)
+
+
+def test_distinctive_phrases(index):
+    assert all(m.distinctive for m in index.find("Break a leg, and spill the beans"))
+    assert not any(m.distinctive for m in index.find("no cap"))
+
+
+def test_overlapping_phrases_all_reported():
+    index = PhraseIndex([("under the weather", "idiom"), ("feeling under the weather", "idiom")])
+    assert [m.phrase for m in index.find("I'm feeling under the weather")] == [
+        "feeling under the weather", "under the weather"
+    ]
+
+
+@pytest.mark.parametrize("word, stem", [
+    ("speed", "speed"), ("speeding", "speed"), ("spilled", "spill"), ("running", "run"),
+    ("beans", "bean"), ("string", "string"), ("cities", "city"), ("boxes", "box"), ("glass", "glass"),
+])
+def test_stem(word, stem):
+    assert _stem(word) == stem
+
+
+def test_load_index_caches_until_sources_change(tmp_path):
+    data = tmp_path / "categories.json"
+    data.write_text(json.dumps({"weather": [["Under the weather", "不舒服"]]}))
+    cache = tmp_path / "index.pkl"
+
+    first = load_index(["no cap"], str(data), cache_path=str(cache))
+    assert cache.exists() and len(first) == 2
+    assert len(load_index(["no cap"], str(data), cache_path=str(cache))) == 2
+
+    lexicon = tmp_path / "lexicon.txt"
+    lexicon.write_text("# comment\nrizz\tslang\n")
+    rebuilt = load_index(["no cap"], str(data), str(lexicon), str(cache))
+    assert [m.category for m in rebuilt.find("so much rizz")] == ["slang"]
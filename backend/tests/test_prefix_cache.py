@@ -0,0 +1,89 @@
+import pytest
+
+mx = pytest.importorskip("mlx.core")
+pytest.importorskip("mlx_lm")
+
+from mlx_lm.models.cache import KVCache
+from src.agents.prefix_cache import PrefixCache, split_prefix
+
+
+class WordTokenizer:
+    """One token per word; "ab" style compounds merge like subword tokenizers do"""
+
+    bos_token = "<s>"
+
+    def __init__(self):
+        self.vocab = {"<s>": 0}
+
+    def encode(self, text, add_special_tokens=True):
+        ids = [0] if add_special_tokens else []
+        for word in text.replace("<s>", " <s> ").split():
+            ids.append(self.vocab.setdefault(word, len(self.vocab)))
+        return ids
+
+
+class TinyModel:
+    """One attention layer's worth of KV state: keys are the token ids"""
+
+    def __init__(self):
+        self.prefills = []
+
+    def make_cache(self):
+        return [KVCache()]
+
+    def __call__(self, tokens, cache):
+        self.prefills.append(tokens.shape[1])
+        keys = tokens.astype(mx.float32)[:, None, :, None]
+        cache[0].update_and_fetch(keys, keys)
+        return keys
+
+
+def test_prefix_tokens_counted_when_token_exact():
+    tokenizer = WordTokenizer()
+    n, tokens = split_prefix(tokenizer, "Translate this: hello there", "Translate this:")
+    assert n == 3  # BOS + two words
+    assert tokens[:n] == tokenizer.encode("Translate this:")
+
+
+def test_prefix_not_at_a_token_boundary_is_not_reused():
+    tokenizer = WordTokenizer()
+    assert split_prefix(tokenizer, "Translate this:hello", "Translate this:")[0] == 0
+    assert split_prefix(tokenizer, "Other prompt", "Translate this:")[0] == 0
+    assert split_prefix(tokenizer, "Translate this:", "Translate this:")[0] == 0  # Nothing left to prefill
+    assert split_prefix(tokenizer, "hello", None)[0] == 0
+
+
+def test_prompt_with_explicit_bos_gets_no_second_one():
+    n, tokens = split_prefix(WordTokenizer(), "<s> System: hi", "<s> System:")
+    assert tokens.count(0) == 1 and n == 2
+
+
+def test_prefix_prefilled_once_and_copied_per_request():
+    model = TinyModel()
+    cache = PrefixCache(max_entries=2)
+    prefix = [0, 1, 2]
+
+    first = cache.get(model, "default", prefix)
+    second = cache.get(model, "default", prefix)
+    assert model.prefills == [3]
+    assert cache.stats()["hits"] == 1 and cache.saved_tokens == 3
+
+    # Requests extend their own copy; the cached entry keeps only the prefix
+    model(mx.array([[7, 8]]), cache=first)
+    assert first[0].offset == 5 and second[0].offset == 3
+    assert cache.get(model, "default", prefix)[0].offset == 3
+
+
+def test_entries_are_per_adapter_and_evicted_lru():
+    model = TinyModel()
+    cache = PrefixCache(max_entries=2)
+    cache.get(model, "a", [0, 1])
+    cache.get(model, "b", [0, 1])
+    cache.get(model, "a", [0, 1])
+    cache.get(model, "c", [0, 1])
+    assert model.prefills == [2, 2, 2]
+    assert [adapter for adapter, _ in cache.entries] == ["a", "c"]
+    assert cache.evictions == 1
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,70 @@
+import numpy as np
+from src.audio.ring_buffer import AudioRingBuffer, float32_to_int16
+
+
+def samples(start, stop):
+    return np.arange(start, stop, dtype=np.float32)
+
+
+def test_evicts_oldest_samples_beyond_capacity():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.append(samples(0, 6))
+    buffer.append(samples(6, 11))
+    assert len(buffer) == 8
+    assert buffer.offset == 3
+    assert buffer.end_offset == 11
+    np.testing.assert_array_equal(buffer.view(), samples(3, 11))
+    np.testing.assert_array_equal(buffer.latest(2 / 16000), samples(9, 11))
+
+
+def test_oversized_append_keeps_newest_capacity_samples():
+    buffer = AudioRingBuffer(capacity=4)
+    buffer.append(samples(0, 2))
+    buffer.append(samples(2, 12))
+    assert buffer.offset == 8
+    np.testing.assert_array_equal(buffer.view(), samples(8, 12))
+
+
+def test_trim_to_uses_absolute_stream_index():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.append(samples(0, 8))
+    buffer.trim_to(5)
+    np.testing.assert_array_equal(buffer.view(), samples(5, 8))
+    buffer.trim_to(100)
+    assert len(buffer) == 0 and buffer.offset == 8
+
+
+def test_compaction_moves_in_place_once_view_released():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.append(samples(0, 8))
+    buffer.view()
+    buffer.release()
+    backing = buffer._data
+    buffer.trim_to(6)
+    buffer.append(samples(8, 16))  # Tail reaches the end of the backing array
+    assert buffer._data is backing
+    np.testing.assert_array_equal(buffer.view(), samples(8, 16))
+
+
+def test_compaction_preserves_borrowed_view():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.append(samples(0, 8))
+    view = buffer.view()
+    buffer.trim_to(6)
+    buffer.append(samples(8, 16))
+    np.testing.assert_array_equal(view, samples(0, 8))  # Old array untouched
+    np.testing.assert_array_equal(buffer.view(), samples(8, 16))
+
+
+def test_clear_restarts_stream_position():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.append(samples(0, 5))
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.offset == 0
+
+
+def test_float32_to_int16_into_reused_buffer():
+    out = np.empty(8, dtype=np.int16)
+    pcm = float32_to_int16(np.array([0.0, 0.5, -1.0], dtype=np.float32), out)
+    np.testing.assert_array_equal(pcm, [0, 16383, -32767])
+    assert pcm.base is out
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from src.agents.scheduler import LLMScheduler, TRANSLATION, DETECTION, EXPLANATION
+from src.executor import InferenceQueueFull
+
+
+async def hold(scheduler, priority, session, order, release):
+    async with scheduler.slot(priority, session):
+        order.append((priority, session))
+        await release.wait()
+
+
+def run_ordering(requests, slots=1, reserved=0):
+    """Admission order of `requests` queued behind a held slot"""
+    async def scenario():
+        scheduler = LLMScheduler(slots=slots, reserved=reserved)
+        order = []
+        release = asyncio.Event()
+        blocker = asyncio.Event()
+        first = asyncio.create_task(hold(scheduler, TRANSLATION, "blocker", [], blocker))
+        await asyncio.sleep(0)
+        tasks = []
+        for priority, session in requests:
+            tasks.append(asyncio.create_task(hold(scheduler, priority, session, order, release)))
+            await asyncio.sleep(0)
+        release.set()
+        blocker.set()
+        await asyncio.gather(first, *tasks)
+        return order
+    return asyncio.run(scenario())
+
+
+def test_higher_priority_classes_go_first():
+    order = run_ordering([(EXPLANATION, "a"), (DETECTION, "a"), (TRANSLATION, "a")])
+    assert [priority for priority, _ in order] == [TRANSLATION, DETECTION, EXPLANATION]
+
+
+def test_sessions_take_turns_within_a_class():
+    order = run_ordering([(TRANSLATION, "a"), (TRANSLATION, "a"), (TRANSLATION, "a"), (TRANSLATION, "b")])
+    assert [session for _, session in order] == ["a", "b", "a", "a"]
+
+
+def test_reserved_slot_is_kept_for_translations():
+    async def scenario():
+        scheduler = LLMScheduler(slots=2, reserved=1)
+        release = asyncio.Event()
+        order = []
+        explanation = asyncio.create_task(hold(scheduler, EXPLANATION, "a", order, release))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold(scheduler, DETECTION, "a", order, release))
+        await asyncio.sleep(0)
+        translation = asyncio.create_task(hold(scheduler, TRANSLATION, "a", order, release))
+        await asyncio.sleep(0)
+        # Detection waits for the shared slot; translation takes the reserved one
+        assert order == [(EXPLANATION, "a"), (TRANSLATION, "a")]
+        release.set()
+        await asyncio.gather(explanation, second, translation)
+        assert scheduler.running == 0
+    asyncio.run(scenario())
+
+
+def test_full_class_queue_rejects():
+    async def scenario():
+        scheduler = LLMScheduler(slots=1, reserved=0, max_queued=[1, 1, 1])
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(scheduler, TRANSLATION, "a", [], release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(scheduler, DETECTION, "a", [], release))
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull):
+            async with scheduler.slot(DETECTION, "b"):
+                pass
+        assert scheduler.classes[DETECTION].rejected == 1
+        release.set()
+        await asyncio.gather(running, queued)
+    asyncio.run(scenario())
+
+
+def test_deferred_past_max_wait_expires():
+    async def scenario():
+        scheduler = LLMScheduler(slots=1, reserved=0, max_wait=[1.0, 1.0, 0.01])
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(scheduler, TRANSLATION, "a", [], release))
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull):
+            async with scheduler.slot(EXPLANATION, "a"):
+                pass
+        assert scheduler.classes[EXPLANATION].expired == 1
+        assert scheduler.classes[EXPLANATION].queued == 0
+        release.set()
+        await running
+        assert scheduler.running == 0
+    asyncio.run(scenario())
+
+
+def test_unknown_priority():
+    async def scenario():
+        with pytest.raises(ValueError):
+            async with LLMScheduler(slots=1).slot("bulk"):
+                pass
+    asyncio.run(scenario())
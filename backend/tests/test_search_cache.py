@@ -0,0 +1,67 @@
+import pytest
+from src.services.search_cache import SearchCache, cache_key
+
+RESULTS = [{"url": "https://example.com", "title": "Example", "snippet": "..."}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.search_cache.time.time", lambda: now[0])
+    return now
+
+
+def test_cache_key_normalizes_english_phrases():
+    assert cache_key("Spilled the Beans!") == cache_key("spill the bean")
+
+
+def test_cache_key_keeps_non_english_phrases_apart():
+    keys = {cache_key(p) for p in ["¡Órale!", "¡Ándale!", "走着瞧", "🔥", "😂"]}
+    assert len(keys) == 5
+    assert cache_key("¡ÓRALE!") == cache_key("¡órale!")
+
+
+def test_results_expire_after_ttl(clock):
+    cache = SearchCache(ttl=60, negative_ttl=10)
+    assert cache.get("k") is None
+    cache.put("k", RESULTS)
+    clock[0] += 59
+    assert cache.get("k") == RESULTS
+    clock[0] += 2
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_empty_results_cached_for_negative_ttl(clock):
+    cache = SearchCache(ttl=60, negative_ttl=10)
+    cache.put("k", [])
+    assert cache.get("k") == []
+    assert cache.negative_hits == 1
+    clock[0] += 11
+    assert cache.get("k") is None
+
+
+def test_memory_tier_is_lru():
+    cache = SearchCache(max_memory=2)
+    cache.put("a", RESULTS)
+    cache.put("b", RESULTS)
+    cache.get("a")
+    cache.put("c", RESULTS)
+    assert list(cache.memory) == ["a", "c"]
+
+
+def test_disk_tier_survives_restart_and_purges_expired(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SearchCache(path, ttl=60, negative_ttl=10)
+    cache.put("fresh", RESULTS)
+    cache.put("empty", [])
+    cache.close()
+
+    clock[0] += 30
+    reopened = SearchCache(path, ttl=60, negative_ttl=10)  # Drops the expired empty result
+    assert reopened.db.execute("SELECT key FROM results").fetchall() == [("fresh",)]
+    assert reopened.get("fresh") == RESULTS
+    assert reopened.disk_hits == 1
+    assert reopened.get("fresh") == RESULTS
+    assert reopened.memory_hits == 1
+    reopened.close()
@@ -0,0 +1,136 @@
+import asyncio
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from src.audio.streaming_asr import StreamingASREngine
+from src.executor import InferenceQueueFull
+
+RATE = 16000
+
+
+class FakeDecoder:
+    """Returns scripted words (relative to the window) and records each window"""
+
+    def __init__(self, *passes):
+        self.passes = list(passes)
+        self.windows = []
+
+    async def transcribe_words(self, audio, prompt=None, beam_size=5):
+        self.windows.append(len(audio) / RATE)
+        result = self.passes.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeTier:
+    model_path = "fake"
+
+    def __init__(self, decoder):
+        self.decoder = decoder
+
+
+class FakeCascade:
+    enabled = False
+
+    def __init__(self, decoder):
+        self.tier = FakeTier(decoder)
+
+    def is_ready(self):
+        return True
+
+    def final_tier(self, engine):
+        return self.tier
+
+
+def make_engine(*passes):
+    decoder = FakeDecoder(*passes)
+    results = []
+    engine = StreamingASREngine(
+        FakeCascade(decoder), session_id="test",
+        on_text_callback=lambda text, is_final, utterance_id: results.append((text, is_final))
+    )
+    return engine, decoder, results
+
+
+def feed(engine, seconds):
+    engine.audio_buffer.append(np.zeros(int(seconds * RATE), dtype=np.float32))
+    engine.speech_active = True
+
+
+def run_pass(engine, final=False):
+    engine.final_pending = final
+    asyncio.run(engine._process_buffer())
+
+
+def test_agreed_words_are_committed_and_their_audio_trimmed():
+    engine, _, results = make_engine(
+        [(0.0, 0.5, " Hello"), (0.6, 1.0, " there")],
+        [(0.0, 0.5, " Hello"), (0.6, 1.0, " there."), (1.2, 1.6, " How")],
+    )
+    feed(engine, 2.0)
+    run_pass(engine)
+    assert results == [] and engine.audio_buffer.offset == 0
+
+    run_pass(engine)
+    assert results == [("Hello there.", True)]
+    assert engine.audio_buffer.offset == 1.0 * RATE  # Up to the last committed word
+    assert [w[2] for w in engine.hypothesis.unconfirmed()] == [" How"]
+
+
+def test_commits_wait_for_a_sentence_boundary():
+    engine, _, results = make_engine(
+        [(0.0, 0.5, " one"), (0.6, 1.0, " two")],
+        [(0.0, 0.5, " one"), (0.6, 1.0, " two")],
+    )
+    feed(engine, 2.0)
+    run_pass(engine)
+    run_pass(engine)
+    assert results == []
+    assert [w[2] for w in engine.pending_words] == [" one", " two"]
+
+
+def test_final_pass_commits_everything_and_goes_idle():
+    engine, _, results = make_engine([(0.0, 0.5, " Good"), (0.6, 1.0, " night")])
+    feed(engine, 1.5)
+    run_pass(engine, final=True)
+    assert results == [("Good night", True)]
+    assert len(engine.audio_buffer) == 0
+    assert not engine.speech_active
+
+
+def test_window_at_max_length_is_force_committed():
+    engine, decoder, results = make_engine([(0.0, 0.5, " never"), (0.6, 1.0, " stops")])
+    feed(engine, engine.scheduler.max_window)
+    run_pass(engine)
+    assert results == [("never stops", True)]
+    assert engine.audio_buffer.offset == 1.0 * RATE
+
+
+def test_silent_window_keeps_one_second_of_context():
+    engine, _, _ = make_engine([])
+    feed(engine, 3.0)
+    run_pass(engine)
+    assert len(engine.audio_buffer) == RATE
+    assert engine.audio_buffer.offset == 2 * RATE
+
+
+def test_rejected_final_pass_keeps_audio_and_retries():
+    engine, decoder, results = make_engine(InferenceQueueFull("busy"), [(0.0, 0.5, " Bye")])
+    feed(engine, 1.0)
+    run_pass(engine, final=True)
+    assert results == [] and len(engine.audio_buffer) == RATE
+    assert engine.final_pending
+
+    asyncio.run(engine._process_buffer())
+    assert results == [("Bye", True)]
+    assert decoder.windows == [1.0, 1.0]
+
+
+def test_short_windows_are_not_decoded():
+    engine, decoder, _ = make_engine()
+    feed(engine, 0.2)
+    run_pass(engine)
+    assert decoder.windows == []
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from src.audio.vad import split_at_silence
+from src.services import transcription_jobs as jobs
+from src.services.transcription_jobs import TranscriptionJobManager, TranscriptionFailed, DONE, FAILED
+
+RATE = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """Job manager transcribing on threads with a fake model"""
+    manager = TranscriptionJobManager(num_workers=2, chunk_seconds=30)
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(manager, "_pool", lambda: executor)
+    monkeypatch.setattr(jobs, "transcribe_chunk", lambda samples, language: f"{len(samples) / RATE:.0f}s")
+    yield manager
+    executor.shutdown()
+
+
+def recorder():
+    events = []
+
+    async def listener(event, payload):
+        events.append((event, payload))
+
+    return events, listener
+
+
+async def feed_all(feed, audio, block=RATE, pace=0.0):
+    """Write audio as a decoder would, pace seconds apart per block"""
+    for i in range(0, len(audio), block):
+        await feed.write(audio[i:i + block])
+        await asyncio.sleep(pace)
+    job = await feed.close()
+    await feed._finisher
+    return job
+
+
+def test_chunks_are_transcribed_while_audio_arrives(manager):
+    audio = np.concatenate([tone(26), np.zeros(RATE, dtype=np.float32), tone(40)])
+    events, listener = recorder()
+
+    async def scenario():
+        feed = manager.open(listener=listener)
+        assert feed.job.decoding
+        return await feed_all(feed, audio, pace=0.005)
+
+    job = asyncio.run(scenario())
+    bounds = split_at_silence(audio, max_chunk_s=30)
+    assert job.status == DONE and not job.decoding
+    assert len(job.chunks) == len(bounds) == 3
+    assert job.duration == pytest.approx(len(audio) / RATE)
+    assert job.partial_transcript() == " ".join(f"{(e - s) / RATE:.0f}s" for s, e in bounds)
+
+    progress = [payload for event, payload in events if event == "transcription_progress"]
+    assert sorted(p["chunk"] for p in progress) == [0, 1, 2]
+    assert progress[0]["decoding"]  # First chunk finished before the upload did
+    assert events[-1] == ("transcription_complete", job.to_dict())
+    assert manager.stats()["active"] == 0
+
+
+def test_in_flight_chunks_are_bounded(monkeypatch, manager):
+    release = threading.Event()
+
+    def blocked(samples, language):
+        release.wait(5)
+        return "text"
+
+    monkeypatch.setattr(jobs, "transcribe_chunk", blocked)
+    manager.max_pending = 2
+
+    async def scenario():
+        feed = manager.open()
+        writer = asyncio.create_task(feed_all(feed, tone(150), block=10 * RATE))
+        await asyncio.sleep(0.2)
+        in_flight = len(feed._chunks)
+        buffered = feed.chunker.end - feed.chunker.offset
+        stalled = not writer.done()
+        release.set()
+        job = await writer
+        return in_flight, buffered, stalled, job
+
+    in_flight, buffered, stalled, job = asyncio.run(scenario())
+    assert stalled and in_flight == 2
+    assert buffered <= 30 * RATE + RATE  # The writer waits instead of buffering audio
+    assert job.status == DONE and len(job.chunks) == len(split_at_silence(tone(150), max_chunk_s=30))
+
+
+def test_failed_chunk_fails_the_job_and_stops_the_feed(monkeypatch, manager):
+    def broken(samples, language):
+        raise RuntimeError("worker crashed")
+
+    monkeypatch.setattr(jobs, "transcribe_chunk", broken)
+    events, listener = recorder()
+
+    async def scenario():
+        feed = manager.open(listener=listener)
+        with pytest.raises(TranscriptionFailed):
+            for _ in range(30):
+                await feed.write(tone(10))
+                await asyncio.sleep(0.01)
+        await feed._finisher
+        return feed.job
+
+    job = asyncio.run(scenario())
+    assert job.status == FAILED and job.error == "worker crashed"
+    assert events[-1][0] == "transcription_complete" and events[-1][1]["status"] == FAILED
+
+
+def test_abort_ends_the_job(manager):
+    events, listener = recorder()
+
+    async def scenario():
+        feed = manager.open(listener=listener)
+        await feed.write(tone(45))
+        feed.abort("Audio longer than 30s")
+        feed.abort("ignored")
+        await feed._finisher
+        return feed.job
+
+    job = asyncio.run(scenario())
+    assert job.status == FAILED and job.error == "Audio longer than 30s"
+    assert [event for event, _ in events].count("transcription_complete") == 1
+
+
+def test_finished_jobs_are_pruned(manager):
+    manager.max_finished = 2
+
+    async def scenario():
+        ids = []
+        for _ in range(4):
+            feed = manager.open()
+            ids.append(feed.job.id)
+            await feed_all(feed, tone(1))
+        manager.open()
+        return ids
+
+    ids = asyncio.run(scenario())
+    assert [manager.get(i) is not None for i in ids] == [False, False, True, True]
@@ -0,0 +1,51 @@
+import numpy as np
+from src.audio.vad import EnergyVAD, split_at_silence
+
+RATE = 16000
+
+
+def tone(seconds, amplitude=0.3, freq=220.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def test_speech_then_silence_ends_utterance_after_hangover():
+    vad = EnergyVAD(hangover_s=0.5)
+    assert not vad.process(silence(0.25)).is_speech
+    assert vad.process(tone(0.25)).is_speech
+    assert vad.in_speech
+
+    first = vad.process(silence(0.25))
+    assert not first.is_speech and not first.utterance_ended
+    assert vad.process(silence(0.25)).utterance_ended
+    assert not vad.in_speech
+
+
+def test_noise_is_not_speech():
+    rng = np.random.default_rng(0)
+    noise = (rng.uniform(-1, 1, RATE // 4) * 0.3).astype(np.float32)
+    assert not EnergyVAD().process(noise).is_speech  # Zero-crossing rate too high
+
+
+def test_split_at_silence_cuts_in_the_quiet_gap():
+    audio = np.concatenate([tone(26), silence(1), tone(10)])
+    bounds = split_at_silence(audio, max_chunk_s=30, search_s=5)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    cut = bounds[0][1] / RATE
+    assert 26 <= cut <= 27
+
+
+def test_split_at_silence_respects_max_chunk():
+    audio = tone(95)
+    bounds = split_at_silence(audio, max_chunk_s=30)
+    assert len(bounds) == 4
+    assert all(end - start <= 30 * RATE for start, end in bounds)
+
+
+def test_short_audio_is_one_chunk():
+    assert split_at_silence(tone(3)) == [(0, 3 * RATE)]
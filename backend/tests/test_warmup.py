@@ -0,0 +1,63 @@
+import asyncio
+from src.warmup import StartupOrchestrator, READY, FAILED
+
+
+def test_components_load_and_warm_in_order():
+    calls = []
+    startup = StartupOrchestrator()
+    startup.add("asr", lambda: calls.append("asr load"), lambda: calls.append("asr warmup"))
+    startup.add("llm", lambda: calls.append("llm load"))
+    assert not startup.is_ready()
+
+    asyncio.run(startup.run())
+    assert calls == ["asr load", "asr warmup", "llm load"]
+    assert startup.is_ready()
+    status = startup.status()
+    assert status["ready"] and status["components"]["asr"]["state"] == READY
+    assert status["components"]["asr"]["warmup_time"] is not None
+    assert status["components"]["llm"]["warmup_time"] is None
+
+
+def test_failure_is_recorded_and_later_components_still_load():
+    def fail():
+        raise MemoryError("out of memory")
+
+    startup = StartupOrchestrator()
+    startup.add("asr", lambda: None)
+    startup.add("llm", fail)
+    startup.add("phrases", lambda: None, required=False)
+    asyncio.run(startup.run())
+
+    assert startup.components["llm"].state == FAILED
+    assert startup.components["llm"].error == "out of memory"
+    assert startup.components["phrases"].state == READY
+    assert not startup.is_ready()  # A required component failed
+    assert startup.component_ready("asr")  # Live audio can still be served
+    assert not startup.component_ready("llm")
+
+
+def test_optional_components_do_not_gate_readiness():
+    startup = StartupOrchestrator()
+    startup.add("asr", lambda: None)
+    startup.add("transcribe", lambda: None, required=False)
+    asyncio.run(startup._bring_up(startup.components["asr"]))
+    assert startup.is_ready()
+    assert not startup.component_ready("transcribe")
+    assert not startup.component_ready("unregistered")
+
+
+def test_start_runs_once_in_the_background():
+    loads = []
+
+    async def scenario():
+        startup = StartupOrchestrator()
+        startup.add("asr", lambda: loads.append(1))
+        task = startup.start()
+        assert startup.start() is task
+        assert not startup.component_ready("asr")  # Loading hasn't finished yet
+        await task
+        return startup
+
+    startup = asyncio.run(scenario())
+    assert loads == [1]
+    assert startup.status()["elapsed"] is not None
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from src.audio.wire import ChunkDecoder, negotiate, FORMAT_F32, FORMAT_S16, FORMAT_OPUS
+
+
+def test_negotiate_picks_first_supported_offer():
+    assert negotiate(["opus", "s16", "f32"], [FORMAT_S16, FORMAT_F32]) == FORMAT_S16
+    assert negotiate("s16", [FORMAT_S16, FORMAT_F32]) == FORMAT_S16
+
+
+def test_negotiate_falls_back_to_f32():
+    assert negotiate(None) == FORMAT_F32
+    assert negotiate([]) == FORMAT_F32
+    assert negotiate(["mp3"], [FORMAT_S16, FORMAT_F32]) == FORMAT_F32
+
+
+def test_f32_decode_is_zero_copy():
+    samples = np.array([0.0, 0.25, -0.5], dtype=np.float32)
+    decoded = ChunkDecoder(FORMAT_F32).decode(samples.tobytes())
+    np.testing.assert_array_equal(decoded, samples)
+
+
+def test_s16_decode_scales_and_reuses_scratch():
+    decoder = ChunkDecoder(FORMAT_S16)
+    first = decoder.decode(np.array([0, 16384, -32768], dtype=np.int16).tobytes())
+    np.testing.assert_allclose(first, [0.0, 0.5, -1.0])
+    second = decoder.decode(np.array([8192], dtype=np.int16).tobytes())
+    assert np.shares_memory(first, second)
+    np.testing.assert_allclose(second, [0.25])
+
+
+def test_opus_without_bindings_is_rejected(monkeypatch):
+    monkeypatch.setattr("src.audio.wire.OPUS_AVAILABLE", False)
+    with pytest.raises(ValueError):
+        ChunkDecoder(FORMAT_OPUS)
@@ -34,10 +34,10 @@ export const TranscriptView: React.FC = () => {
                             
                             {/* Translation */}
                             {translation && (
-                                <div className="text-base text-blue-500 font-normal ml-4 border-l-2 border-blue-500 pl-2">
+                                <div className={`text-base text-blue-500 font-normal ml-4 border-l-2 border-blue-500 pl-2 ${translation.partial ? 'opacity-70' : ''}`}>
                                     {translation.translated_text}
                                     <span className="text-xs text-muted-foreground ml-2">
-                                        ({translation.latency_ms.toFixed(0)}ms)
+                                        ({translation.latency_ms.toFixed(0)}ms{translation.refined ? ', with cultural context' : ''})
                                     </span>
                                 </div>
                             )}
@@ -1,6 +1,8 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
 import { useSocket } from './useSocket';
 import { vad } from '../lib/vad';
+import { OpusChunkEncoder, toInt16 } from '../lib/audioFormat';
+import { useAppStore } from '../store/useAppStore';
 
 export const useAudio = () => {
     const [isListening, setIsListening] = useState(false);
@@ -10,6 +12,7 @@ export const useAudio = () => {
     const sourceNodeRef = useRef<MediaStreamAudioSourceNode | null>(null);
     const streamRef = useRef<MediaStream | null>(null);
     const workletLoadedRef = useRef<boolean>(false); // Track if worklet is loaded
+    const opusEncoderRef = useRef<OpusChunkEncoder | null>(null);
     const socket = useSocket();
 
     useEffect(() => {
@@ -86,9 +89,22 @@ export const useAudio = () => {
 
                 // Send to backend (VAD will return 1.0 if not available, so all audio is sent)
                 if (socket && socket.connected) {
-                    socket.emit('audio_chunk', audioData.buffer);
+                    // Encode in the format negotiated during the handshake
+                    const format = useAppStore.getState().audioFormat;
+                    if (format === 'opus') {
+                        if (!opusEncoderRef.current) {
+                            opusEncoderRef.current = new OpusChunkEncoder(
+                                (payload) => socket.emit('audio_chunk', payload)
+                            );
+                        }
+                        opusEncoderRef.current.encode(audioData);
+                    } else if (format === 's16') {
+                        socket.emit('audio_chunk', toInt16(audioData).buffer);
+                    } else {
+                        socket.emit('audio_chunk', audioData.buffer);
+                    }
                     if (chunkCount === 1) {
-                        console.log("First audio chunk sent, size:", audioData.buffer.byteLength);
+                        console.log(`First audio chunk sent (${format}), samples:`, audioData.length);
                     }
                 } else if (chunkCount % 100 === 0) {
                     // Only log occasionally to avoid spam
@@ -132,6 +148,12 @@ export const useAudio = () => {
             }
         }
 
+        if (opusEncoderRef.current) {
+            // Flushes the final packets to the socket before closing
+            opusEncoderRef.current.close();
+            opusEncoderRef.current = null;
+        }
+
         // Stop the media stream tracks
         if (streamRef.current) {
             streamRef.current.getTracks().forEach(track => {
@@ -1,6 +1,7 @@
 import { useEffect, useRef } from 'react';
 import { io, Socket } from 'socket.io-client';
 import { useAppStore } from '../store/useAppStore';
+import { offeredFormats } from '../lib/audioFormat';
 
 const SOCKET_URL = 'http://localhost:8000';
 
@@ -17,7 +18,9 @@ export const useSocket = () => {
         if (!socketRef.current) {
             socketRef.current = io(SOCKET_URL, {
                 transports: ['websocket'],
-                autoConnect: true
+                autoConnect: true,
+                // Offer compact audio encodings; server picks one
+                auth: { audio_formats: offeredFormats() }
             });
 
             const socket = socketRef.current;
@@ -32,9 +35,19 @@ export const useSocket = () => {
                 setStatus('error');
             });
 
-            socket.on('connect_error', (err) => {
+            socket.on('audio_format', (data: any) => {
+                console.log('Negotiated audio format:', data.format);
+                useAppStore.getState().setAudioFormat(data.format);
+            });
+
+            socket.on('connect_error', (err: any) => {
                 console.error('Socket connect error:', err);
                 setStatus('error');
+                // Server refuses connections until its models are warm; try again
+                if (err.data?.code === 'NOT_READY') {
+                    setTimeout(() => socket.connect(), 2000);
+                }
+                // BUSY: the server's live ASR serves one client at a time; stay in error
             });
 
             socket.on('transcript_partial', (data: any) => {
@@ -50,12 +63,36 @@ export const useSocket = () => {
                 setStatus('listening');
             });
 
+            // Translation text so far; translation_final for the same chunk_id replaces it
+            socket.on('translation_partial', (translation) => {
+                updateTranslation({ ...translation, partial: true });
+            });
+
             socket.on('translation_final', (translation) => {
                 updateTranslation(translation);
             });
 
+            // Context-aware translation replacing the plain one once an insight arrives
+            socket.on('translation_update', (translation) => {
+                updateTranslation({ ...translation, refined: true });
+            });
+
+            // Explanation so far; cultural_insight with the same id replaces it
+            socket.on('insight_partial', (data: any) => {
+                addInsight({
+                    id: data.id,
+                    source_text: data.phrase,
+                    phrase: data.phrase,
+                    explanation: data.explanation,
+                    context_type: 'slang',
+                    type: 'slang',
+                    sources: [],
+                    partial: true
+                });
+            });
+
             socket.on('cultural_insight', (insight) => {
-                addInsight(insight);
+                addInsight({ ...insight, partial: false });
             });
         }
 
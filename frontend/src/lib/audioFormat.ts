@@ -0,0 +1,97 @@
+// Audio wire formats for the audio_chunk event.
+// The client offers these in the Socket.IO handshake (auth.audio_formats),
+// the server answers with an `audio_format` event naming the one to use.
+
+export type AudioFormat = 'f32' | 's16' | 'opus';
+
+const SAMPLE_RATE = 16000;
+
+export const opusSupported = (): boolean => typeof (window as any).AudioEncoder !== 'undefined';
+
+// Best compression first; float32 is always understood by the server
+export const offeredFormats = (): AudioFormat[] =>
+    opusSupported() ? ['opus', 's16', 'f32'] : ['s16', 'f32'];
+
+export const toInt16 = (samples: Float32Array): Int16Array => {
+    const out = new Int16Array(samples.length);
+    for (let i = 0; i < samples.length; i++) {
+        const s = Math.max(-1, Math.min(1, samples[i]));
+        out[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
+    }
+    return out;
+};
+
+// Encodes Float32 frames to raw Opus packets with WebCodecs and hands them
+// over as soon as the encoder emits them, packets of one burst sharing a
+// payload: [u16 LE length][packet]...
+export class OpusChunkEncoder {
+    private encoder: any;
+    private packets: Uint8Array[] = [];
+    private flushScheduled = false;
+    private timestamp = 0;
+
+    constructor(private onPayload: (payload: ArrayBuffer) => void) {
+        const AudioEncoderCtor = (window as any).AudioEncoder;
+        this.encoder = new AudioEncoderCtor({
+            output: (chunk: any) => {
+                const packet = new Uint8Array(chunk.byteLength);
+                chunk.copyTo(packet);
+                this.packets.push(packet);
+                // Output arrives asynchronously; send once this burst is delivered
+                if (!this.flushScheduled) {
+                    this.flushScheduled = true;
+                    queueMicrotask(() => this.flushPackets());
+                }
+            },
+            error: (e: Error) => console.error('Opus encoder error:', e),
+        });
+        this.encoder.configure({
+            codec: 'opus',
+            sampleRate: SAMPLE_RATE,
+            numberOfChannels: 1,
+            bitrate: 24000,
+        });
+    }
+
+    encode(samples: Float32Array) {
+        const AudioDataCtor = (window as any).AudioData;
+        const data = new AudioDataCtor({
+            format: 'f32',
+            sampleRate: SAMPLE_RATE,
+            numberOfFrames: samples.length,
+            numberOfChannels: 1,
+            timestamp: this.timestamp,
+            data: samples,
+        });
+        this.timestamp += (samples.length / SAMPLE_RATE) * 1_000_000;
+        this.encoder.encode(data);
+        data.close();
+    }
+
+    private flushPackets() {
+        this.flushScheduled = false;
+        if (!this.packets.length) return;
+        const size = this.packets.reduce((sum, p) => sum + 2 + p.length, 0);
+        const payload = new Uint8Array(size);
+        const view = new DataView(payload.buffer);
+        let offset = 0;
+        for (const packet of this.packets) {
+            view.setUint16(offset, packet.length, true);
+            payload.set(packet, offset + 2);
+            offset += 2 + packet.length;
+        }
+        this.packets = [];
+        this.onPayload(payload.buffer);
+    }
+
+    // Sends the packets still inside the encoder, then releases it
+    async close() {
+        try {
+            await this.encoder.flush();
+            this.flushPackets();
+            this.encoder.close();
+        } catch (e) {
+            // Already closed
+        }
+    }
+}
@@ -1,4 +1,5 @@
 import { create } from 'zustand'
+import type { AudioFormat } from '@/lib/audioFormat'
 
 export interface TranscriptChunk {
     id: string
@@ -13,6 +14,8 @@ export interface Translation {
     target_lang: string
     translated_text: string
     latency_ms: number
+    partial?: boolean  // Still decoding (translation_partial)
+    refined?: boolean  // Re-translated with cultural context (translation_update)
 }
 
 export interface CulturalInsight {
@@ -24,6 +27,7 @@ export interface CulturalInsight {
     type: string  // alias for context_type
     sources: Array<{ url: string, title: string, snippet: string }>
     relevance_score?: number
+    partial?: boolean  // Explanation still decoding (insight_partial)
 }
 
 interface AppState {
@@ -31,11 +35,13 @@ interface AppState {
     transcript: TranscriptChunk[]
     translations: Map<string, Translation>
     insights: CulturalInsight[]
+    audioFormat: AudioFormat
 
     setStatus: (status: AppState['status']) => void
     addTranscriptChunk: (chunk: TranscriptChunk) => void
     updateTranslation: (translation: Translation) => void
     addInsight: (insight: CulturalInsight) => void
+    setAudioFormat: (format: AudioFormat) => void
     clearTranscript: () => void
     reset: () => void
 }
@@ -45,9 +51,12 @@ export const useAppStore = create<AppState>((set) => ({
     transcript: [],
     translations: new Map(),
     insights: [],
+    audioFormat: 'f32',
 
     setStatus: (status) => set({ status }),
 
+    setAudioFormat: (audioFormat) => set({ audioFormat }),
+
     addTranscriptChunk: (chunk) => set((state) => {
         // If chunk exists (by ID), update it. Otherwise append.
         const existingIndex = state.transcript.findIndex(c => c.id === chunk.id);
@@ -66,6 +75,16 @@ export const useAppStore = create<AppState>((set) => ({
     }),
 
     addInsight: (insight) => set((state) => {
+        // Streaming updates of the same insight replace it in place
+        if (insight.id) {
+            const sameId = state.insights.findIndex(i => i.id === insight.id);
+            if (sameId !== -1) {
+                const updated = [...state.insights];
+                updated[sameId] = { ...updated[sameId], ...insight };
+                return { insights: updated };
+            }
+        }
+
         // Check if insight with same source_text already exists
         const existingIndex = state.insights.findIndex(
             i => (i.phrase || i.source_text).toLowerCase() === (insight.phrase || insight.source_text).toLowerCase()